@@ -1,28 +1,110 @@
-import cv2
-import easyocr
-import re
-from datetime import datetime
+import argparse
+import multiprocessing as mp
 import os
-import time
+import queue
+import re
+import signal
+import sys
 import threading
+import time
+from collections import namedtuple
+from datetime import datetime
 
-# =============================
-# Inisialisasi
-# =============================
-
-pembaca_ocr = easyocr.Reader(['en'])
-detektor_wajah = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+import cv2
 
-# Folder output
-folder_output = "etle_output"
-folder_output_plat = os.path.join(folder_output, "plat")
-folder_output_wajah = os.path.join(folder_output, "wajah")
+from bukti import PenyimpanBukti
+from cache_ocr import CacheOCR
+from database import buat_database, DatabaseError
+from lokalisasi_plat import cari_kandidat_plat, baca_kandidat
+from model_ai import registri_model
+from pelacak_wajah import DetektorWajahCepat
+from sumber_video import SumberReplay
 
-os.makedirs(folder_output_plat, exist_ok=True)
-os.makedirs(folder_output_wajah, exist_ok=True)
+# =============================
+# Mesin VTRACK (multi-sumber)
+# =============================
+#
+# Bisa di-import tanpa efek samping: tidak ada kamera atau thread yang
+# dibuka saat import. MesinVTrack menjalankan satu worker per sumber
+# (indeks perangkat, URL RTSP, file video, atau folder gambar untuk
+# pengujian offline), sebagai thread (model dipakai bersama, OCR
+# diserialkan) atau sebagai proses (model sendiri per proses, memakai
+# semua core). Mode headless tidak memanggil fungsi GUI sama sekali.
+# Worker melaporkan statistik lewat antrian ke mesin, jadi FPS per sumber
+# tersedia di kedua mode. Berhenti dikoordinasikan lewat satu Event:
+# worker menyelesaikan frame yang sedang diproses, melepas sumber, lalu
+# keluar; sumber hidup yang putus disambung ulang, file berhenti di akhir.
+# Wajah dicatat ke tabel deteksi_wajah (satu baris per jejak) jika database
+# diaktifkan; koneksi dibuat per proses. Hasil OCR kandidat plat di-cache
+# per sumber (CacheOCR), jadi kendaraan diam di palang hampir tidak memicu
+# OCR lagi.
+
+Sumber = namedtuple('Sumber', ('nama', 'jenis', 'alamat'))
+
+JENIS_SUMBER = ('plat', 'wajah')
+JEDA_SIMPAN_PLAT = 2
+JEDA_SIMPAN_WAJAH = 5
+JEDA_SAMBUNG_ULANG = 2.0
+INTERVAL_LAPORAN = 1.0
+FOLDER_OUTPUT = "etle_output"
+
+# Sama dengan app.py; 'tanpa' (default) menonaktifkan pencatatan ke database,
+# jadi VTRACK tetap berjalan tanpa mysql.connector atau server database.
+DB_CONFIG = { 'host': 'localhost', 'database': 'etle_system', 'user': 'root', 'password': '' }
+DB_BACKEND = os.environ.get('ETLE_DB_BACKEND', 'tanpa')
+DB_SQLITE_PATH = os.environ.get('ETLE_DB_SQLITE_PATH', 'etle_system.db')
+
+# Satu reader EasyOCR per proses; dalam mode thread pemanggilannya diserialkan.
+_lock_ocr = threading.Lock()
+_lock_penyimpan = threading.Lock()
+_penyimpan = {}
+_db = {}
+
+
+def ambil_penyimpan(folder_output, jenis):
+    # Satu PenyimpanBukti per (folder, jenis) per proses; ditutup oleh tutup_penyimpan().
+    kunci = (folder_output, jenis)
+    with _lock_penyimpan:
+        penyimpan = _penyimpan.get(kunci)
+        if penyimpan is None:
+            penyimpan = _penyimpan[kunci] = PenyimpanBukti(os.path.join(folder_output, jenis), nama=f"bukti-{jenis}")
+        return penyimpan
+
+
+def ambil_db(backend):
+    # Satu pool koneksi per backend per proses; None jika pencatatan database dimatikan
+    # atau backend tidak bisa dipakai (sumber tetap berjalan, hanya tanpa pencatatan).
+    if backend in (None, 'tanpa'):
+        return None
+    with _lock_penyimpan:
+        if backend in _db:
+            return _db[backend]
+        try:
+            db = buat_database(backend, config=DB_CONFIG, path_sqlite=DB_SQLITE_PATH, ukuran_pool=2)
+        except (ImportError, DatabaseError) as e:
+            print(f"⚠️ Database {backend} tidak bisa dipakai ({e}); wajah tidak dicatat ke database.")
+            db = None
+        _db[backend] = db
+        return db
+
+
+def baca_kandidat_terkunci(pembaca_ocr, frame, kandidat):
+    with _lock_ocr:
+        return baca_kandidat(pembaca_ocr, frame, kandidat)
+
+
+def tutup_penyimpan():
+    with _lock_penyimpan:
+        daftar = list(_penyimpan.values())
+        daftar_db = list(_db.values())
+        _penyimpan.clear()
+        _db.clear()
+    for penyimpan in daftar:
+        penyimpan.hentikan()
+    for db in daftar_db:
+        if db is not None:
+            db.tutup()
 
-print(f"📂 Folder plat: {os.path.abspath(folder_output_plat)}")
-print(f"📂 Folder wajah: {os.path.abspath(folder_output_wajah)}")
 
 # =============================
 # Fungsi Watermark Waktu
@@ -30,138 +112,367 @@ print(f"📂 Folder wajah: {os.path.abspath(folder_output_wajah)}")
 
 def tambahkan_waktu(frame):
     waktu = datetime.now().strftime("Waktu: %Y-%m-%d %H:%M:%S")
-    cv2.putText(frame, waktu, (10, frame.shape[0] - 10), 
+    cv2.putText(frame, waktu, (10, frame.shape[0] - 10),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
     return frame
 
 
 # =============================
-# Fungsi Deteksi Plat
+# Pemroses per Jenis Sumber
 # =============================
-
-def deteksi_plat():
-    kamera_plat = cv2.VideoCapture(2)
-    waktu_terakhir_plat = 0
-    jeda_plat = 2
-
-    if not kamera_plat.isOpened():
-        print("❌ Kamera plat gagal dibuka.")
-        return
-
-    print("🟢 Kamera PLAT aktif! Tekan ESC di window untuk keluar.")
-
-    while True:
-        ret, frame = kamera_plat.read()
-        if not ret:
-            break
-
-        frame = tambahkan_waktu(frame.copy())
-
-        abu = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blur = cv2.bilateralFilter(abu, 11, 17, 17)
-        tepi = cv2.Canny(blur, 30, 200)
-
-        kontur, _ = cv2.findContours(tepi.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        kontur = sorted(kontur, key=cv2.contourArea, reverse=True)[:10]
+#
+# proses(frame, model, gambar) mengembalikan jumlah objek yang terdeteksi.
+# Frame yang diserahkan ke penyimpan tidak boleh diubah lagi, jadi salinan
+# hanya dibuat jika overlay akan digambar (gambar=True).
+
+class ProsesPlat:
+    model = 'ocr'
+    pesan_memuat = "Memuat model OCR..."
+
+    def __init__(self, sumber, penyimpan, jeda_simpan=JEDA_SIMPAN_PLAT):
+        self.sumber = sumber
+        self.penyimpan = penyimpan
+        self.jeda_simpan = jeda_simpan
+        self.waktu_terakhir = 0
+        self.cache = CacheOCR(fungsi_baca=baca_kandidat_terkunci)
+
+    def proses(self, frame, pembaca_ocr, gambar):
+        kandidat = cari_kandidat_plat(frame)
+        if not kandidat:
+            return 0
+        hasil_ocr = self.cache.baca(pembaca_ocr, frame, kandidat)
 
         waktu_sekarang = time.time()
-
-        for c in kontur:
-            keliling = cv2.arcLength(c, True)
-            aproks = cv2.approxPolyDP(c, 0.018 * keliling, True)
-
-            if len(aproks) == 4:
-                x, y, w, h = cv2.boundingRect(aproks)
-                area_plat = frame[y:y+h, x:x+w]
-                hasil_ocr = pembaca_ocr.readtext(area_plat)
-
-                if hasil_ocr:
-                    for (_, teks, conf) in hasil_ocr:
-                        teks_bersih = teks.upper().replace(" ", "").strip()
-                        cocok = re.search(r"[A-Z]{1,2}\d{1,4}[A-Z]{0,3}", teks_bersih)
-
-                        if cocok:
-                            plat_nomor = cocok.group()
-                            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                            cv2.putText(frame, plat_nomor, (x, y - 10),
-                                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-                            if waktu_sekarang - waktu_terakhir_plat >= jeda_plat:
-                                nama_file = f"plat_{plat_nomor}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                                path_simpan = os.path.join(folder_output_plat, nama_file)
-                                cv2.imwrite(path_simpan, frame)
-                                print(f"✅ Plat terdeteksi: {plat_nomor} | Disimpan di {path_simpan}")
-                                waktu_terakhir_plat = waktu_sekarang
-                            break
-
-        cv2.imshow("Kamera Plat", frame)
-
-        if cv2.waitKey(1) & 0xFF == 27:
-            break
-
-    kamera_plat.release()
-    cv2.destroyAllWindows()
-    print("⛔ Kamera Plat ditutup.")
+        for (bbox, teks, conf) in hasil_ocr:
+            teks_bersih = teks.upper().replace(" ", "").strip()
+            cocok = re.search(r"[A-Z]{1,2}\d{1,4}[A-Z]{0,3}", teks_bersih)
+            if not cocok:
+                continue
+
+            plat_nomor = cocok.group()
+            (x, y), (x2, y2) = bbox[0], bbox[2]
+            x, y, x2, y2 = int(x), int(y), int(x2), int(y2)
+
+            if waktu_sekarang - self.waktu_terakhir >= self.jeda_simpan:
+                path_simpan, path_crop = self.penyimpan.simpan(frame.copy() if gambar else frame,
+                                                               f"{self.sumber.nama}_plat_{plat_nomor}", (x, y, x2 - x, y2 - y))
+                print(f"✅ [{self.sumber.nama}] Plat terdeteksi: {plat_nomor} | Disimpan di {path_simpan} (crop: {path_crop})")
+                self.waktu_terakhir = waktu_sekarang
+
+            if gambar:
+                cv2.rectangle(frame, (x, y), (x2, y2), (0, 255, 0), 2)
+                cv2.putText(frame, plat_nomor, (x, y - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            return 1
+        return 0
+
+    def statistik(self):
+        return {f"cache_{nama}": nilai for nama, nilai in self.cache.statistik().items()}
+
+
+class ProsesWajah:
+    model = 'wajah'
+    pesan_memuat = "Memuat detektor wajah..."
+
+    def __init__(self, sumber, penyimpan, db=None):
+        self.sumber = sumber
+        self.penyimpan = penyimpan
+        self.db = db
+        self.detektor = DetektorWajahCepat()
+
+    def _catat(self, jejak, path_wajah, path_crop):
+        if self.db is None:
+            return
+        try:
+            self.db.execute("INSERT INTO deteksi_wajah (waktu_deteksi, path_foto, path_crop, sumber, jejak_id) VALUES (%s, %s, %s, %s, %s)",
+                            (datetime.now(), path_wajah, path_crop, self.sumber.nama, jejak.id), prepared=True)
+        except Exception as e:
+            print(f"⚠️ [{self.sumber.nama}] Gagal mencatat wajah ke database: {e}")
+
+    def proses(self, frame, detektor_wajah, gambar):
+        # Wajah disimpan sekali per jejak, saat jejak terkonfirmasi dan kotaknya
+        # berasal dari deteksi di frame ini (bukan prediksi pelacak).
+        jejak_aktif, _, _ = self.detektor.proses(detektor_wajah, frame)
+        frame_bersih = None
+        tersimpan = 0
+        for jejak in jejak_aktif:
+            if jejak.tersimpan or not jejak.terkonfirmasi() or jejak.sejak_deteksi:
+                continue
+            if frame_bersih is None:
+                frame_bersih = frame.copy() if gambar else frame
+            path_wajah, path_crop = self.penyimpan.simpan(frame_bersih, f"{self.sumber.nama}_jejak{jejak.id}", jejak.kotak)
+            self._catat(jejak, path_wajah, path_crop)
+            jejak.tersimpan = True
+            tersimpan += 1
+            print(f"🧑 [{self.sumber.nama}] Wajah #{jejak.id} disimpan: {path_wajah} (crop: {path_crop})")
+
+        if gambar:
+            for jejak in jejak_aktif:
+                xw, yw, ww, hw = [int(v) for v in jejak.kotak]
+                cv2.rectangle(frame, (xw, yw), (xw + ww, yw + hw), (255, 0, 0), 2)
+                cv2.putText(frame, f"Wajah #{jejak.id}", (xw, yw - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+        return tersimpan
+
+    def statistik(self):
+        return self.detektor.statistik()
+
+
+PEMROSES = {'plat': ProsesPlat, 'wajah': ProsesWajah}
 
 
 # =============================
-# Fungsi Deteksi Wajah
+# Worker per Sumber
 # =============================
 
-def deteksi_wajah():
-    kamera_wajah = cv2.VideoCapture(1)
-    waktu_terakhir_wajah = 0
-    jeda_wajah = 5
-
-    if not kamera_wajah.isOpened():
-        print("❌ Kamera wajah gagal dibuka.")
-        return
-
-    print("🟢 Kamera WAJAH aktif! Tekan ESC di window untuk keluar.")
-
-    while True:
-        ret, frame = kamera_wajah.read()
-        if not ret:
-            break
-
-        frame = tambahkan_waktu(frame.copy())
-
-        abu = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        wajah_terdeteksi = detektor_wajah.detectMultiScale(abu, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        waktu_sekarang = time.time()
-
-        for (xw, yw, ww, hw) in wajah_terdeteksi:
-            cv2.rectangle(frame, (xw, yw), (xw + ww, yw + hw), (255, 0, 0), 2)
-            cv2.putText(frame, "Wajah", (xw, yw - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
-
-            if waktu_sekarang - waktu_terakhir_wajah >= jeda_wajah:
-                nama_file_wajah = f"wajah_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                path_wajah = os.path.join(folder_output_wajah, nama_file_wajah)
-                cv2.imwrite(path_wajah, frame)
-                print(f"🧑 Wajah disimpan: {path_wajah}")
-                waktu_terakhir_wajah = waktu_sekarang
+def sumber_offline(alamat):
+    return isinstance(alamat, str) and (os.path.isfile(alamat) or os.path.isdir(alamat))
+
+
+def buka_sumber(alamat):
+    if isinstance(alamat, str) and os.path.isdir(alamat):
+        return SumberReplay(alamat, pacing='cepat')
+    return cv2.VideoCapture(alamat)
+
+
+def jalankan_sumber(sumber, berhenti, antrian_laporan, tampil=False, folder_output=FOLDER_OUTPUT,
+                    interval_laporan=INTERVAL_LAPORAN, db_backend=None):
+    registri_model.panaskan(PEMROSES[sumber.jenis].model)
+    penyimpan = ambil_penyimpan(folder_output, sumber.jenis)
+    if sumber.jenis == 'wajah':
+        pemroses = ProsesWajah(sumber, penyimpan, db=ambil_db(db_backend))
+    else:
+        pemroses = ProsesPlat(sumber, penyimpan)
+    offline = sumber_offline(sumber.alamat)
+    jendela = f"VTRACK {sumber.nama}"
+    statistik = {'frame': 0, 'deteksi': 0, 'baca_gagal': 0, 'sambung_ulang': 0, 'fps': 0.0, 'status': 'membuka'}
+
+    def lapor(**perubahan):
+        statistik.update(perubahan)
+        antrian_laporan.put((sumber.nama, dict(statistik)))
+
+    cap = buka_sumber(sumber.alamat)
+    if not cap.isOpened():
+        print(f"❌ [{sumber.nama}] Sumber {sumber.alamat} gagal dibuka.")
+        if offline:
+            lapor(status='gagal dibuka')
+            return
+        # Kamera/stream hidup dicoba lagi oleh jalur sambung ulang di bawah.
+    else:
+        print(f"🟢 [{sumber.nama}] Sumber {sumber.jenis} aktif ({sumber.alamat}).")
+    lapor(status='berjalan')
+    waktu_buka = awal_jendela = time.monotonic()
+    frame_jendela = 0
+    try:
+        while not berhenti.is_set():
+            ret, frame = cap.read() if cap.isOpened() else (False, None)
+            if not ret:
+                if offline:
+                    break
+                statistik['baca_gagal'] += 1
+                cap.release()
+                lapor(status='menyambung ulang', sambung_ulang=statistik['sambung_ulang'] + 1)
+                if berhenti.wait(JEDA_SAMBUNG_ULANG):
+                    break
+                cap = buka_sumber(sumber.alamat)
+                if cap.isOpened():
+                    lapor(status='berjalan')
+                continue
+
+            statistik['frame'] += 1
+            frame_jendela += 1
+            sekarang = time.monotonic()
+            if sekarang - awal_jendela >= interval_laporan:
+                lapor(fps=round(frame_jendela / (sekarang - awal_jendela), 2),
+                      **(pemroses.statistik() if hasattr(pemroses, 'statistik') else {}))
+                awal_jendela, frame_jendela = sekarang, 0
+
+            frame = tambahkan_waktu(frame)
+            model = registri_model.ambil(pemroses.model)
+            if model is None:
+                if statistik['status'] != 'memuat model':
+                    lapor(status='memuat model')
+                if tampil:
+                    cv2.putText(frame, pemroses.pesan_memuat, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+            else:
+                if statistik['status'] != 'berjalan':
+                    lapor(status='berjalan')
+                statistik['deteksi'] += pemroses.proses(frame, model, tampil)
+
+            if tampil:
+                cv2.imshow(jendela, frame)
+                if cv2.waitKey(1) & 0xFF == 27:
+                    break
+    finally:
+        cap.release()
+        if tampil:
+            cv2.destroyWindow(jendela)
+        durasi = time.monotonic() - waktu_buka
+        lapor(status='selesai', fps=0.0, fps_rata=round(statistik['frame'] / durasi, 2) if durasi > 0 else 0.0,
+              **(pemroses.statistik() if hasattr(pemroses, 'statistik') else {}))
+        print(f"⛔ [{sumber.nama}] Sumber ditutup.")
+
+
+def _jalankan_proses(sumber, berhenti, antrian_laporan, opsi):
+    # Ctrl+C ditangani proses induk, yang lalu menyetel Event berhenti.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        jalankan_sumber(sumber, berhenti, antrian_laporan, **opsi)
+    finally:
+        tutup_penyimpan()
 
-        cv2.imshow("Kamera Wajah", frame)
 
-        if cv2.waitKey(1) & 0xFF == 27:
-            break
+# =============================
+# Mesin
+# =============================
 
-    kamera_wajah.release()
-    cv2.destroyAllWindows()
-    print("⛔ Kamera Wajah ditutup.")
+class MesinVTrack:
+    def __init__(self, sumber, mode='thread', tampil=False, folder_output=FOLDER_OUTPUT,
+                 interval_laporan=INTERVAL_LAPORAN, db_backend=None):
+        if mode not in ('thread', 'proses'):
+            raise ValueError(f"mode tidak dikenal: {mode}")
+        nama = [s.nama for s in sumber]
+        if len(set(nama)) != len(nama):
+            raise ValueError(f"nama sumber harus unik: {nama}")
+        self.sumber = list(sumber)
+        self.mode = mode
+        self.opsi = {'tampil': tampil, 'folder_output': folder_output, 'interval_laporan': interval_laporan,
+                     'db_backend': db_backend}
+        konteks = mp.get_context('spawn') if mode == 'proses' else None
+        self._berhenti = konteks.Event() if konteks else threading.Event()
+        self._antrian_laporan = konteks.Queue() if konteks else queue.Queue()
+        self._konteks = konteks
+        self._worker = []
+        self._lock = threading.Lock()
+        self._statistik = {s.nama: {'jenis': s.jenis, 'alamat': str(s.alamat), 'status': 'belum'} for s in self.sumber}
+        self._pengumpul = None
+
+    def mulai(self):
+        self._pengumpul = threading.Thread(target=self._loop_laporan, name="vtrack-laporan")
+        self._pengumpul.daemon = True
+        self._pengumpul.start()
+        for s in self.sumber:
+            if self._konteks:
+                worker = self._konteks.Process(target=_jalankan_proses, args=(s, self._berhenti, self._antrian_laporan, self.opsi),
+                                               name=f"vtrack-{s.nama}")
+            else:
+                worker = threading.Thread(target=jalankan_sumber, args=(s, self._berhenti, self._antrian_laporan),
+                                          kwargs=self.opsi, name=f"vtrack-{s.nama}")
+            worker.daemon = True
+            worker.start()
+            self._worker.append(worker)
+        print(f"🚀 VTRACK: {len(self.sumber)} sumber, mode {self.mode}{'' if self.opsi['tampil'] else ', headless'}.")
+
+    def _loop_laporan(self):
+        while True:
+            try:
+                pesan = self._antrian_laporan.get()
+            except (EOFError, OSError):
+                return
+            if pesan is None:
+                return
+            nama, data = pesan
+            with self._lock:
+                self._statistik[nama].update(data)
+
+    def berjalan(self):
+        return any(worker.is_alive() for worker in self._worker)
+
+    def tunggu(self, timeout=None):
+        batas = None if timeout is None else time.monotonic() + timeout
+        for worker in self._worker:
+            worker.join(None if batas is None else max(0.0, batas - time.monotonic()))
+        return not self.berjalan()
+
+    def hentikan(self, timeout=10):
+        self._berhenti.set()
+        selesai = self.tunggu(timeout)
+        for worker in self._worker:
+            if worker.is_alive() and self._konteks:
+                print(f"⚠️ Worker {worker.name} tidak berhenti dalam {timeout} s, dihentikan paksa.")
+                worker.terminate()
+                worker.join(1)
+        if not self._konteks:
+            tutup_penyimpan()
+        self._antrian_laporan.put(None)
+        if self._pengumpul is not None:
+            self._pengumpul.join(2)
+        return selesai
+
+    def statistik(self):
+        with self._lock:
+            return {nama: dict(data) for nama, data in self._statistik.items()}
+
+    def ringkasan(self):
+        # Sumber yang sudah selesai ditampilkan dengan FPS rata-rata sepanjang jalan.
+        return " | ".join(f"{nama}: {data.get('fps_rata', data.get('fps', 0.0))} fps, {data.get('frame', 0)} frame, "
+                          f"{data.get('deteksi', 0)} deteksi"
+                          + (f", cache OCR hit {data['cache_rasio_hit']:.0%}" if 'cache_rasio_hit' in data else "")
+                          + f" ({data['status']})"
+                          for nama, data in self.statistik().items())
 
 
 # =============================
-# Jalankan paralel
+# Command Line
 # =============================
 
-t1 = threading.Thread(target=deteksi_plat)
-t2 = threading.Thread(target=deteksi_wajah)
+def parse_sumber(nilai):
+    # [NAMA:]JENIS=ALAMAT, mis. plat=2, gerbang1:plat=rtsp://..., wajah=rekaman.mp4
+    kiri, sep, alamat = nilai.partition('=')
+    nama, _, jenis = kiri.rpartition(':')
+    if not sep or jenis not in JENIS_SUMBER or not alamat:
+        raise argparse.ArgumentTypeError(f"format --sumber harus [NAMA:]JENIS=ALAMAT dengan JENIS {JENIS_SUMBER}, bukan '{nilai}'")
+    return Sumber(nama or None, jenis, int(alamat) if alamat.isdigit() else alamat)
+
+
+def beri_nama(daftar):
+    hitungan = {}
+    hasil = []
+    for s in daftar:
+        if s.nama is None:
+            hitungan[s.jenis] = hitungan.get(s.jenis, 0) + 1
+            s = s._replace(nama=f"{s.jenis}{hitungan[s.jenis]}")
+        hasil.append(s)
+    return hasil
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deteksi plat dan wajah dari banyak kamera/stream/file.")
+    parser.add_argument('--sumber', action='append', type=parse_sumber, metavar='[NAMA:]JENIS=ALAMAT',
+                        help="sumber video: indeks perangkat, URL RTSP, file video, atau folder gambar "
+                             "(boleh berulang; default plat=2 dan wajah=1)")
+    parser.add_argument('--mode', choices=('thread', 'proses'), default='thread',
+                        help="worker per sumber sebagai thread atau proses terpisah")
+    parser.add_argument('--tampil', action='store_true', help="tampilkan window per sumber (ESC menutup sumber itu)")
+    parser.add_argument('--folder-output', default=FOLDER_OUTPUT)
+    parser.add_argument('--db', choices=('mysql', 'sqlite', 'tanpa'), default=DB_BACKEND,
+                        help="catat wajah ke tabel deteksi_wajah (default dari ETLE_DB_BACKEND, atau tanpa)")
+    parser.add_argument('--interval-laporan', type=float, default=5.0, help="cetak FPS per sumber setiap sekian detik")
+    parser.add_argument('--durasi', type=float, help="berhenti otomatis setelah sekian detik")
+    args = parser.parse_args(argv)
+
+    sumber = beri_nama(args.sumber or [Sumber(None, 'plat', 2), Sumber(None, 'wajah', 1)])
+    print(f"📂 Folder output: {os.path.abspath(args.folder_output)}")
+    mesin = MesinVTrack(sumber, mode=args.mode, tampil=args.tampil, folder_output=args.folder_output, db_backend=args.db,
+                        interval_laporan=min(1.0, args.interval_laporan))
+
+    berhenti = threading.Event()
+    for sinyal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sinyal, lambda *_: berhenti.set())
+
+    mesin.mulai()
+    batas = None if args.durasi is None else time.monotonic() + args.durasi
+    while mesin.berjalan() and not berhenti.is_set():
+        sisa = args.interval_laporan if batas is None else min(args.interval_laporan, batas - time.monotonic())
+        if sisa <= 0 or berhenti.wait(sisa):
+            break
+        print(f"📊 {mesin.ringkasan()}")
 
-t1.start()
-t2.start()
+    print("⏹️ Menghentikan VTRACK...")
+    mesin.hentikan()
+    print(f"📊 {mesin.ringkasan()}")
+    print("✅ Semua proses selesai.")
+    return 0
 
-t1.join()
-t2.join()
 
-print("✅ Semua proses selesai.")
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,44 @@
-from flask import Flask, render_template, Response, jsonify, request, session, redirect, url_for, flash
+from flask import Flask, render_template, Response, jsonify, request, session, redirect, url_for, flash, stream_with_context
 import cv2
-import easyocr
+from functools import lru_cache
 import re
+import json
+import csv
+import io
+import itertools
 from datetime import datetime, timedelta
 import os
 import time
 import threading
-import mysql.connector
-from mysql.connector import Error
 import numpy as np
+from database import buat_database, DatabaseError
+from trip_state import PenyimpanTrip, PERINTAH_INGEST
+from statistik import StatistikHarian
+from penjadwal import Penjadwal
+from penyiar_frame import PusatPenyiar
+from notifikasi import BufferNotifikasi
+from ocr_executor import OCRExecutor
+from ocr_proses import ProsesOCRBackend
+from lokalisasi_plat import baca_plat, baca_plat_batch, bersihkan_teks_plat
+from voting_plat import IndeksPlat, PemungutSuaraPlat, kotak_dari_bbox
+from gerak import PemicuOCR
+from bukti import PenyimpanBukti, tanggal_bukti
+from sumber_video import SumberReplay
+from metrik import Registri, LockTerukur, ringkas_sql
+from kontrol_kamera import KontrolerKamera
+from model_ai import registri_model
+from ingest import PenulisIngest
+from arsip import PengarsipRiwayat, KOLOM_ARSIP, KOLOM_WAKTU, KOLOM_BUKTI, GALAT_ARSIP
 
 app = Flask(__name__)
 app.secret_key = 'vtrack-secret-key-2024-final-fix'
 
 DB_CONFIG = { 'host': 'localhost', 'database': 'etle_system', 'user': 'root', 'password': '' }
+# 'mysql' untuk produksi; 'sqlite' untuk uji lokal / replay tanpa server MySQL
+DB_BACKEND = os.environ.get('ETLE_DB_BACKEND', 'mysql')
+DB_SQLITE_PATH = os.environ.get('ETLE_DB_SQLITE_PATH', 'etle_system.db')
+UKURAN_POOL_DB = 10
+TIMEOUT_DB_DETIK = 5
 RUTE_KAMERA = {
     "Masjid": [1, 2],
     "Departemen IT PSP": [3, 4],
@@ -21,40 +46,207 @@ RUTE_KAMERA = {
 }
 
 BATAS_WAKTU_ANTAR_CHECKPOINT = 1 
+# Penandaan terlambat yang gagal karena DB dicoba lagi setelah jeda ini.
+JEDA_ULANG_TENGGAT_DETIK = 30
 
+# Nilai KAMERA_SETUP: indeks perangkat (int), path video/folder gambar (replay),
+# atau fungsi tanpa argumen yang mengembalikan objek mirip VideoCapture.
 KAMERA_SETUP = { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 6: 0 }
+PACING_REPLAY = 'realtime'
+JEDA_LOOP_KAMERA = 0.05
 JEDA_DEMO_DETIK = 10
-
-print("Memuat model AI...")
+BATAS_TUNGGU_FRAME_DETIK = 1
+BATAS_HALAMAN_RIWAYAT = 100
+BATAS_MAKS_HALAMAN_RIWAYAT = 500
+KAPASITAS_NOTIFIKASI = 500
+# /api/notifications tanpa ?since= mengembalikan sekian notifikasi terakhir (tanpa state di server).
+BATAS_NOTIFIKASI_TANPA_KURSOR = 20
+HEADER_KURSOR_NOTIFIKASI = 'X-Notifikasi-Kursor'
+BATAS_KEEPALIVE_SSE_DETIK = 15
+
+# Dua resolusi per kamera: frame penuh hanya untuk OCR/bukti, stream browser
+# memakai preview yang diperkecil. Frame baru di-decode (retrieve) jika ada
+# pemakainya: kamera deteksi (pemicu gerak) atau penonton yang jatah FPS
+# preview-nya sudah tiba. PREVIEW_KAMERA menimpa nilai default per kamera,
+# mis. {3: {'lebar': 320, 'fps': 5, 'kualitas': 50}}.
+LEBAR_PREVIEW = 640
+FPS_PREVIEW = 10
+KUALITAS_JPEG_PREVIEW = 70
+PREVIEW_KAMERA = {}
+
+JUMLAH_WORKER_OCR = 1
+KAPASITAS_ANTRIAN_OCR = 1
+MAKS_BATCH_OCR = 8
+MAKS_TUNGGU_BATCH_OCR = 0.05
+
+# 'thread': OCR di proses Flask; 'proses': N proses worker dengan model sendiri
+OCR_BACKEND = 'thread'
+JUMLAH_PROSES_OCR = max(1, (os.cpu_count() or 2) // 2)
+JUMLAH_SLOT_OCR = 16
+UKURAN_SLOT_OCR = 1920 * 1080 * 3
+# Batas tunggu satu batch di backend proses; worker yang mati diganti dan tugasnya digagalkan lebih cepat.
+TIMEOUT_OCR_PROSES_DETIK = 30
+
+# Voting plat: bacaan yang cocok ke plat Pending butuh MIN_BACA_PLAT frame
+# (atau satu bacaan persis dengan confidence >= CONF_LANGSUNG_PLAT); plat tak
+# dikenal (calon anomali) butuh MIN_BACA_ANOMALI frame yang sepakat.
+MIN_BACA_PLAT = 2
+MIN_BACA_ANOMALI = 3
+CONF_LANGSUNG_PLAT = 0.7
+MAKS_JARAK_PLAT = 1.5
+
+# OCR dipicu gerak: beruntun selama ada objek di zona plat, diam saat adegan statis.
+# ZONA_PLAT per kamera dalam fraksi frame (x0, y0, x1, y1); default seluruh frame.
+ZONA_PLAT = {}
+AMBANG_AREA_GERAK = 0.01
+INTERVAL_OCR_BURST = 0.3
+TAHAN_GERAK_DETIK = 1.5
+INTERVAL_OCR_JAGA = None
+
+# Foto bukti: frame konteks + crop plat, ditulis di latar. Retensi berjalan
+# setiap INTERVAL_RAWAT_BUKTI_DETIK: kompres ulang frame lama, lalu hapus
+# yang melewati batas umur atau batas disk, kecuali file yang masih dirujuk
+# baris deteksi, deteksi_anomali, atau perjalanan, di DB maupun di arsip.
+KUALITAS_JPEG_BUKTI = 80
+KUALITAS_JPEG_CROP = 90
+BATAS_DISK_BUKTI_MB = 5120
+BATAS_UMUR_BUKTI_HARI = 90
+UMUR_KOMPAKSI_BUKTI_HARI = 7
+INTERVAL_RAWAT_BUKTI_DETIK = 6 * 3600
+
+# Deteksi dan anomali ditulis write-behind: satu thread penulis, group commit
+# setiap UKURAN_BATCH_INGEST baris atau INTERVAL_INGEST_MS. Saat DB tidak bisa
+# dihubungi, baris disimpan di jurnal lokal dan diputar ulang saat DB kembali.
+UKURAN_BATCH_INGEST = 200
+INTERVAL_INGEST_MS = 200
+KAPASITAS_ANTRIAN_INGEST = 10000
+INTERVAL_COBA_ULANG_DB_DETIK = 5
+PATH_JURNAL_INGEST = os.environ.get('ETLE_JURNAL_INGEST', 'ingest_jurnal.ndjson')
+# Perjalanan yang sudah ditutup beserta deteksinya, dan anomali, yang lebih
+# tua dari UMUR_ARSIP_HARI dipindah ke file gzip CSV di FOLDER_ARSIP agar
+# tabel panas tetap kecil; /api/ekspor?arsip=1 ikut membaca arsip.
+UMUR_ARSIP_HARI = int(os.environ.get('ETLE_UMUR_ARSIP_HARI', '90'))
+FOLDER_ARSIP = os.environ.get('ETLE_FOLDER_ARSIP', 'arsip')
+INTERVAL_ARSIP_DETIK = 24 * 3600
+BARIS_PER_POTONGAN_EKSPOR = 500
+# Setiap ekspor memegang satu koneksi pool selama unduhan berjalan; dibatasi
+# agar klien lambat tidak menghabiskan koneksi yang dibutuhkan jalur deteksi.
+BATAS_EKSPOR_BERSAMAAN = 2
+SQL_INSERT_ANOMALI = "INSERT INTO deteksi_anomali (nomor_plat, waktu_deteksi, path_foto, path_crop, kamera_id) VALUES (%s, %s, %s, %s, %s)"
+
+folder_output_plat = os.environ.get('ETLE_FOLDER_BUKTI', os.path.join("static", "etle_output", "plat"))
+penyimpan_bukti = PenyimpanBukti(folder_output_plat, kualitas_jpeg=KUALITAS_JPEG_BUKTI, kualitas_crop=KUALITAS_JPEG_CROP,
+                                 batas_disk_mb=BATAS_DISK_BUKTI_MB, batas_umur_hari=BATAS_UMUR_BUKTI_HARI,
+                                 umur_kompaksi_hari=UMUR_KOMPAKSI_BUKTI_HARI,
+                                 rujukan=lambda daftar_path: rujukan_bukti(daftar_path))
+
+# Metrik Prometheus (/metrics). Nilai yang sudah ada di statistik lain dibaca saat scrape.
+metrik = Registri()
+metrik_frame_kamera = metrik.penghitung('etle_kamera_frame_total', 'Frame kamera yang berhasil dibaca', ('kamera',))
+metrik_baca_gagal = metrik.penghitung('etle_kamera_baca_gagal_total', 'Pembacaan frame kamera yang gagal', ('kamera',))
+metrik_frame_dekode = metrik.penghitung('etle_kamera_frame_dekode_total', 'Frame kamera yang di-decode (retrieve)', ('kamera',))
+metrik_fps_kamera = metrik.pengukur('etle_kamera_fps', 'FPS capture per kamera (jendela 1 detik)', ('kamera',))
+metrik_encode = metrik.histogram('etle_encode_jpeg_detik', 'Durasi encode JPEG untuk stream', ('kamera',))
+metrik_ocr_tunggu = metrik.histogram('etle_ocr_tunggu_detik', 'Waktu frame menunggu di antrian OCR', ('kamera',))
+metrik_ocr_batch = metrik.histogram('etle_ocr_batch_detik', 'Durasi satu batch OCR')
+metrik_ocr_ukuran = metrik.histogram('etle_ocr_ukuran_batch', 'Jumlah frame per batch OCR', batas=(1, 2, 4, 8, 16, 32))
+metrik_ocr_gagal = metrik.penghitung('etle_ocr_batch_gagal_total', 'Batch OCR yang gagal')
+metrik_deteksi = metrik.penghitung('etle_deteksi_total', 'Hasil deteksi plat yang sudah divoting', ('hasil',))
+metrik_db = metrik.histogram('etle_db_query_detik', 'Latensi query database per statement', ('statement',))
+metrik_stream = metrik.pengukur('etle_stream_pelanggan', 'Stream MJPEG/SSE yang sedang terbuka', ('jenis',))
+metrik_lock_tunggu = metrik.histogram('etle_lock_tunggu_detik', 'Waktu menunggu lock', ('lock',))
+metrik_lock_tahan = metrik.histogram('etle_lock_tahan_detik', 'Waktu lock ditahan', ('lock',))
+
+def pengaturan_preview(kamera_id):
+    atur = PREVIEW_KAMERA.get(kamera_id, {})
+    return (atur.get('lebar', LEBAR_PREVIEW), atur.get('fps', FPS_PREVIEW), atur.get('kualitas', KUALITAS_JPEG_PREVIEW))
+
+penyiar_kamera = PusatPenyiar(kualitas_jpeg=lambda kamera_id: pengaturan_preview(kamera_id)[2],
+                              pengamat_encode=lambda kamera_id, durasi: metrik_encode.label(kamera_id).amati(durasi))
+kontrol_kamera = KontrolerKamera(lambda status, berhenti: capture_task(status, berhenti),
+                                 lock=LockTerukur(threading.Lock(), metrik_lock_tunggu.label('kontrol_kamera'),
+                                                  metrik_lock_tahan.label('kontrol_kamera')))
+
+notifikasi = BufferNotifikasi(KAPASITAS_NOTIFIKASI)
+penjadwal = Penjadwal()
+
+
+db = buat_database(DB_BACKEND, config=DB_CONFIG, path_sqlite=DB_SQLITE_PATH, ukuran_pool=UKURAN_POOL_DB,
+                   timeout_koneksi=TIMEOUT_DB_DETIK, timeout_pinjam=TIMEOUT_DB_DETIK)
+db.tambah_pendengar_query(lambda sql, durasi: metrik_db.label(ringkas_sql(sql)).amati(durasi))
+statistik_harian = StatistikHarian(db)
+ingest = PenulisIngest(db, dict(PERINTAH_INGEST, deteksi_anomali=SQL_INSERT_ANOMALI), kapasitas=KAPASITAS_ANTRIAN_INGEST,
+                       ukuran_batch=UKURAN_BATCH_INGEST, interval=INTERVAL_INGEST_MS / 1000.0, path_jurnal=PATH_JURNAL_INGEST,
+                       interval_coba_ulang=INTERVAL_COBA_ULANG_DB_DETIK)
+trip_store = PenyimpanTrip(db, RUTE_KAMERA, statistik=statistik_harian, ingest=ingest)
+pengarsip = PengarsipRiwayat(db, FOLDER_ARSIP, umur_hari=UMUR_ARSIP_HARI)
+semafor_ekspor = threading.BoundedSemaphore(BATAS_EKSPOR_BERSAMAAN)
 try:
-    pembaca_ocr = easyocr.Reader(['en'], gpu=False)
-    print("✅ Model EasyOCR berhasil dimuat.")
-except Exception as e:
-    print(f"❌ Gagal memuat EasyOCR: {e}")
-
-folder_output_plat = os.path.join("static", "etle_output", "plat")
-os.makedirs(folder_output_plat, exist_ok=True)
-
-is_running = False
-main_lock = threading.Lock()
-camera_threads = {}
-camera_captures = {}
-camera_frames = {}
-active_detection_camera_id = None
-last_detections = {}
+    # muat_ulang() memutar ulang sisa jurnal ingest dari proses sebelumnya lebih dulu.
+    trip_store.muat_ulang()
+    statistik_harian.muat()
+except DatabaseError as e:
+    print(f"❌ Gagal memuat state perjalanan dari database: {e}")
+
+def rujukan_bukti(daftar_path):
+    # Path dari daftar_path yang masih dirujuk DB atau arsip; None jika salah satunya tidak bisa dibaca.
+    pasangan = [(tabel, kolom) for tabel, daftar_kolom in KOLOM_BUKTI.items() for kolom in daftar_kolom]
+    tanda = ", ".join(["%s"] * len(daftar_path))
+    sql = " UNION ".join(f"SELECT {kolom} AS path FROM {tabel} WHERE {kolom} IN ({tanda})" for tabel, kolom in pasangan)
+    # Lock arsip: baris yang sedang dipindah tidak terlewat di antara cek DB dan cek arsip.
+    with pengarsip.lock:
+        try:
+            dirujuk = {baris['path'] for baris in db.query(sql, list(daftar_path) * len(pasangan))}
+        except DatabaseError as e:
+            print(f"❌ Gagal memeriksa rujukan foto bukti: {e}")
+            return None
+        sisa = [path for path in daftar_path if path not in dirujuk]
+        tanggal = {path: tanggal_bukti(path) for path in sisa}
+        # Tanggal tidak diketahui: dianggap dirujuk daripada salah hapus.
+        dirujuk.update(path for path, t in tanggal.items() if t is None)
+        dikenal = [t for t in tanggal.values() if t is not None]
+        if dikenal:
+            # Baris dicatat sesaat setelah fotonya disimpan; beri kelonggaran satu hari di kedua sisi.
+            try:
+                dirujuk |= pengarsip.rujukan(sisa, min(dikenal) - timedelta(days=1), max(dikenal) + timedelta(days=2))
+            except GALAT_ARSIP as e:
+                print(f"❌ Gagal memeriksa rujukan foto bukti di arsip: {e}")
+                return None
+    return dirujuk
+
+def rawat_bukti():
+    # Dijalankan di thread sendiri agar scan folder tidak menahan penjadwal tenggat.
+    def tugas():
+        try:
+            # Baris yang masih di antrian ingest harus sudah di DB sebelum rujukan diperiksa.
+            trip_store.tuntaskan_ingest()
+        except DatabaseError as e:
+            print(f"❌ Retensi bukti ditunda: {e}")
+            return
+        ringkasan = penyimpan_bukti.rawat()
+        if ringkasan:
+            print(f"🧹 Retensi bukti: {ringkasan}")
+    threading.Thread(target=tugas, daemon=True).start()
+    penjadwal.jadwalkan(INTERVAL_RAWAT_BUKTI_DETIK, rawat_bukti, kunci=('rawat_bukti',))
 
-g_notifications = []
-notification_checker_thread = None
-stop_event = threading.Event()
+penjadwal.jadwalkan(60, rawat_bukti, kunci=('rawat_bukti',))
 
+def arsipkan_riwayat():
+    def tugas():
+        try:
+            ringkasan = pengarsip.jalankan()
+        except (DatabaseError, OSError) as e:
+            print(f"❌ Arsip riwayat gagal: {e}")
+            return
+        if ringkasan:
+            print(f"🗄️ Arsip riwayat: {ringkasan}")
+    threading.Thread(target=tugas, daemon=True).start()
+    penjadwal.jadwalkan(INTERVAL_ARSIP_DETIK, arsipkan_riwayat, kunci=('arsip_riwayat',))
 
-def create_connection():
-    try:
-        return mysql.connector.connect(**DB_CONFIG)
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
+if UMUR_ARSIP_HARI > 0:
+    penjadwal.jadwalkan(300, arsipkan_riwayat, kunci=('arsip_riwayat',))
 
+@lru_cache(maxsize=64)
 def create_info_frame(message, size=(640, 480)):
     frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
     (w, h), _ = cv2.getTextSize(message, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
@@ -63,220 +255,344 @@ def create_info_frame(message, size=(640, 480)):
     return buffer.tobytes()
 
 def add_notification(message, status):
-    with main_lock:
-        g_notifications.append({'message': message, 'status': status, 'time': datetime.now().isoformat()})
+    notifikasi.tambah(message, status)
     print(f"🔔 NOTIFIKASI [{status.upper()}]: {message}")
 
 
 def perbarui_status_dan_kamera_aktif(delay=0):
     def task():
-        if delay > 0:
-            time.sleep(delay)
+        perjalanan = trip_store.terbaru()
+        next_cam_to_detect = perjalanan.kamera_berikutnya if perjalanan else None
+        kamera_lama = kontrol_kamera.atur_aktif(next_cam_to_detect)
+        if kamera_lama is not None and kamera_lama != next_cam_to_detect:
+            ocr_executor.kosongkan(kamera_lama)
 
-        global active_detection_camera_id
-        connection = create_connection()
-        if not connection: return
-        db_cursor = connection.cursor(dictionary=True)
-        
-        try:
-            db_cursor.execute("SELECT * FROM perjalanan WHERE status = 'Pending' ORDER BY waktu_mulai DESC LIMIT 1")
-            perjalanan = db_cursor.fetchone()
-
-            next_cam_to_detect = None
-            if perjalanan:
-                rute_wajib = RUTE_KAMERA.get(perjalanan['tujuan'], [])
-                db_cursor.execute("SELECT kamera_id FROM deteksi WHERE perjalanan_id = %s", (perjalanan['id'],))
-                kamera_terdeteksi = {row['kamera_id'] for row in db_cursor.fetchall()}
-                
-                next_cam_index = len(kamera_terdeteksi)
-                if next_cam_index < len(rute_wajib):
-                    next_cam_to_detect = rute_wajib[next_cam_index]
-
-            if next_cam_to_detect and is_running:
-                if active_detection_camera_id != next_cam_to_detect:
-                    if active_detection_camera_id is not None:
-                        stop_camera_thread(active_detection_camera_id, is_detection_cam=True)
-                    start_camera_thread(next_cam_to_detect, is_detection_cam=True)
-            else:
-                if active_detection_camera_id is not None:
-                    stop_camera_thread(active_detection_camera_id, is_detection_cam=True)
-        finally:
-            db_cursor.close()
-            connection.close()
-
-    threading.Thread(target=task).start()
-
-def proses_deteksi(nomor_plat, path_foto, confidence, kamera_id):
-    connection = create_connection()
-    if not connection: return
-    db_cursor = connection.cursor(dictionary=True)
-    try:
-        db_cursor.execute("SELECT * FROM perjalanan WHERE status = 'Pending' AND nomor_plat = %s", (nomor_plat,))
-        perjalanan = db_cursor.fetchone()
+    penjadwal.jadwalkan(delay, task)
 
-        if not perjalanan:
-            db_cursor.execute("INSERT INTO deteksi_anomali (nomor_plat, waktu_deteksi, path_foto, kamera_id) VALUES (%s, %s, %s, %s)",
-                              (nomor_plat, datetime.now(), path_foto, kamera_id))
-            connection.commit()
-            add_notification(f"ANOMALI: Plat {nomor_plat} terdeteksi di CAM-{kamera_id} tanpa tujuan aktif.", 'Gagal')
-            return
+def jadwalkan_tenggat(perjalanan):
+    # Tenggat checkpoint berikutnya; dijadwalkan ulang setiap deteksi valid.
+    if not kontrol_kamera.berjalan:
+        return
+    tenggat = perjalanan.waktu_terakhir + timedelta(minutes=BATAS_WAKTU_ANTAR_CHECKPOINT)
+    penjadwal.jadwalkan_pada(tenggat, cek_keterlambatan, perjalanan.id, kunci=('tenggat', perjalanan.id))
 
-        perjalanan_id = perjalanan['id']
-        rute_wajib = RUTE_KAMERA.get(perjalanan['tujuan'], [])
-        db_cursor.execute("SELECT kamera_id FROM deteksi WHERE perjalanan_id = %s", (perjalanan_id,))
-        kamera_terdeteksi = {row['kamera_id'] for row in db_cursor.fetchall()}
-        
-        next_cam_index = len(kamera_terdeteksi)
-        
-        if next_cam_index < len(rute_wajib) and rute_wajib[next_cam_index] == kamera_id:
-            db_cursor.execute("INSERT INTO deteksi (perjalanan_id, nomor_plat, waktu_deteksi, path_foto, confidence, kamera_id) VALUES (%s, %s, %s, %s, %s, %s)",
-                              (perjalanan_id, nomor_plat, datetime.now(), path_foto, confidence, kamera_id))
-            
-            if len(kamera_terdeteksi) + 1 == len(rute_wajib):
-                db_cursor.execute("UPDATE perjalanan SET status = 'Sesuai', waktu_selesai = %s WHERE id = %s", (datetime.now(), perjalanan_id))
-                add_notification(f"Plat {nomor_plat} telah sampai di tujuan {perjalanan['tujuan']}.", 'Sesuai')
-                perbarui_status_dan_kamera_aktif()
-            else:
-                add_notification(f"Plat {nomor_plat} terdeteksi di CAM-{kamera_id}, melanjutkan.", 'Sesuai')
-                perbarui_status_dan_kamera_aktif(delay=JEDA_DEMO_DETIK)
-            
-            connection.commit()
-        
-        elif kamera_id not in rute_wajib:
-            db_cursor.execute("UPDATE perjalanan SET status = 'Gagal', waktu_selesai = %s WHERE id = %s", (datetime.now(), perjalanan_id))
-            connection.commit()
-            add_notification(f"Plat {nomor_plat} SALAH RUTE, terdeteksi di CAM-{kamera_id}.", 'Gagal')
-            perbarui_status_dan_kamera_aktif()
+def batalkan_tenggat(perjalanan_id):
+    penjadwal.batalkan(('tenggat', perjalanan_id))
 
-    finally:
-        db_cursor.close()
-        connection.close()
+def cek_keterlambatan(perjalanan_id):
+    # UPDATE DB dikerjakan di thread sendiri agar tidak menahan timer lain (termasuk pindah kamera).
+    threading.Thread(target=tandai_terlambat, args=(perjalanan_id,), daemon=True).start()
 
-def background_notification_checker():
-    while not stop_event.is_set():
+def tandai_terlambat(perjalanan_id):
+    with trip_store.lock:
+        perjalanan = trip_store.ambil(perjalanan_id)
+        if not perjalanan or not kontrol_kamera.berjalan:
+            return
+        if datetime.now() < perjalanan.waktu_terakhir + timedelta(minutes=BATAS_WAKTU_ANTAR_CHECKPOINT):
+            jadwalkan_tenggat(perjalanan)
+            return
         try:
-            connection = create_connection()
-            if not connection:
-                time.sleep(30)
-                continue
+            trip_store.tutup(perjalanan, 'Gagal')
+        except DatabaseError as e:
+            print(f"❌ Gagal menandai perjalanan {perjalanan_id} terlambat, dicoba lagi: {e}")
+            penjadwal.jadwalkan(JEDA_ULANG_TENGGAT_DETIK, cek_keterlambatan, perjalanan_id, kunci=('tenggat', perjalanan_id))
+            return
+    pesan = f"Kendaraan {perjalanan.nomor_plat} tujuan {perjalanan.tujuan} TERLAMBAT mencapai checkpoint berikutnya."
+    add_notification(pesan, 'Gagal')
+    perbarui_status_dan_kamera_aktif()
 
-            db_cursor = connection.cursor(dictionary=True)
-            db_cursor.execute("SELECT * FROM perjalanan WHERE status = 'Pending'")
-            pending_perjalanan = db_cursor.fetchall()
-
-            for perjalanan in pending_perjalanan:
-                db_cursor.execute("SELECT waktu_deteksi FROM deteksi WHERE perjalanan_id = %s ORDER BY waktu_deteksi DESC LIMIT 1", (perjalanan['id'],))
-                last_detection = db_cursor.fetchone()
-                
-                waktu_referensi = perjalanan['waktu_mulai']
-                if last_detection:
-                    waktu_referensi = last_detection['waktu_deteksi']
-
-                if datetime.now() > waktu_referensi + timedelta(minutes=BATAS_WAKTU_ANTAR_CHECKPOINT):
-                    pesan = f"Kendaraan {perjalanan['nomor_plat']} tujuan {perjalanan['tujuan']} TERLAMBAT mencapai checkpoint berikutnya."
-                    add_notification(pesan, 'Gagal')
-                    db_cursor.execute("UPDATE perjalanan SET status = 'Gagal', waktu_selesai = %s WHERE id = %s", (datetime.now(), perjalanan['id']))
-                    connection.commit()
-                    perbarui_status_dan_kamera_aktif()
-            
-            db_cursor.close()
-            connection.close()
-        except Exception as e:
-            print(f"Error di background checker: {e}")
-        
-        stop_event.wait(30)
+def proses_deteksi(nomor_plat, path_foto, confidence, kamera_id, path_crop=None):
+    with trip_store.lock:
+        perjalanan = trip_store.cari(nomor_plat)
+
+        if not perjalanan:
+            ingest.tulis('deteksi_anomali', (nomor_plat, datetime.now(), path_foto, path_crop, kamera_id))
+            metrik_deteksi.label('anomali').tambah()
+            add_notification(f"ANOMALI: Plat {nomor_plat} terdeteksi di CAM-{kamera_id} tanpa tujuan aktif.", 'Gagal')
+            return
+
+        if perjalanan.kamera_berikutnya == kamera_id:
+            selesai = trip_store.catat_deteksi(perjalanan, nomor_plat, path_foto, confidence, kamera_id, path_crop)
+        elif kamera_id not in perjalanan.rute:
+            trip_store.tutup(perjalanan, 'Gagal')
+            selesai = None
+        else:
+            metrik_deteksi.label('diabaikan').tambah()
+            return
 
-def capture_task(kamera_id):
-    global last_detections
+        metrik_deteksi.label('Gagal' if selesai is None else 'Sesuai').tambah()
+        if selesai is False:
+            jadwalkan_tenggat(perjalanan)
+        else:
+            batalkan_tenggat(perjalanan.id)
+
+    if selesai is None:
+        add_notification(f"Plat {nomor_plat} SALAH RUTE, terdeteksi di CAM-{kamera_id}.", 'Gagal')
+        perbarui_status_dan_kamera_aktif()
+    elif selesai:
+        add_notification(f"Plat {nomor_plat} telah sampai di tujuan {perjalanan.tujuan}.", 'Sesuai')
+        perbarui_status_dan_kamera_aktif()
+    else:
+        add_notification(f"Plat {nomor_plat} terdeteksi di CAM-{kamera_id}, melanjutkan.", 'Sesuai')
+        perbarui_status_dan_kamera_aktif(delay=JEDA_DEMO_DETIK)
+
+def buka_kamera(kamera_id):
+    sumber = KAMERA_SETUP.get(kamera_id, 0)
+    if callable(sumber):
+        return sumber()
+    if isinstance(sumber, str):
+        return SumberReplay(sumber, pacing=PACING_REPLAY)
+    return cv2.VideoCapture(sumber, cv2.CAP_DSHOW)
+
+def capture_task(status, berhenti):
+    # Dijalankan KontrolerKamera di thread sendiri; perangkat dimiliki dan dilepas oleh thread ini.
+    kamera_id = status.kamera_id
     video_index = KAMERA_SETUP.get(kamera_id, 0)
-    cap = cv2.VideoCapture(video_index, cv2.CAP_DSHOW)
+    cap = buka_kamera(kamera_id)
     if not cap.isOpened():
         print(f"❌ Gagal membuka kamera {kamera_id} di indeks {video_index}")
-        with main_lock:
-            camera_frames[kamera_id] = create_info_frame(f"Gagal Buka Cam {kamera_id}")
+        penyiar_kamera.ambil(kamera_id).terbitkan_jpeg(create_info_frame(f"Gagal Buka Cam {kamera_id}"))
         return
 
-    with main_lock:
-        camera_captures[kamera_id] = cap
     print(f"✅ Kamera {kamera_id} aktif.")
     
-    waktu_terakhir_ocr = 0
-    while True:
-        with main_lock:
-            if kamera_id not in camera_captures: break
-        
-        ret, frame = cap.read()
-        if not ret:
-            time.sleep(0.1)
-            continue
-        
-        with main_lock:
-            is_detection_cam = (active_detection_camera_id == kamera_id)
-
-        if is_detection_cam and time.time() - waktu_terakhir_ocr > 3:
-            threading.Thread(target=run_ocr_and_save, args=(frame.copy(), kamera_id)).start()
-            waktu_terakhir_ocr = time.time()
-
-        with main_lock:
-            if kamera_id in last_detections:
-                last_detections[kamera_id] = [d for d in last_detections[kamera_id] if time.time() - d['time'] < 2]
-                for det in last_detections[kamera_id]:
-                    (tl, tr, br, bl) = det['bbox']
-                    tl = (int(tl[0]), int(tl[1]))
-                    br = (int(br[0]), int(br[1]))
-                    cv2.rectangle(frame, tl, br, (0, 255, 0), 2)
-                    cv2.putText(frame, det['text'], (tl[0], tl[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-
-        _, buffer = cv2.imencode('.jpg', frame)
-        with main_lock:
-            camera_frames[kamera_id] = buffer.tobytes()
-        time.sleep(0.05)
-
-    if cap.isOpened(): cap.release()
+    penyiar = penyiar_kamera.ambil(kamera_id)
+    pemicu = PemicuOCR(zona=ZONA_PLAT.get(kamera_id, (0.0, 0.0, 1.0, 1.0)), ambang_area=AMBANG_AREA_GERAK,
+                       interval_burst=INTERVAL_OCR_BURST, tahan_gerak=TAHAN_GERAK_DETIK, interval_jaga=INTERVAL_OCR_JAGA)
+    status.pemicu = pemicu
+    # Sumber replay membawa jam rekaman sendiri; kamera hidup memakai jam sistem.
+    jam = getattr(cap, 'waktu_media', time.monotonic)
+    metrik_kamera = (metrik_frame_kamera.label(kamera_id), metrik_frame_dekode.label(kamera_id),
+                     metrik_baca_gagal.label(kamera_id), metrik_fps_kamera.label(kamera_id))
+    m_fps = metrik_kamera[3]
+    try:
+        baca_frame(status, berhenti, cap, penyiar, pemicu, jam, metrik_kamera)
+    finally:
+        cap.release()
+        penyiar.kosongkan()
+        m_fps.atur(0)
     print(f"⛔ Kamera {kamera_id} ditutup.")
 
-def run_ocr_and_save(frame, cam_id):
-    global last_detections
+def baca_frame(status, berhenti, cap, penyiar, pemicu, jam, metrik_kamera):
+    # Jalur per-frame: tidak ada lock global, hanya baca field StatusKamera dan Event berhenti.
+    # grab() selalu dipanggil agar buffer perangkat tidak menumpuk; retrieve() (decode)
+    # hanya jika frame ini dipakai pemicu gerak/OCR atau jatah preview sudah tiba.
+    kamera_id = status.kamera_id
+    m_frame, m_dekode, m_gagal, m_fps = metrik_kamera
+    lebar_preview, fps_preview, _ = pengaturan_preview(kamera_id)
+    jarak_preview = 1.0 / fps_preview if fps_preview else 0.0
+    preview_berikutnya = 0.0
+    awal_jendela, frame_jendela = time.monotonic(), 0
+    while not berhenti.is_set():
+        if not cap.grab():
+            m_gagal.tambah()
+            time.sleep(0.1)
+            continue
+        m_frame.tambah()
+        frame_jendela += 1
+        sekarang = time.monotonic()
+        if sekarang - awal_jendela >= 1.0:
+            m_fps.atur(round(frame_jendela / (sekarang - awal_jendela), 2))
+            awal_jendela, frame_jendela = sekarang, 0
+
+        deteksi = status.deteksi
+        perlu_preview = penyiar.ada_pelanggan() and sekarang >= preview_berikutnya
+        if deteksi or perlu_preview:
+            ret, frame = cap.retrieve()
+            if not ret:
+                m_gagal.tambah()
+                continue
+            m_dekode.tambah()
+
+            # Frame penuh tidak pernah diubah setelah ini, jadi OCR cukup menerima
+            # referensinya; setiap retrieve() menghasilkan array baru.
+            if deteksi and pemicu.perbarui(frame, jam()):
+                ocr_executor.submit(kamera_id, frame)
+
+            if perlu_preview:
+                preview_berikutnya = sekarang + jarak_preview
+                penyiar.terbitkan(buat_preview(frame, lebar_preview, status.deteksi_terakhir))
+
+        if JEDA_LOOP_KAMERA:
+            berhenti.wait(JEDA_LOOP_KAMERA)
+
+def buat_preview(frame, lebar, deteksi_terakhir):
+    # Frame kecil untuk stream; overlay digambar di preview, bukan di frame penuh milik OCR.
+    skala = min(1.0, lebar / float(frame.shape[1])) if lebar else 1.0
+    if skala < 1.0:
+        preview = cv2.resize(frame, (int(lebar), max(1, int(frame.shape[0] * skala))), interpolation=cv2.INTER_AREA)
+    elif deteksi_terakhir:
+        preview = frame.copy()
+    else:
+        return frame
+    if deteksi_terakhir:
+        batas = time.time() - 2
+        for waktu, tl, br, teks in deteksi_terakhir:
+            if waktu >= batas:
+                tl_kecil = (int(tl[0] * skala), int(tl[1] * skala))
+                br_kecil = (int(br[0] * skala), int(br[1] * skala))
+                cv2.rectangle(preview, tl_kecil, br_kecil, (0, 255, 0), 2)
+                cv2.putText(preview, teks, (tl_kecil[0], tl_kecil[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    return preview
+
+indeks_plat = IndeksPlat(maks_jarak=MAKS_JARAK_PLAT)
+pemungut_suara = PemungutSuaraPlat(indeks_plat, min_baca=MIN_BACA_PLAT, min_baca_anomali=MIN_BACA_ANOMALI,
+                                   conf_langsung=CONF_LANGSUNG_PLAT)
+
+def run_ocr_and_save(frame, cam_id, hasil_ocr=None):
     try:
-        hasil_ocr = pembaca_ocr.readtext(frame)
+        if hasil_ocr is None:
+            pembaca_ocr = registri_model.ambil('ocr')
+            if pembaca_ocr is None:
+                return
+            indeks_plat.perbarui(trip_store.plat_pending())
+            hasil_ocr = baca_plat(pembaca_ocr, frame)
         current_detections = []
         for (bbox, teks, conf) in hasil_ocr:
-            teks_bersih = re.sub(r'[^A-Z0-9]', '', teks.upper())
+            teks_bersih = bersihkan_teks_plat(teks)
             if 4 < len(teks_bersih) < 10:
-                path_simpan = os.path.join(folder_output_plat, f"cam{cam_id}_{teks_bersih}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
-                cv2.imwrite(path_simpan, frame)
-                proses_deteksi(teks_bersih, path_simpan, conf, cam_id)
-                current_detections.append({'bbox': bbox, 'text': teks_bersih, 'time': time.time()})
+                current_detections.append([time.time(), (int(bbox[0][0]), int(bbox[0][1])), (int(bbox[2][0]), int(bbox[2][1])), teks_bersih])
+                # Hanya plat yang sudah stabil lintas frame yang disimpan dan diproses.
+                keputusan = pemungut_suara.tambah_bacaan(cam_id, bbox, teks_bersih, conf)
+                if keputusan is None:
+                    continue
+                nomor_plat, confidence = keputusan
+                current_detections[-1][3] = nomor_plat
+                path_simpan, path_crop = penyimpan_bukti.simpan(frame, f"cam{cam_id}_{nomor_plat}", kotak_dari_bbox(bbox))
+                proses_deteksi(nomor_plat, path_simpan, confidence, cam_id, path_crop)
         
         if current_detections:
-            with main_lock:
-                last_detections[cam_id] = current_detections
+            kontrol_kamera.ambil(cam_id).deteksi_terakhir = tuple(tuple(d) for d in current_detections)
     except Exception as e:
         print(f"Error saat OCR: {e}")
 
+backend_ocr_proses = None
+backend_ocr_lock = threading.Lock()
+
+def ambil_backend_ocr_proses():
+    # Dibuat saat pertama dipakai (setelah server berjalan), bukan saat import.
+    # Worker dijalankan dari ocr_worker.py, jadi app.py tidak diimpor ulang di worker.
+    global backend_ocr_proses
+    with backend_ocr_lock:
+        if backend_ocr_proses is None:
+            backend_ocr_proses = ProsesOCRBackend(jumlah_proses=JUMLAH_PROSES_OCR, jumlah_slot=JUMLAH_SLOT_OCR,
+                                                  ukuran_slot=UKURAN_SLOT_OCR, thread_per_proses=1)
+        return backend_ocr_proses
+
+def panaskan_model():
+    # Dipanggil setelah server berjalan: model dimuat di latar, bukan saat import.
+    if OCR_BACKEND == 'proses':
+        thread = threading.Thread(target=ambil_backend_ocr_proses, name="muat-ocr-proses")
+        thread.daemon = True
+        thread.start()
+    else:
+        registri_model.panaskan('ocr')
+
+def run_ocr_batch(batch):
+    pembaca_ocr = None
+    backend = None
+    if OCR_BACKEND == 'proses':
+        # Worker belum selesai memuat EasyOCR: frame dilewati, bukan menunggu sampai timeout.
+        backend = backend_ocr_proses
+        if backend is None or not backend.siap():
+            return
+    else:
+        # Model belum siap: frame dilewati (dihitung di registri) daripada menahan antrian.
+        pembaca_ocr = registri_model.ambil('ocr')
+        if pembaca_ocr is None:
+            return
+    frames = [frame for _, frame in batch]
+    indeks_plat.perbarui(trip_store.plat_pending())
+    lewati = [pemungut_suara.kotak_terkonfirmasi(cam_id) for cam_id, _ in batch]
+    if OCR_BACKEND == 'proses':
+        semua_hasil = backend.baca_batch(frames, timeout=TIMEOUT_OCR_PROSES_DETIK, lewati=lewati)
+    else:
+        semua_hasil = baca_plat_batch(pembaca_ocr, frames, lewati=lewati)
+    for (cam_id, frame), hasil_ocr in zip(batch, semua_hasil):
+        run_ocr_and_save(frame, cam_id, hasil_ocr)
+
+def catat_metrik_ocr(item, mulai, selesai, berhasil):
+    metrik_ocr_batch.label().amati(selesai - mulai)
+    metrik_ocr_ukuran.label().amati(len(item))
+    if not berhasil:
+        metrik_ocr_gagal.label().tambah()
+    for cam_id, waktu_masuk in item:
+        metrik_ocr_tunggu.label(cam_id).amati(mulai - waktu_masuk)
+
+ocr_executor = OCRExecutor(run_ocr_batch, jumlah_worker=JUMLAH_PROSES_OCR if OCR_BACKEND == 'proses' else JUMLAH_WORKER_OCR, kapasitas_per_kamera=KAPASITAS_ANTRIAN_OCR,
+                           maks_batch=MAKS_BATCH_OCR, maks_tunggu=MAKS_TUNGGU_BATCH_OCR)
+ocr_executor.tambah_pendengar(catat_metrik_ocr)
+metrik.pengukur('etle_ocr_antrian', 'Kedalaman antrian OCR per kamera', ('kamera',),
+                fungsi=lambda: {k: v['kedalaman'] for k, v in ocr_executor.statistik()['kamera'].items()})
+metrik.penghitung('etle_ocr_frame_dibuang_total', 'Frame yang dibuang dari antrian OCR (keep-latest)', ('kamera',),
+                  fungsi=lambda: {k: v['dibuang'] for k, v in ocr_executor.statistik()['kamera'].items()})
+metrik.penghitung('etle_ocr_dipicu_total', 'Frame yang dikirim ke OCR oleh pemicu gerak', ('kamera',),
+                  fungsi=lambda: {k: p.statistik()['ocr_dipicu'] for k, p in pemicu_kamera().items()})
+metrik.pengukur('etle_kamera_penonton', 'Penonton stream per kamera', ('kamera',),
+                fungsi=lambda: {k: v['penonton'] for k, v in kontrol_kamera.statistik().items()})
+metrik.pengukur('etle_db_koneksi_idle', 'Koneksi pool database yang menganggur', fungsi=lambda: db.statistik()['koneksi_idle'])
+metrik.pengukur('etle_bukti_antrian', 'Foto bukti yang menunggu ditulis', fungsi=lambda: penyimpan_bukti.statistik()['antrian'])
+metrik.pengukur('etle_ingest_antrian', 'Baris deteksi yang menunggu ditulis ke database', fungsi=lambda: ingest.statistik()['antrian'])
+metrik.pengukur('etle_ingest_jurnal', 'Baris deteksi di jurnal lokal (database tidak tersedia)', fungsi=lambda: ingest.statistik()['baris_jurnal'])
+metrik.pengukur('etle_penjadwal_tugas', 'Tugas terjadwal yang menunggu', fungsi=lambda: penjadwal.statistik()['terjadwal'])
+
+def bagian_mjpeg(jpeg):
+    return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+
+def tambah_penonton(kamera_id):
+    kontrol_kamera.tambah_penonton(kamera_id)
+
+def kurangi_penonton(kamera_id):
+    kontrol_kamera.kurangi_penonton(kamera_id)
+
+def status_dashboard():
+    return kontrol_kamera.keadaan()
+
+def pemicu_kamera():
+    return {status.kamera_id: status.pemicu for status in kontrol_kamera.semua() if status.pemicu is not None}
+
+def info_dashboard(aktif, kamera_id):
+    if not aktif:
+        return create_info_frame("Sistem Tidak Aktif")
+    if kamera_id is None:
+        return create_info_frame("Sistem Aktif: Menunggu Tujuan")
+    return create_info_frame(f"Memuat CAM-{kamera_id}...")
+
 def generate_frames(kamera_id):
-    start_camera_thread(kamera_id)
+    tambah_penonton(kamera_id)
+    penyiar = penyiar_kamera.ambil(kamera_id)
+    metrik_stream.label('kamera').tambah(1)
     try:
-        while True:
-            with main_lock:
-                frame_to_yield = camera_frames.get(kamera_id, create_info_frame("Menunggu Kamera..."))
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_to_yield + b'\r\n')
-            time.sleep(0.1)
+        with penyiar.langganan():
+            versi = 0
+            while True:
+                # Bangun saat ada frame baru; jika timeout, frame terakhir dikirim ulang sebagai keep-alive.
+                versi, jpeg = penyiar.tunggu(versi, timeout=BATAS_TUNGGU_FRAME_DETIK)
+                yield bagian_mjpeg(jpeg or create_info_frame("Menunggu Kamera..."))
     finally:
-        stop_camera_thread(kamera_id)
+        metrik_stream.label('kamera').tambah(-1)
+        kurangi_penonton(kamera_id)
 
 def generate_dashboard_frame():
-    while True:
-        with main_lock:
-            if not is_running:
-                frame_to_yield = create_info_frame("Sistem Tidak Aktif")
-            elif active_detection_camera_id is None:
-                frame_to_yield = create_info_frame("Sistem Aktif: Menunggu Tujuan")
-            else:
-                frame_to_yield = camera_frames.get(active_detection_camera_id, create_info_frame(f"Memuat CAM-{active_detection_camera_id}..."))
-        
-        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_to_yield + b'\r\n')
-        time.sleep(0.1)
+    metrik_stream.label('dashboard').tambah(1)
+    try:
+        while True:
+            aktif, kamera_id = status_dashboard()
+            if not aktif or kamera_id is None:
+                yield bagian_mjpeg(info_dashboard(aktif, kamera_id))
+                time.sleep(BATAS_TUNGGU_FRAME_DETIK)
+                continue
+
+            penyiar = penyiar_kamera.ambil(kamera_id)
+            with penyiar.langganan():
+                versi = 0
+                while True:
+                    versi, jpeg = penyiar.tunggu(versi, timeout=BATAS_TUNGGU_FRAME_DETIK)
+                    yield bagian_mjpeg(jpeg or info_dashboard(True, kamera_id))
+                    if status_dashboard() != (True, kamera_id):
+                        break
+    finally:
+        metrik_stream.label('dashboard').tambah(-1)
 
 @app.route('/')
 def index():
@@ -306,25 +622,16 @@ def dashboard():
 def tambah_tujuan():
     if not session.get('logged_in'): return redirect(url_for('login'))
     if request.method == 'POST':
-        if not is_running:
+        if not kontrol_kamera.berjalan:
             flash('Sistem pemantauan belum aktif. Silakan mulai sistem terlebih dahulu.', 'warning')
             return render_template('tambah_tujuan.html')
-        connection = create_connection()
-        if connection:
-            try:
-                db_cursor = connection.cursor()
-                db_cursor.execute("INSERT INTO perjalanan (nama_pengunjung, nomor_plat, tujuan, waktu_mulai, status) VALUES (%s, %s, %s, %s, %s)",
-                                  (request.form['nama_pengunjung'], re.sub(r'[^A-Z0-9]', '', request.form['nomor_plat'].upper()), request.form['lokasi_tujuan'], datetime.now(), 'Pending'))
-                connection.commit()
-                flash('Sesi perjalanan baru berhasil ditambahkan!', 'success')
-                perbarui_status_dan_kamera_aktif()
-            except Error as e:
-                flash(f'Gagal menambahkan perjalanan: {e}', 'danger')
-            finally:
-                db_cursor.close()
-                connection.close()
-        else:
-            flash('Gagal terhubung ke database.', 'danger')
+        try:
+            perjalanan = trip_store.tambah(request.form['nama_pengunjung'], re.sub(r'[^A-Z0-9]', '', request.form['nomor_plat'].upper()), request.form['lokasi_tujuan'])
+            jadwalkan_tenggat(perjalanan)
+            flash('Sesi perjalanan baru berhasil ditambahkan!', 'success')
+            perbarui_status_dan_kamera_aktif()
+        except DatabaseError as e:
+            flash(f'Gagal menambahkan perjalanan: {e}', 'danger')
         return redirect(url_for('riwayat'))
     return render_template('tambah_tujuan.html')
 
@@ -349,95 +656,214 @@ def update_verifikasi():
     perjalanan_id = request.form['perjalanan_id']
     status_baru = request.form['status']
     nomor_plat_koreksi = re.sub(r'[^A-Z0-9]', '', request.form['nomor_plat_koreksi'].upper())
-    connection = create_connection()
-    if not connection:
-        flash("Gagal terhubung ke database.", "danger")
-        return redirect(url_for('riwayat'))
-    db_cursor = connection.cursor()
     try:
-        db_cursor.execute("UPDATE perjalanan SET nomor_plat = %s, status = %s, waktu_selesai = %s WHERE id = %s",
-                          (nomor_plat_koreksi, status_baru, datetime.now() if status_baru != 'Pending' else None, perjalanan_id))
-        if status_baru == 'Sesuai':
-             db_cursor.execute("UPDATE deteksi SET nomor_plat = %s WHERE perjalanan_id = %s", (nomor_plat_koreksi, perjalanan_id))
-        connection.commit()
+        # Deteksi yang masih di antrian ingest harus ikut terkoreksi oleh UPDATE deteksi di bawah.
+        trip_store.tuntaskan_ingest()
+        with db.transaksi() as tx:
+            lama = tx.query_one("SELECT waktu_mulai, tujuan, status FROM perjalanan WHERE id = %s", (perjalanan_id,))
+            perubahan = StatistikHarian.perubahan_status(lama['waktu_mulai'], lama['tujuan'], lama['status'], status_baru) if lama else []
+            statistik_harian.tulis(tx, perubahan)
+            tx.execute("UPDATE perjalanan SET nomor_plat = %s, status = %s, waktu_selesai = %s WHERE id = %s",
+                       (nomor_plat_koreksi, status_baru, datetime.now() if status_baru != 'Pending' else None, perjalanan_id))
+            if status_baru == 'Sesuai':
+                tx.execute("UPDATE deteksi SET nomor_plat = %s WHERE perjalanan_id = %s", (nomor_plat_koreksi, perjalanan_id))
+        statistik_harian.terapkan(perubahan)
+        trip_store.sinkronkan(perjalanan_id)
+        perjalanan = trip_store.ambil(int(perjalanan_id))
+        if perjalanan:
+            jadwalkan_tenggat(perjalanan)
+        else:
+            batalkan_tenggat(int(perjalanan_id))
         flash("Verifikasi berhasil diperbarui.", "success")
-    except Error as e:
+        perbarui_status_dan_kamera_aktif()
+    except DatabaseError as e:
         flash(f"Gagal memperbarui verifikasi: {e}", "danger")
-    finally:
-        db_cursor.close()
-        connection.close()
     return redirect(url_for('riwayat'))
 
+def format_kursor_riwayat(baris):
+    return f"{baris['waktu_mulai'].strftime('%Y-%m-%dT%H:%M:%S.%f')}_{baris['id']}"
+
+def baca_kursor_riwayat(kursor):
+    waktu, _, id_terakhir = kursor.rpartition('_')
+    return datetime.strptime(waktu, '%Y-%m-%dT%H:%M:%S.%f'), int(id_terakhir)
+
 @app.route('/api/riwayat')
 def api_riwayat():
-    if not session.get('logged_in'): return jsonify([])
-    connection = create_connection()
-    if not connection: return jsonify([])
-    db_cursor = connection.cursor(dictionary=True)
+    if not session.get('logged_in'): return jsonify({'data': [], 'next_cursor': None})
     try:
-        query = "SELECT p.*, d.path_foto FROM perjalanan p LEFT JOIN (SELECT perjalanan_id, path_foto FROM deteksi ORDER BY waktu_deteksi ASC) d ON p.id = d.perjalanan_id GROUP BY p.id ORDER BY p.waktu_mulai DESC"
-        db_cursor.execute(query)
-        semua_perjalanan = db_cursor.fetchall()
-        for p in semua_perjalanan:
-            p['waktu_mulai'] = p['waktu_mulai'].strftime('%Y-%m-%dT%H:%M:%S') if p.get('waktu_mulai') else None
-        return jsonify(semua_perjalanan)
-    finally:
-        db_cursor.close()
-        connection.close()
+        limit = min(max(int(request.args.get('limit', BATAS_HALAMAN_RIWAYAT)), 1), BATAS_MAKS_HALAMAN_RIWAYAT)
+        kondisi, params = [], []
+        if request.args.get('status'):
+            kondisi.append("p.status = %s")
+            params.append(request.args['status'])
+        if request.args.get('plat'):
+            kondisi.append("p.nomor_plat LIKE %s")
+            params.append(re.sub(r'[^A-Z0-9]', '', request.args['plat'].upper()) + '%')
+        if request.args.get('dari'):
+            kondisi.append("p.waktu_mulai >= %s")
+            params.append(datetime.strptime(request.args['dari'], '%Y-%m-%d'))
+        if request.args.get('sampai'):
+            kondisi.append("p.waktu_mulai < %s")
+            params.append(datetime.strptime(request.args['sampai'], '%Y-%m-%d') + timedelta(days=1))
+        if request.args.get('cursor'):
+            waktu_kursor, id_kursor = baca_kursor_riwayat(request.args['cursor'])
+            kondisi.append("(p.waktu_mulai < %s OR (p.waktu_mulai = %s AND p.id < %s))")
+            params.extend([waktu_kursor, waktu_kursor, id_kursor])
+    except ValueError:
+        return jsonify({'error': 'Parameter filter atau cursor tidak valid'}), 400
+
+    query = ("SELECT p.id, p.nama_pengunjung, p.nomor_plat, p.tujuan, p.waktu_mulai, p.waktu_selesai, p.status, "
+             "p.path_foto_pertama AS path_foto FROM perjalanan p")
+    if kondisi:
+        query += " WHERE " + " AND ".join(kondisi)
+    query += " ORDER BY p.waktu_mulai DESC, p.id DESC LIMIT %s"
+    params.append(limit + 1)
+    try:
+        semua_perjalanan = db.query(query, params)
+    except DatabaseError:
+        return jsonify({'data': [], 'next_cursor': None})
+
+    next_cursor = None
+    if len(semua_perjalanan) > limit:
+        semua_perjalanan = semua_perjalanan[:limit]
+        next_cursor = format_kursor_riwayat(semua_perjalanan[-1])
+    for p in semua_perjalanan:
+        p['waktu_mulai'] = p['waktu_mulai'].strftime('%Y-%m-%dT%H:%M:%S') if p.get('waktu_mulai') else None
+    return jsonify({'data': semua_perjalanan, 'next_cursor': next_cursor})
+
+def format_ekspor(baris, format_ekspor, kolom):
+    # Baris dikumpulkan per potongan agar respons tidak dikirim satu baris per chunk.
+    if format_ekspor == 'csv':
+        buffer = io.StringIO()
+        penulis = csv.writer(buffer)
+        penulis.writerow(kolom)
+        for i, b in enumerate(baris, 1):
+            penulis.writerow(['' if b[k] is None else str(b[k]) for k in kolom])
+            if i % BARIS_PER_POTONGAN_EKSPOR == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+    potongan = []
+    for b in baris:
+        potongan.append(json.dumps({k: b[k] for k in kolom}, default=str))
+        if len(potongan) >= BARIS_PER_POTONGAN_EKSPOR:
+            yield '\n'.join(potongan) + '\n'
+            potongan = []
+    if potongan:
+        yield '\n'.join(potongan) + '\n'
+
+@app.route('/api/ekspor/<jenis>')
+def api_ekspor(jenis):
+    # Ekspor streaming (CSV / NDJSON) dengan memori konstan: baris dibaca dari cursor server
+    # lewat db.stream() dan langsung ditulis ke respons. ?arsip=1 menyertakan baris arsip lebih dulu.
+    if not session.get('logged_in'): return jsonify({'error': 'Unauthorized'}), 401
+    format_diminta = request.args.get('format', 'csv')
+    if jenis not in KOLOM_ARSIP or format_diminta not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Jenis atau format ekspor tidak dikenal'}), 400
+    kolom_waktu = KOLOM_WAKTU[jenis]
+    kondisi, params, saring = [], [], {}
+    dari = sampai = None
+    try:
+        if request.args.get('dari'):
+            dari = datetime.strptime(request.args['dari'], '%Y-%m-%d')
+            kondisi.append(f"{kolom_waktu} >= %s")
+            params.append(dari)
+        if request.args.get('sampai'):
+            sampai = datetime.strptime(request.args['sampai'], '%Y-%m-%d') + timedelta(days=1)
+            kondisi.append(f"{kolom_waktu} < %s")
+            params.append(sampai)
+    except ValueError:
+        return jsonify({'error': 'Parameter tanggal tidak valid'}), 400
+    if request.args.get('status'):
+        if jenis != 'perjalanan':
+            return jsonify({'error': 'Filter status hanya untuk ekspor perjalanan'}), 400
+        kondisi.append("status = %s")
+        params.append(request.args['status'])
+        saring['status'] = request.args['status']
+
+    kolom = KOLOM_ARSIP[jenis]
+    query = f"SELECT {', '.join(kolom)} FROM {jenis}"
+    if kondisi:
+        query += " WHERE " + " AND ".join(kondisi)
+    query += f" ORDER BY {kolom_waktu}, id"
+
+    if not semafor_ekspor.acquire(blocking=False):
+        return jsonify({'error': 'Terlalu banyak ekspor berjalan, coba lagi nanti'}), 429
+    # Baris pertama DB dan arsip diambil di sini agar DB yang mati atau arsip yang rusak
+    # dijawab 500, bukan file terpotong.
+    baris_db = db.stream(query, params)
+    baris_arsip = pengarsip.baca(jenis, dari, sampai, saring) if request.args.get('arsip') == '1' else iter(())
+    try:
+        pertama_db = next(baris_db, None)
+        pertama_arsip = next(baris_arsip, None)
+    except DatabaseError as e:
+        baris_db.close()
+        semafor_ekspor.release()
+        return jsonify({'error': f'Gagal membaca database: {e}'}), 500
+    except GALAT_ARSIP as e:
+        baris_db.close()
+        semafor_ekspor.release()
+        return jsonify({'error': f'Gagal membaca arsip: {e}'}), 500
+
+    def isi():
+        # Arsip lebih dulu (lebih tua), lalu tabel panas.
+        semua = itertools.chain([pertama_arsip] if pertama_arsip is not None else [], baris_arsip,
+                                [pertama_db] if pertama_db is not None else [], baris_db)
+        try:
+            yield from format_ekspor(semua, format_diminta, kolom)
+        except DatabaseError as e:
+            print(f"❌ Ekspor {jenis} terputus: {e}")
+        except GALAT_ARSIP as e:
+            print(f"❌ Ekspor {jenis} terputus, arsip rusak: {e}")
+
+    nama_file = f"{jenis}_{datetime.now():%Y%m%d_%H%M%S}.{format_diminta}"
+    mimetype = 'text/csv' if format_diminta == 'csv' else 'application/x-ndjson'
+    respons = Response(stream_with_context(isi()), mimetype=mimetype,
+                       headers={'Content-Disposition': f'attachment; filename={nama_file}'})
+    # Dipanggil server saat respons ditutup, termasuk jika klien memutus sebelum isi() mulai.
+    respons.call_on_close(baris_db.close)
+    respons.call_on_close(semafor_ekspor.release)
+    return respons
 
 @app.route('/api/pemantauan_status/<int:perjalanan_id>')
 def api_pemantauan_status(perjalanan_id):
     if not session.get('logged_in'): return jsonify({'error': 'Unauthorized'}), 401
-    connection = create_connection()
-    if not connection: return jsonify({'error': 'Database connection failed'}), 500
-    db_cursor = connection.cursor(dictionary=True)
+    perjalanan = trip_store.ambil(perjalanan_id)
+    if perjalanan:
+        with trip_store.lock:
+            return jsonify({'kamera_terdeteksi': list(perjalanan.kamera_terdeteksi)})
     try:
-        db_cursor.execute("SELECT kamera_id FROM deteksi WHERE perjalanan_id = %s", (perjalanan_id,))
-        kamera_terdeteksi = {d['kamera_id'] for d in db_cursor.fetchall()}
-        return jsonify({'kamera_terdeteksi': list(kamera_terdeteksi)})
-    finally:
-        db_cursor.close()
-        connection.close()
-        
+        kamera_terdeteksi = {d['kamera_id'] for d in db.query("SELECT kamera_id FROM deteksi WHERE perjalanan_id = %s", (perjalanan_id,), prepared=True)}
+    except DatabaseError:
+        return jsonify({'error': 'Database connection failed'}), 500
+    return jsonify({'kamera_terdeteksi': list(kamera_terdeteksi)})
+
 @app.route('/api/perjalanan/<int:perjalanan_id>')
 def api_perjalanan_detail(perjalanan_id):
     if not session.get('logged_in'): return jsonify({'error': 'Unauthorized'}), 401
-    connection = create_connection()
-    if not connection: return jsonify({'error': 'Database connection failed'}), 500
-    db_cursor = connection.cursor(dictionary=True)
     try:
-        db_cursor.execute("SELECT * FROM perjalanan WHERE id = %s", (perjalanan_id,))
-        perjalanan = db_cursor.fetchone()
+        perjalanan = db.query_one("SELECT * FROM perjalanan WHERE id = %s", (perjalanan_id,), prepared=True)
         if not perjalanan: return jsonify({'error': 'Perjalanan tidak ditemukan'}), 404
-        db_cursor.execute("SELECT * FROM deteksi WHERE perjalanan_id = %s ORDER BY waktu_deteksi ASC", (perjalanan_id,))
-        deteksi_list = db_cursor.fetchall()
-        perjalanan['waktu_mulai'] = perjalanan['waktu_mulai'].strftime('%Y-%m-%d %H:%M:%S') if perjalanan.get('waktu_mulai') else None
-        for deteksi in deteksi_list:
-            deteksi['waktu_deteksi'] = deteksi['waktu_deteksi'].strftime('%Y-%m-%d %H:%M:%S') if deteksi.get('waktu_deteksi') else None
-        return jsonify({'perjalanan': perjalanan, 'deteksi': deteksi_list})
-    finally:
-        db_cursor.close()
-        connection.close()
+        deteksi_list = db.query("SELECT * FROM deteksi WHERE perjalanan_id = %s ORDER BY waktu_deteksi ASC", (perjalanan_id,), prepared=True)
+    except DatabaseError:
+        return jsonify({'error': 'Database connection failed'}), 500
+    perjalanan['waktu_mulai'] = perjalanan['waktu_mulai'].strftime('%Y-%m-%d %H:%M:%S') if perjalanan.get('waktu_mulai') else None
+    for deteksi in deteksi_list:
+        deteksi['waktu_deteksi'] = deteksi['waktu_deteksi'].strftime('%Y-%m-%d %H:%M:%S') if deteksi.get('waktu_deteksi') else None
+    return jsonify({'perjalanan': perjalanan, 'deteksi': deteksi_list})
 
 @app.route('/api/stats')
 def api_stats():
     if not session.get('logged_in'): return jsonify({'error': 'Unauthorized'}), 401
-    connection = create_connection()
-    if not connection: return jsonify({'total_deteksi': 0, 'deteksi_hari_ini': 0, 'deteksi_minggu_ini': 0, 'deteksi_bulan_ini': 0})
-    db_cursor = connection.cursor(dictionary=True)
     try:
-        db_cursor.execute("SELECT COUNT(*) as count FROM perjalanan")
-        total = db_cursor.fetchone()['count']
-        db_cursor.execute("SELECT COUNT(*) as count FROM perjalanan WHERE DATE(waktu_mulai) = CURDATE()")
-        today = db_cursor.fetchone()['count']
-        db_cursor.execute("SELECT COUNT(*) as count FROM perjalanan WHERE YEARWEEK(waktu_mulai, 1) = YEARWEEK(CURDATE(), 1)")
-        this_week = db_cursor.fetchone()['count']
-        db_cursor.execute("SELECT COUNT(*) as count FROM perjalanan WHERE YEAR(waktu_mulai) = YEAR(CURDATE()) AND MONTH(waktu_mulai) = MONTH(CURDATE())")
-        this_month = db_cursor.fetchone()['count']
-        return jsonify({'total_deteksi': total, 'deteksi_hari_ini': today, 'deteksi_minggu_ini': this_week, 'deteksi_bulan_ini': this_month})
-    finally:
-        db_cursor.close()
-        connection.close()
+        ringkasan = statistik_harian.ringkasan()
+    except DatabaseError:
+        return jsonify({'total_deteksi': 0, 'deteksi_hari_ini': 0, 'deteksi_minggu_ini': 0, 'deteksi_bulan_ini': 0})
+    return jsonify({'total_deteksi': ringkasan['total'], 'deteksi_hari_ini': ringkasan['hari_ini'],
+                    'deteksi_minggu_ini': ringkasan['minggu_ini'], 'deteksi_bulan_ini': ringkasan['bulan_ini'],
+                    'hari_ini_per_tujuan': ringkasan['hari_ini_per_tujuan'], 'hari_ini_per_status': ringkasan['hari_ini_per_status']})
 
 @app.route('/video_feed/<int:kamera_id>')
 def video_feed(kamera_id):
@@ -449,72 +875,122 @@ def dashboard_video_feed():
     if not session.get('logged_in'): return "Unauthorized", 401
     return Response(generate_dashboard_frame(), mimetype='multipart/x-mixed-replace; boundary=frame')
     
+def data_status():
+    statistik_ocr = ocr_executor.statistik()
+    statistik_ocr['voting'] = pemungut_suara.statistik()
+    statistik_ocr['gerak'] = {kamera_id: pemicu.statistik() for kamera_id, pemicu in pemicu_kamera().items()}
+    statistik_ocr['bukti'] = penyimpan_bukti.statistik()
+    statistik_ocr['ingest'] = ingest.statistik()
+    statistik_ocr['arsip'] = pengarsip.statistik()
+    if backend_ocr_proses is not None:
+        statistik_ocr['proses'] = backend_ocr_proses.statistik()
+    statistik_db = db.statistik()
+    statistik_penjadwal = penjadwal.statistik()
+    statistik_stream = penyiar_kamera.statistik()
+    berjalan, kamera_aktif = kontrol_kamera.keadaan()
+    return {'is_running': berjalan, 'active_camera': kamera_aktif, 'kamera': kontrol_kamera.statistik(), 'ocr': statistik_ocr,
+            'db': statistik_db, 'penjadwal': statistik_penjadwal, 'stream': statistik_stream, 'notifikasi': notifikasi.statistik(),
+            'model': registri_model.status(), 'startup': {'import_detik': WAKTU_IMPORT_DETIK, 'ocr_siap': ocr_siap()}}
+
+def ocr_siap():
+    if OCR_BACKEND == 'proses':
+        return backend_ocr_proses is not None and backend_ocr_proses.siap()
+    return registri_model.siap('ocr')
+
+def kursor_notifikasi(nilai):
+    # Kursor di atas id terakhir berarti buffer sudah diulang (aplikasi restart): baca dari awal.
+    try:
+        kursor = int(nilai)
+    except (TypeError, ValueError):
+        return None
+    return kursor if 0 <= kursor <= notifikasi.id_terakhir else 0
+
+def format_sse_notifikasi(entri):
+    return f"id: {entri['id']}\ndata: {json.dumps(entri)}\n\n"
+
+def generate_notifikasi_sse(id_terakhir):
+    metrik_stream.label('sse').tambah(1)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            daftar = notifikasi.tunggu(id_terakhir, timeout=BATAS_KEEPALIVE_SSE_DETIK)
+            if not daftar:
+                yield ": keep-alive\n\n"
+                continue
+            for entri in daftar:
+                yield format_sse_notifikasi(entri)
+            id_terakhir = daftar[-1]['id']
+    finally:
+        metrik_stream.label('sse').tambah(-1)
+
 @app.route('/api/status')
 def api_status():
-    with main_lock:
-        return jsonify({'is_running': is_running, 'active_camera': active_detection_camera_id})
+    return jsonify(data_status())
+
+@app.route('/metrics')
+def metrics():
+    return Response(metrik.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def ambil_notifikasi(since):
+    # (daftar, kursor berikutnya). Kursor dibawa klien (header X-Notifikasi-Kursor, dikirim
+    # balik sebagai ?since=), bukan disimpan di cookie session yang dipakai bersama semua tab.
+    since = kursor_notifikasi(since)
+    if since is None:
+        return notifikasi.terbaru(BATAS_NOTIFIKASI_TANPA_KURSOR)
+    daftar = notifikasi.sejak(since)
+    return daftar, (daftar[-1]['id'] if daftar else since)
 
 @app.route('/api/notifications')
 def api_notifications():
-    with main_lock:
-        notifications_to_send = list(g_notifications)
-        g_notifications.clear()
-    return jsonify(notifications_to_send)
-
-def start_camera_thread(kamera_id, is_detection_cam=False):
-    global active_detection_camera_id
-    with main_lock:
-        if kamera_id in camera_threads and camera_threads[kamera_id].is_alive():
-            if is_detection_cam: active_detection_camera_id = kamera_id
-            return
-        thread = threading.Thread(target=capture_task, args=(kamera_id,))
-        thread.daemon = True
-        thread.start()
-        camera_threads[kamera_id] = thread
-        if is_detection_cam: active_detection_camera_id = kamera_id
-
-def stop_camera_thread(kamera_id, is_detection_cam=False):
-    with main_lock:
-        global active_detection_camera_id
-        if is_detection_cam:
-            if active_detection_camera_id == kamera_id: active_detection_camera_id = None
-            return 
-        if kamera_id in camera_captures:
-            cap = camera_captures.pop(kamera_id, None)
-            if cap: cap.release()
-        camera_threads.pop(kamera_id, None)
-        camera_frames.pop(kamera_id, None)
+    daftar, kursor = ambil_notifikasi(request.args.get('since'))
+    respons = jsonify(daftar)
+    respons.headers[HEADER_KURSOR_NOTIFIKASI] = str(kursor)
+    return respons
+
+@app.route('/api/notifications/stream')
+def api_notifications_stream():
+    mulai = kursor_notifikasi(request.headers.get('Last-Event-ID'))
+    if mulai is None:
+        mulai = kursor_notifikasi(request.args.get('since'))
+    if mulai is None:
+        mulai = notifikasi.id_terakhir
+    return Response(generate_notifikasi_sse(mulai), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/start_detection')
 def start_detection():
-    global is_running, notification_checker_thread, stop_event
-    if is_running: return jsonify({'status': 'already_running'})
-    with main_lock:
-        is_running = True
-        stop_event.clear()
-        if notification_checker_thread is None or not notification_checker_thread.is_alive():
-            notification_checker_thread = threading.Thread(target=background_notification_checker)
-            notification_checker_thread.daemon = True
-            notification_checker_thread.start()
+    if kontrol_kamera.berjalan: return jsonify({'status': 'already_running'})
+    try:
+        trip_store.muat_ulang()
+        statistik_harian.muat()
+    except DatabaseError as e:
+        print(f"❌ Gagal memuat state perjalanan dari database: {e}")
+    if not kontrol_kamera.mulai_sistem(): return jsonify({'status': 'already_running'})
+    panaskan_model()
+    for perjalanan in trip_store.semua():
+        jadwalkan_tenggat(perjalanan)
     perbarui_status_dan_kamera_aktif()
     return jsonify({'status': 'started'})
     
 @app.route('/stop_detection')
 def stop_detection():
-    global is_running, camera_threads, camera_captures, camera_frames, active_detection_camera_id
-    if not is_running: return jsonify({'status': 'already_stopped'})
-    with main_lock:
-        is_running = False
-        stop_event.set()
-        
-        cam_ids = list(camera_captures.keys())
-        for cam_id in cam_ids:
-            cap = camera_captures.pop(cam_id, None)
-            if cap: cap.release()
-        camera_threads.clear()
-        camera_frames.clear()
-        active_detection_camera_id = None
+    if not kontrol_kamera.hentikan_sistem(): return jsonify({'status': 'already_stopped'})
+    penjadwal.batalkan_jika(lambda kunci: kunci[0] == 'tenggat')
+    ocr_executor.kosongkan()
+    pemungut_suara.lupakan()
     return jsonify({'status': 'stopped'})
 
+metrik.pengukur('etle_model_siap', 'Model AI sudah dimuat (1) atau belum (0)', ('model',),
+                fungsi=lambda: {nama: int(data['status'] == 'siap') for nama, data in registri_model.status().items()})
+metrik.pengukur('etle_model_muat_detik', 'Lama memuat model AI', ('model',),
+                fungsi=lambda: {nama: data['durasi_muat'] for nama, data in registri_model.status().items() if data['durasi_muat'] is not None})
+metrik.pengukur('etle_import_detik', 'Waktu CPU proses sampai modul app selesai dimuat', fungsi=lambda: WAKTU_IMPORT_DETIK)
+
+# Waktu CPU sejak proses mulai: mencakup start interpreter dan semua import, tanpa
+# penanda waktu di atas blok import. Menunggu I/O (mis. koneksi DB) tidak ikut terhitung.
+WAKTU_IMPORT_DETIK = round(time.process_time(), 3)
+print(f"⏱️ app.py siap setelah {WAKTU_IMPORT_DETIK} s waktu CPU (model dimuat di latar).")
+
 if __name__ == '__main__':
+    panaskan_model()
     app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
@@ -0,0 +1,261 @@
+import csv
+import gzip
+import io
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+# =============================
+# Arsip Riwayat (tiering tabel panas -> file gzip CSV)
+# =============================
+#
+# Tabel deteksi, deteksi_anomali, dan perjalanan terus tumbuh dan
+# memperlambat setiap query yang menyentuhnya. jalankan() memindahkan
+# perjalanan yang sudah ditutup (status selain Pending) beserta deteksinya,
+# deteksi tanpa perjalanan, dan anomali yang lebih tua dari umur_hari ke
+# file gzip CSV di folder/<tabel>/, per batch ukuran_batch baris. Rollup
+# statistik_harian tidak disentuh, jadi statistik tetap lengkap.
+#
+# Setiap batch ditulis dulu sebagai file .baru (fsync), lalu barisnya
+# dihapus dari DB dalam satu transaksi, lalu file diganti nama menjadi
+# final. Jika proses mati di tengah, pulihkan() memutuskan nasib file .baru
+# dari isi DB: baris masih ada berarti hapus belum ter-commit (file
+# dibuang), sudah hilang berarti file diresmikan. Baris tidak pernah hilang
+# atau terarsip dua kali.
+#
+# Nama file memuat rentang tanggal dan id batch, jadi baca() bisa
+# melewati file di luar rentang tanggal tanpa membukanya. baca() membaca
+# baris satu per satu (memori konstan); waktu dikembalikan sebagai string
+# seperti yang tertulis di CSV, kosong berarti NULL.
+#
+# Baris arsip tetap merujuk foto bukti. rujukan() mencari path bukti yang
+# dirujuk arsip dalam rentang tanggal tertentu, dipakai retensi bukti agar
+# foto milik baris arsip tidak ikut dihapus. lock dipegang selama
+# jalankan(); pemegangnya melihat setiap baris di DB atau di file final,
+# tidak pernah di antara keduanya.
+
+KOLOM_ARSIP = {
+    'perjalanan': ('id', 'nama_pengunjung', 'nomor_plat', 'tujuan', 'waktu_mulai', 'waktu_selesai', 'status',
+                   'path_foto_pertama', 'created_at'),
+    'deteksi': ('id', 'perjalanan_id', 'nomor_plat', 'waktu_deteksi', 'path_foto', 'path_crop', 'confidence',
+                'kamera_id', 'created_at'),
+    'deteksi_anomali': ('id', 'nomor_plat', 'waktu_deteksi', 'path_foto', 'path_crop', 'kamera_id', 'created_at'),
+}
+# Kolom angka dikembalikan baca() dengan tipe aslinya agar sama dengan baris dari DB.
+KOLOM_ANGKA = {'id': int, 'perjalanan_id': int, 'kamera_id': int, 'confidence': float}
+KOLOM_WAKTU = {'perjalanan': 'waktu_mulai', 'deteksi': 'waktu_deteksi', 'deteksi_anomali': 'waktu_deteksi'}
+KOLOM_BUKTI = {'perjalanan': ('path_foto_pertama',), 'deteksi': ('path_foto', 'path_crop'),
+               'deteksi_anomali': ('path_foto', 'path_crop')}
+UMUR_ARSIP_HARI = 90
+UKURAN_BATCH_ARSIP = 1000
+AKHIRAN_BARU = '.baru'
+# Galat yang bisa muncul saat membaca file arsip rusak atau terpotong.
+GALAT_ARSIP = (OSError, EOFError, csv.Error, zlib.error, ValueError)
+
+
+def _ke_str(nilai):
+    if nilai is None:
+        return ''
+    if isinstance(nilai, datetime):
+        return nilai.isoformat(' ')
+    return str(nilai)
+
+
+def _rentang_file(nama_file):
+    # '20240101_20240131_15_1014.csv.gz' -> ('2024-01-01', '2024-01-31'); None jika nama tidak dikenal.
+    bagian = nama_file.split('.', 1)[0].split('_')
+    if len(bagian) != 4:
+        return None
+    try:
+        awal, akhir = (datetime.strptime(b, '%Y%m%d').date().isoformat() for b in bagian[:2])
+    except ValueError:
+        return None
+    return awal, akhir
+
+
+class PengarsipRiwayat:
+    def __init__(self, db, folder, umur_hari=UMUR_ARSIP_HARI, ukuran_batch=UKURAN_BATCH_ARSIP):
+        self.db = db
+        self.folder = folder
+        self.umur_hari = umur_hari
+        self.ukuran_batch = max(1, ukuran_batch)
+        self.lock = threading.Lock()
+        self._lock_statistik = threading.Lock()
+        self._statistik = {'dijalankan': 0, 'terakhir': None, 'durasi_terakhir': None, 'file_dipulihkan': 0,
+                           'dipindah': {tabel: 0 for tabel in KOLOM_ARSIP}}
+
+    # ---- penulisan ----
+
+    def _folder_tabel(self, tabel):
+        return os.path.join(self.folder, tabel)
+
+    def _tulis_bagian(self, tabel, baris):
+        # Mengembalikan path file .baru, atau None jika tidak ada baris.
+        if not baris:
+            return None
+        kolom_waktu = KOLOM_WAKTU[tabel]
+        waktu = [b[kolom_waktu] for b in baris]
+        id_baris = [b['id'] for b in baris]
+        nama = f"{min(waktu):%Y%m%d}_{max(waktu):%Y%m%d}_{min(id_baris)}_{max(id_baris)}.csv.gz"
+        folder = self._folder_tabel(tabel)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, nama + AKHIRAN_BARU)
+        kolom = KOLOM_ARSIP[tabel]
+        with open(path, 'wb') as mentah:
+            with gzip.GzipFile(fileobj=mentah, mode='wb') as gz, io.TextIOWrapper(gz, encoding='utf-8', newline='') as teks:
+                penulis = csv.writer(teks)
+                penulis.writerow(kolom)
+                for b in baris:
+                    penulis.writerow([_ke_str(b[k]) for k in kolom])
+            mentah.flush()
+            os.fsync(mentah.fileno())
+        return path
+
+    def _resmikan(self, daftar_path):
+        for path in daftar_path:
+            if path:
+                os.replace(path, path[:-len(AKHIRAN_BARU)])
+
+    def _buang(self, daftar_path):
+        for path in daftar_path:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _pindahkan(self, bagian, hapus):
+        # bagian: [(tabel, baris)]; hapus(tx) menghapus baris yang sama dari DB.
+        daftar_path = []
+        try:
+            for tabel, baris in bagian:
+                daftar_path.append(self._tulis_bagian(tabel, baris))
+        except BaseException:
+            self._buang(daftar_path)
+            raise
+        # Jika transaksi gagal (termasuk commit yang hasilnya tidak pasti), file .baru
+        # dibiarkan dan diputuskan pulihkan() di putaran berikutnya dari isi DB.
+        with self.db.transaksi() as tx:
+            hapus(tx)
+        self._resmikan(daftar_path)
+        with self._lock_statistik:
+            for tabel, baris in bagian:
+                self._statistik['dipindah'][tabel] += len(baris)
+
+    def pulihkan(self):
+        # Menyelesaikan file .baru yang tertinggal karena proses mati di tengah batch.
+        dipulihkan = 0
+        for tabel in KOLOM_ARSIP:
+            folder = self._folder_tabel(tabel)
+            if not os.path.isdir(folder):
+                continue
+            for nama in sorted(os.listdir(folder)):
+                if not nama.endswith(AKHIRAN_BARU):
+                    continue
+                path = os.path.join(folder, nama)
+                id_pertama = None
+                try:
+                    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+                        id_pertama = next(csv.DictReader(f), {}).get('id')
+                except GALAT_ARSIP:
+                    pass
+                if id_pertama and not self.db.query_one(f"SELECT 1 AS ada FROM {tabel} WHERE id = %s", (int(id_pertama),)):
+                    self._resmikan([path])
+                else:
+                    os.remove(path)
+                dipulihkan += 1
+        if dipulihkan:
+            with self._lock_statistik:
+                self._statistik['file_dipulihkan'] += dipulihkan
+        return dipulihkan
+
+    def _kolom(self, tabel, alias=''):
+        return ", ".join(alias + k for k in KOLOM_ARSIP[tabel])
+
+    def _arsipkan_perjalanan(self, batas):
+        while True:
+            perjalanan = self.db.query(f"SELECT {self._kolom('perjalanan')} FROM perjalanan "
+                                       "WHERE status <> 'Pending' AND waktu_mulai < %s ORDER BY waktu_mulai, id LIMIT %s",
+                                       (batas, self.ukuran_batch))
+            if not perjalanan:
+                return
+            id_perjalanan = [p['id'] for p in perjalanan]
+            tanda = ", ".join(["%s"] * len(id_perjalanan))
+            deteksi = self.db.query(f"SELECT {self._kolom('deteksi')} FROM deteksi WHERE perjalanan_id IN ({tanda}) "
+                                    "ORDER BY waktu_deteksi, id", id_perjalanan)
+
+            def hapus(tx):
+                tx.execute(f"DELETE FROM deteksi WHERE perjalanan_id IN ({tanda})", id_perjalanan)
+                tx.execute(f"DELETE FROM perjalanan WHERE id IN ({tanda})", id_perjalanan)
+            self._pindahkan([('perjalanan', perjalanan), ('deteksi', deteksi)], hapus)
+
+    def _arsipkan_tabel(self, tabel, kondisi, batas):
+        kolom_waktu = KOLOM_WAKTU[tabel]
+        while True:
+            baris = self.db.query(f"SELECT {self._kolom(tabel)} FROM {tabel} WHERE {kondisi} AND {kolom_waktu} < %s "
+                                  f"ORDER BY {kolom_waktu}, id LIMIT %s", (batas, self.ukuran_batch))
+            if not baris:
+                return
+            id_baris = [b['id'] for b in baris]
+            tanda = ", ".join(["%s"] * len(id_baris))
+            self._pindahkan([(tabel, baris)], lambda tx: tx.execute(f"DELETE FROM {tabel} WHERE id IN ({tanda})", id_baris))
+
+    def jalankan(self, sekarang=None):
+        # Mengembalikan jumlah baris yang dipindah per tabel pada putaran ini.
+        with self.lock:
+            mulai = time.monotonic()
+            with self._lock_statistik:
+                sebelum = dict(self._statistik['dipindah'])
+            self.pulihkan()
+            batas = (sekarang or datetime.now()) - timedelta(days=self.umur_hari)
+            self._arsipkan_perjalanan(batas)
+            # Deteksi yang perjalanannya sudah dihapus (perjalanan_id di-SET NULL).
+            self._arsipkan_tabel('deteksi', "perjalanan_id IS NULL", batas)
+            self._arsipkan_tabel('deteksi_anomali', "1 = 1", batas)
+            with self._lock_statistik:
+                self._statistik['dijalankan'] += 1
+                self._statistik['terakhir'] = datetime.now().isoformat(' ', 'seconds')
+                self._statistik['durasi_terakhir'] = round(time.monotonic() - mulai, 3)
+                return {tabel: jumlah - sebelum[tabel] for tabel, jumlah in self._statistik['dipindah'].items()
+                        if jumlah > sebelum[tabel]}
+
+    # ---- pembacaan ----
+
+    def baca(self, tabel, dari=None, sampai=None, saring=None):
+        # Generator baris arsip (dict kolom -> string/None) dengan dari <= waktu < sampai.
+        # saring: {kolom: nilai} yang harus sama persis, mis. {'status': 'Sesuai'}.
+        kolom_waktu = KOLOM_WAKTU[tabel]
+        dari_str = _ke_str(dari) if dari else None
+        sampai_str = _ke_str(sampai) if sampai else None
+        folder = self._folder_tabel(tabel)
+        if not os.path.isdir(folder):
+            return
+        for nama in sorted(os.listdir(folder)):
+            if not nama.endswith('.csv.gz'):
+                continue
+            rentang = _rentang_file(nama)
+            if rentang and ((dari_str and rentang[1] < dari_str[:10]) or (sampai_str and rentang[0] > sampai_str[:10])):
+                continue
+            with gzip.open(os.path.join(folder, nama), 'rt', encoding='utf-8', newline='') as f:
+                for baris in csv.DictReader(f):
+                    waktu = baris[kolom_waktu]
+                    if (dari_str and waktu < dari_str) or (sampai_str and waktu >= sampai_str):
+                        continue
+                    if saring and any(baris.get(k) != str(v) for k, v in saring.items()):
+                        continue
+                    yield {k: (None if v == '' else KOLOM_ANGKA[k](v) if k in KOLOM_ANGKA else v) for k, v in baris.items()}
+
+    def rujukan(self, daftar_path, dari, sampai):
+        # Path dari daftar_path yang dirujuk baris arsip dengan dari <= waktu < sampai.
+        dicari = set(daftar_path)
+        ketemu = set()
+        for tabel, kolom_bukti in KOLOM_BUKTI.items():
+            for baris in self.baca(tabel, dari, sampai):
+                ketemu.update(baris[k] for k in kolom_bukti if baris[k] in dicari)
+        return ketemu
+
+    def statistik(self):
+        with self._lock_statistik:
+            data = dict(self._statistik)
+            data['dipindah'] = dict(self._statistik['dipindah'])
+        data['umur_hari'] = self.umur_hari
+        return data
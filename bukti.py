@@ -0,0 +1,291 @@
+import atexit
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+# =============================
+# Penyimpan Bukti Foto
+# =============================
+#
+# Foto bukti ditulis oleh satu thread latar, bukan di thread OCR/kamera.
+# Frame konteks disimpan dengan nama sidik isi (hash dari subsampel piksel),
+# jadi frame yang sama untuk beberapa plat hanya ditulis sekali dan semua
+# deteksi merujuk ke file yang sama. Crop plat disimpan terpisah dengan
+# kualitas lebih tinggi. rawat() menjalankan retensi: frame lama dikompres
+# ulang (path tetap), lalu file tertua dihapus sampai di bawah batas umur
+# dan batas disk.
+#
+# Sidik frame baru dicatat setelah file berhasil ditulis; selama penulisan
+# masih di antrian, sidiknya ada di _sidik_tertunda agar frame yang sama
+# tidak diantre dua kali. Jika penulisan gagal, frame yang sama berikutnya
+# ditulis ulang. rujukan(daftar_path) dipakai rawat() untuk mengetahui file
+# yang masih dirujuk baris DB; file itu tidak dihapus. Jika rujukan
+# mengembalikan None (mis. DB tidak bisa dihubungi), penghapusan dihentikan.
+
+SUBFOLDER_FRAME = 'frame'
+SUBFOLDER_CROP = 'crop'
+UKURAN_CEK_RUJUKAN = 500
+
+
+def tanggal_bukti(path):
+    # Tanggal dari folder <frame|crop>/<YYYYMMDD>/ pada path bukti; None jika tidak sesuai pola.
+    try:
+        return datetime.strptime(os.path.basename(os.path.dirname(path)), '%Y%m%d')
+    except ValueError:
+        return None
+
+
+def sidik_frame(frame):
+    # Subsampel 1/16 piksel sudah cukup membedakan frame kamera (noise sensor).
+    sampel = np.ascontiguousarray(frame[::4, ::4])
+    h = hashlib.blake2b(sampel.data, digest_size=12)
+    h.update(repr(frame.shape).encode())
+    return h.hexdigest()
+
+
+class PenyimpanBukti:
+    def __init__(self, folder, kualitas_jpeg=80, kualitas_crop=90, kapasitas_antrian=64, batas_disk_mb=None,
+                 batas_umur_hari=None, umur_kompaksi_hari=None, kualitas_kompaksi=50, lebar_kompaksi=960,
+                 tunggu_antrian=1.0, nama="bukti", rujukan=None):
+        self.folder = folder
+        self.kualitas_jpeg = kualitas_jpeg
+        self.kualitas_crop = kualitas_crop
+        self.batas_disk_mb = batas_disk_mb
+        self.batas_umur_hari = batas_umur_hari
+        self.umur_kompaksi_hari = umur_kompaksi_hari
+        self.kualitas_kompaksi = kualitas_kompaksi
+        self.lebar_kompaksi = lebar_kompaksi
+        self.tunggu_antrian = tunggu_antrian
+        self.rujukan = rujukan
+        self._antrian = queue.Queue(maxsize=kapasitas_antrian)
+        self._lock = threading.Lock()
+        self._lock_rawat = threading.Lock()
+        self._sidik_terakhir = OrderedDict()
+        self._sidik_tertunda = set()
+        self._statistik = {'frame_diminta': 0, 'frame_duplikat': 0, 'crop': 0, 'ditulis': 0, 'byte_ditulis': 0,
+                           'gagal': 0, 'tulis_langsung': 0, 'dikompaksi': 0, 'dihapus': 0, 'dilewati_dirujuk': 0}
+        os.makedirs(folder, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, name=nama)
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.hentikan)
+
+    # ---- penyimpanan ----
+
+    def simpan(self, frame, awalan, kotak=None, waktu=None):
+        # Mengembalikan (path_frame, path_crop) segera; file ditulis di latar.
+        # Frame tidak boleh diubah pemanggil setelah diserahkan.
+        waktu = waktu or datetime.now()
+        tanggal = waktu.strftime('%Y%m%d')
+        kunci = sidik_frame(frame)
+        path_frame = os.path.join(self.folder, SUBFOLDER_FRAME, tanggal, f"{kunci}.jpg")
+        with self._lock:
+            self._statistik['frame_diminta'] += 1
+            duplikat = kunci in self._sidik_terakhir or kunci in self._sidik_tertunda
+            if duplikat:
+                if kunci in self._sidik_terakhir:
+                    self._sidik_terakhir.move_to_end(kunci)
+                self._statistik['frame_duplikat'] += 1
+            else:
+                self._sidik_tertunda.add(kunci)
+        if not duplikat:
+            self._antre((path_frame, frame, self.kualitas_jpeg, kunci))
+
+        path_crop = None
+        if kotak is not None:
+            x, y, w, h = [max(0, int(v)) for v in kotak]
+            crop = frame[y:y + h, x:x + w]
+            if crop.size:
+                path_crop = os.path.join(self.folder, SUBFOLDER_CROP, tanggal,
+                                         f"{awalan}_{waktu.strftime('%H%M%S%f')}_{kunci[:8]}.jpg")
+                with self._lock:
+                    self._statistik['crop'] += 1
+                self._antre((path_crop, crop.copy(), self.kualitas_crop))
+        return path_frame, path_crop
+
+    def _antre(self, tugas):
+        try:
+            self._antrian.put(tugas, timeout=self.tunggu_antrian)
+        except queue.Full:
+            # Antrian penuh: tulis langsung daripada kehilangan bukti.
+            with self._lock:
+                self._statistik['tulis_langsung'] += 1
+            self._tulis(*tugas)
+
+    def _catat_sidik(self, kunci, berhasil):
+        with self._lock:
+            self._sidik_tertunda.discard(kunci)
+            if berhasil:
+                self._sidik_terakhir[kunci] = True
+                if len(self._sidik_terakhir) > 512:
+                    self._sidik_terakhir.popitem(last=False)
+
+    def _tulis(self, path, gambar, kualitas, kunci=None):
+        berhasil = False
+        try:
+            if os.path.exists(path):
+                berhasil = True
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ok, buffer = cv2.imencode('.jpg', gambar, [cv2.IMWRITE_JPEG_QUALITY, int(kualitas)])
+            if not ok:
+                raise ValueError("encode JPEG gagal")
+            # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi.
+            sementara = path + '.tmp'
+            with open(sementara, 'wb') as f:
+                f.write(buffer.tobytes())
+            os.replace(sementara, path)
+            with self._lock:
+                self._statistik['ditulis'] += 1
+                self._statistik['byte_ditulis'] += len(buffer)
+            berhasil = True
+        except (OSError, ValueError, cv2.error) as e:
+            with self._lock:
+                self._statistik['gagal'] += 1
+            print(f"❌ Gagal menyimpan bukti {path}: {e}")
+        finally:
+            if kunci is not None:
+                self._catat_sidik(kunci, berhasil)
+
+    def _loop(self):
+        while True:
+            tugas = self._antrian.get()
+            try:
+                if tugas is None:
+                    return
+                self._tulis(*tugas)
+            finally:
+                self._antrian.task_done()
+
+    def tunggu_kosong(self):
+        self._antrian.join()
+
+    def hentikan(self, timeout=5):
+        if not self._thread.is_alive():
+            return
+        self._antrian.put(None)
+        self._thread.join(timeout)
+
+    # ---- retensi ----
+
+    def _daftar_file(self):
+        daftar = []
+        for akar, _, nama_file in os.walk(self.folder):
+            for nama in nama_file:
+                if not nama.lower().endswith('.jpg'):
+                    continue
+                path = os.path.join(akar, nama)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                crop = os.sep + SUBFOLDER_CROP + os.sep in path
+                daftar.append([info.st_mtime, info.st_size, path, crop])
+        return daftar
+
+    def _kompaksi(self, path):
+        gambar = cv2.imread(path)
+        if gambar is None or gambar.shape[1] <= self.lebar_kompaksi:
+            return None
+        skala = self.lebar_kompaksi / float(gambar.shape[1])
+        kecil = cv2.resize(gambar, (self.lebar_kompaksi, int(gambar.shape[0] * skala)), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', kecil, [cv2.IMWRITE_JPEG_QUALITY, int(self.kualitas_kompaksi)])
+        if not ok:
+            return None
+        info = os.stat(path)
+        sementara = path + '.tmp'
+        with open(sementara, 'wb') as f:
+            f.write(buffer.tobytes())
+        os.replace(sementara, path)
+        # mtime asli dipertahankan agar urutan umur untuk retensi tidak berubah.
+        os.utime(path, (info.st_atime, info.st_mtime))
+        return len(buffer)
+
+    def _hapus_berurutan(self, daftar, ringkasan, kunci, total=0, batas_byte=None):
+        # Menghapus item daftar berurutan, kecuali yang masih dirujuk DB; dengan batas_byte,
+        # berhenti begitu total <= batas_byte. Mengembalikan (item yang tersisa, total).
+        sisa = []
+        for awal in range(0, len(daftar), UKURAN_CEK_RUJUKAN):
+            bagian = daftar[awal:awal + UKURAN_CEK_RUJUKAN]
+            if batas_byte is not None and total <= batas_byte:
+                sisa.extend(daftar[awal:])
+                break
+            dirujuk = () if self.rujukan is None else self.rujukan([item[2] for item in bagian])
+            if dirujuk is None:
+                ringkasan['rujukan_gagal'] = True
+                sisa.extend(daftar[awal:])
+                break
+            for item in bagian:
+                if item[2] in dirujuk:
+                    ringkasan['dilewati_dirujuk'] += 1
+                    sisa.append(item)
+                elif (batas_byte is None or total > batas_byte) and self._hapus(item[2]):
+                    ringkasan[kunci] += 1
+                    total -= item[1]
+                else:
+                    sisa.append(item)
+        return sisa, total
+
+    def rawat(self):
+        if not self._lock_rawat.acquire(blocking=False):
+            return None
+        try:
+            sekarang = time.time()
+            ringkasan = {'dikompaksi': 0, 'dihapus_umur': 0, 'dihapus_budget': 0, 'dilewati_dirujuk': 0,
+                         'rujukan_gagal': False}
+            daftar = self._daftar_file()
+
+            batas_umur = None if self.batas_umur_hari is None else sekarang - self.batas_umur_hari * 86400
+            if self.umur_kompaksi_hari is not None:
+                batas = sekarang - self.umur_kompaksi_hari * 86400
+                for item in daftar:
+                    akan_dihapus = batas_umur is not None and item[0] < batas_umur
+                    if item[0] < batas and not item[3] and not akan_dihapus:
+                        try:
+                            ukuran_baru = self._kompaksi(item[2])
+                        except (OSError, cv2.error):
+                            ukuran_baru = None
+                        if ukuran_baru is not None:
+                            item[1] = ukuran_baru
+                            ringkasan['dikompaksi'] += 1
+
+            tua = sorted((item for item in daftar if batas_umur is not None and item[0] < batas_umur), key=lambda i: i[0])
+            sisa = [item for item in daftar if batas_umur is None or item[0] >= batas_umur]
+            total = sum(item[1] for item in daftar)
+            tersisa, total = self._hapus_berurutan(tua, ringkasan, 'dihapus_umur', total)
+            sisa.extend(tersisa)
+
+            batas_byte = None if self.batas_disk_mb is None else self.batas_disk_mb * 1024 * 1024
+            if batas_byte is not None and total > batas_byte and not ringkasan['rujukan_gagal']:
+                # Frame konteks tertua dikorbankan lebih dulu; crop (kecil) paling akhir.
+                _, total = self._hapus_berurutan(sorted(sisa, key=lambda i: (i[3], i[0])), ringkasan,
+                                                 'dihapus_budget', total, batas_byte)
+
+            ringkasan['ukuran_mb'] = round(total / (1024.0 * 1024.0), 1)
+            with self._lock:
+                self._statistik['dikompaksi'] += ringkasan['dikompaksi']
+                self._statistik['dihapus'] += ringkasan['dihapus_umur'] + ringkasan['dihapus_budget']
+                self._statistik['dilewati_dirujuk'] += ringkasan['dilewati_dirujuk']
+            return ringkasan
+        finally:
+            self._lock_rawat.release()
+
+    def _hapus(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def statistik(self):
+        with self._lock:
+            data = dict(self._statistik)
+        data['antrian'] = self._antrian.qsize()
+        return data
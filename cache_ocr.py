@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from lokalisasi_plat import baca_kandidat, iou, ke_abu
+
+# =============================
+# Cache Hasil OCR per Crop Kandidat
+# =============================
+#
+# Mobil yang berhenti di palang menghasilkan crop plat yang hampir sama di
+# setiap frame. Setiap crop kandidat dinormalisasi (grayscale, diperkecil ke
+# grid tetap) lalu diberi sidik dHash: bit = piksel lebih terang dari
+# tetangga kanannya, ditambah mask bit yang selisihnya cukup besar. Bit di
+# area datar (yang hanya berubah karena noise sensor) diabaikan saat
+# membandingkan, jadi sidik tahan noise dan perubahan kecerahan.
+#
+# Pencocokan sengaja ketat: satu karakter berbeda hanya mengubah beberapa
+# bit, kira-kira sama dengan crop yang bergeser 1 piksel. Karena itu hasil
+# hanya dipakai ulang jika sidik berbeda paling banyak ambang_hamming bit
+# DAN kotak kandidat hampir di posisi yang sama (kendaraan diam, kamera
+# tetap); crop yang bergeser cukup di-OCR ulang. Hasil kosong juga
+# disimpan, karena kontur non-plat yang sama juga muncul berulang. Entri
+# dibuang secara LRU saat penuh dan kedaluwarsa setelah ttl detik, sehingga
+# kendaraan diam tetap diverifikasi ulang sesekali. Semua crop yang miss
+# dalam satu frame dibaca dengan satu panggilan recognize.
+
+UKURAN_HASH = (32, 12)
+AMBANG_BEDA_PIKSEL = 10
+KAPASITAS_CACHE_OCR = 256
+TTL_CACHE_OCR = 10.0
+AMBANG_HAMMING = 2
+IOU_POSISI_SAMA = 0.9
+
+
+def _ke_int(bit):
+    return int.from_bytes(np.packbits(bit).tobytes(), 'big')
+
+
+def dhash(crop, ukuran=UKURAN_HASH, ambang_beda=AMBANG_BEDA_PIKSEL):
+    # Mengembalikan (bit, mask) sebagai int; mask menandai bit yang bisa dipercaya.
+    lebar, tinggi = ukuran
+    kecil = cv2.resize(ke_abu(crop), (lebar + 1, tinggi), interpolation=cv2.INTER_AREA).astype(np.int16)
+    beda = kecil[:, 1:] - kecil[:, :-1]
+    return _ke_int(beda > 0), _ke_int(np.abs(beda) >= ambang_beda)
+
+
+def jarak_hamming(a, b):
+    # Hanya bit yang dipercaya kedua sidik yang dihitung.
+    return bin((a[0] ^ b[0]) & a[1] & b[1]).count('1')
+
+
+class CacheOCR:
+    def __init__(self, kapasitas=KAPASITAS_CACHE_OCR, ttl=TTL_CACHE_OCR, ambang_hamming=AMBANG_HAMMING,
+                 ukuran_hash=UKURAN_HASH, fungsi_baca=baca_kandidat):
+        # fungsi_baca(pembaca_ocr, frame, kandidat) dipanggil hanya untuk crop yang miss.
+        self.fungsi_baca = fungsi_baca
+        self.kapasitas = kapasitas
+        self.ttl = ttl
+        self.ambang_hamming = ambang_hamming
+        self.ukuran_hash = ukuran_hash
+        self._lock = threading.Lock()
+        # sidik -> (waktu_simpan, kotak, [(bbox_relatif, teks, conf), ...])
+        self._entri = OrderedDict()
+        self._statistik = {'hit': 0, 'miss': 0, 'hit_mirip': 0, 'kedaluwarsa': 0, 'dibuang': 0, 'panggilan_ocr': 0}
+
+    def _cari(self, sidik, kotak, sekarang):
+        # Dipanggil dengan _lock terpegang. Sidik persis dulu, lalu yang paling mirip;
+        # keduanya harus berasal dari kotak di posisi yang hampir sama.
+        kunci = None
+        entri = self._entri.get(sidik)
+        if entri is not None and iou(entri[1], kotak) >= IOU_POSISI_SAMA:
+            kunci = sidik
+        mirip = False
+        if kunci is None and self.ambang_hamming:
+            terbaik = self.ambang_hamming + 1
+            for calon, (_, kotak_calon, _) in self._entri.items():
+                jarak = jarak_hamming(sidik, calon)
+                if jarak < terbaik and iou(kotak_calon, kotak) >= IOU_POSISI_SAMA:
+                    kunci, terbaik, mirip = calon, jarak, True
+        if kunci is None:
+            return None
+        waktu, _, hasil = self._entri[kunci]
+        if sekarang - waktu > self.ttl:
+            del self._entri[kunci]
+            self._statistik['kedaluwarsa'] += 1
+            return None
+        self._entri.move_to_end(kunci)
+        if mirip:
+            self._statistik['hit_mirip'] += 1
+        return hasil
+
+    def _simpan(self, sidik, kotak, hasil, sekarang):
+        self._entri[sidik] = (sekarang, kotak, hasil)
+        self._entri.move_to_end(sidik)
+        while len(self._entri) > self.kapasitas:
+            self._entri.popitem(last=False)
+            self._statistik['dibuang'] += 1
+
+    def baca(self, pembaca_ocr, frame, kandidat):
+        # Pengganti baca_kandidat(): format hasil sama, (bbox, teks, conf) dalam koordinat frame.
+        if not kandidat:
+            return []
+        abu = ke_abu(frame)
+        sekarang = time.monotonic()
+        sidik = [dhash(abu[y:y + h, x:x + w], self.ukuran_hash) for (x, y, w, h) in kandidat]
+
+        hasil_relatif = [None] * len(kandidat)
+        with self._lock:
+            for i, s in enumerate(sidik):
+                hasil_relatif[i] = self._cari(s, kandidat[i], sekarang)
+            miss = [i for i, hasil in enumerate(hasil_relatif) if hasil is None]
+            self._statistik['hit'] += len(kandidat) - len(miss)
+            self._statistik['miss'] += len(miss)
+            if miss:
+                self._statistik['panggilan_ocr'] += 1
+
+        if miss:
+            # Satu panggilan untuk semua miss; hasil dikembalikan ke kandidat asalnya lewat pusat bbox.
+            for i in miss:
+                hasil_relatif[i] = []
+            for (bbox, teks, conf) in self.fungsi_baca(pembaca_ocr, abu, [kandidat[i] for i in miss]):
+                pusat_x = (bbox[0][0] + bbox[2][0]) / 2.0
+                pusat_y = (bbox[0][1] + bbox[2][1]) / 2.0
+                for i in miss:
+                    x, y, w, h = kandidat[i]
+                    if x <= pusat_x <= x + w and y <= pusat_y <= y + h:
+                        hasil_relatif[i].append(([[px - x, py - y] for (px, py) in bbox], teks, conf))
+                        break
+            with self._lock:
+                for i in miss:
+                    self._simpan(sidik[i], kandidat[i], hasil_relatif[i], sekarang)
+
+        hasil = []
+        for (x, y, _, _), daftar in zip(kandidat, hasil_relatif):
+            for (bbox, teks, conf) in daftar:
+                hasil.append(([[px + x, py + y] for (px, py) in bbox], teks, conf))
+        return hasil
+
+    def kosongkan(self):
+        with self._lock:
+            self._entri.clear()
+
+    def statistik(self):
+        with self._lock:
+            data = dict(self._statistik)
+            data['ukuran'] = len(self._entri)
+        total = data['hit'] + data['miss']
+        data['rasio_hit'] = round(data['hit'] / total, 3) if total else 0.0
+        return data
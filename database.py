@@ -0,0 +1,459 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+
+# =============================
+# Lapisan Akses Database
+# =============================
+#
+# Pool koneksi berukuran tetap dengan health check dan timeout, cache
+# prepared statement per koneksi untuk query yang sering dipanggil, dan
+# backend yang bisa diganti (MySQL untuk produksi, SQLite untuk uji/replay).
+# Semua query memakai placeholder %s; backend SQLite menerjemahkannya.
+# File SQLite yang belum punya tabel apa pun langsung diisi skema dari
+# etle_system.sql; skema yang hanya sebagian ditolak dengan jelas.
+#
+# stream() membaca hasil besar (ekspor, arsip) lewat cursor tanpa buffer
+# (MySQL: baris diambil dari server sedikit demi sedikit) dan menghasilkan
+# baris satu per satu, jadi memori tetap konstan berapa pun jumlah barisnya.
+# Koneksi dipinjam selama generator berjalan; generator yang ditutup
+# sebelum habis membuang koneksinya karena sisa hasil belum terbaca.
+
+
+class DatabaseError(Exception):
+    pass
+
+
+PATH_SKEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'etle_system.sql')
+
+
+HasilEksekusi = namedtuple('HasilEksekusi', ['rowcount', 'lastrowid'])
+
+
+def _pecah_skrip(skrip):
+    tanpa_komentar = "\n".join(baris for baris in skrip.splitlines() if not baris.strip().startswith('--'))
+    return [perintah.strip() for perintah in tanpa_komentar.split(';') if perintah.strip()]
+
+
+class MySQLBackend:
+    nama = 'mysql'
+    sql_daftar_tabel = "SELECT table_name AS nama FROM information_schema.tables WHERE table_schema = DATABASE()"
+
+    def __init__(self, config, timeout_koneksi=5, batas_eksekusi_ms=10000):
+        import mysql.connector
+        self._mysql = mysql.connector
+        self.config = dict(config)
+        self.timeout_koneksi = timeout_koneksi
+        self.batas_eksekusi_ms = batas_eksekusi_ms
+        self.error_types = (mysql.connector.Error,)
+
+    def buat_koneksi(self):
+        koneksi = self._mysql.connect(connection_timeout=self.timeout_koneksi, autocommit=False, **self.config)
+        if self.batas_eksekusi_ms:
+            cursor = koneksi.cursor()
+            try:
+                cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (self.batas_eksekusi_ms,))
+            except self._mysql.Error:
+                pass
+            finally:
+                cursor.close()
+        return koneksi
+
+    def sehat(self, koneksi):
+        try:
+            koneksi.ping(reconnect=False, attempts=1)
+            return True
+        except self._mysql.Error:
+            return False
+
+    def cursor(self, koneksi, prepared=False):
+        return koneksi.cursor(prepared=True) if prepared else koneksi.cursor()
+
+    def cursor_stream(self, koneksi):
+        # Ekspor panjang tidak boleh dipotong batas waktu eksekusi sesi.
+        if self.batas_eksekusi_ms:
+            cursor = koneksi.cursor()
+            try:
+                cursor.execute("SET SESSION MAX_EXECUTION_TIME = 0")
+            finally:
+                cursor.close()
+        return koneksi.cursor(buffered=False)
+
+    def akhiri_stream(self, koneksi):
+        if self.batas_eksekusi_ms:
+            cursor = koneksi.cursor()
+            try:
+                cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (self.batas_eksekusi_ms,))
+            finally:
+                cursor.close()
+
+    def ubah_sql(self, sql):
+        return sql
+
+    def pecah_skrip(self, skrip):
+        return _pecah_skrip(skrip)
+
+    def tutup(self, koneksi):
+        try:
+            koneksi.close()
+        except self._mysql.Error:
+            pass
+
+
+class SQLiteBackend:
+    nama = 'sqlite'
+    sql_daftar_tabel = "SELECT name AS nama FROM sqlite_master WHERE type = 'table'"
+
+    def __init__(self, path, timeout_koneksi=5):
+        self.path = path
+        self.timeout_koneksi = timeout_koneksi
+        self.error_types = (sqlite3.Error,)
+        self._uri = path.startswith('file:')
+
+    def buat_koneksi(self):
+        koneksi = sqlite3.connect(self.path, timeout=self.timeout_koneksi, check_same_thread=False,
+                                  detect_types=sqlite3.PARSE_DECLTYPES, uri=self._uri)
+        koneksi.execute("PRAGMA foreign_keys = ON")
+        if not self._uri and self.path != ':memory:':
+            koneksi.execute("PRAGMA journal_mode = WAL")
+        return koneksi
+
+    def sehat(self, koneksi):
+        try:
+            koneksi.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def cursor(self, koneksi, prepared=False):
+        # Modul sqlite3 sudah meng-cache statement yang sudah di-compile.
+        return koneksi.cursor()
+
+    def cursor_stream(self, koneksi):
+        # Cursor sqlite3 sudah membaca baris bertahap saat fetchmany().
+        return koneksi.cursor()
+
+    def akhiri_stream(self, koneksi):
+        pass
+
+    def ubah_sql(self, sql):
+        return sql.replace('%s', '?')
+
+    def pecah_skrip(self, skrip):
+        skrip = re.sub(r'\bINT AUTO_INCREMENT PRIMARY KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', skrip)
+        return _pecah_skrip(skrip)
+
+    def tutup(self, koneksi):
+        try:
+            koneksi.close()
+        except sqlite3.Error:
+            pass
+
+
+sqlite3.register_adapter(datetime, lambda nilai: nilai.isoformat(' '))
+sqlite3.register_adapter(date, lambda nilai: nilai.isoformat())
+sqlite3.register_converter('DATETIME', lambda nilai: datetime.fromisoformat(nilai.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda nilai: datetime.fromisoformat(nilai.decode()))
+
+
+class _Koneksi:
+    __slots__ = ('mentah', 'terakhir_dipakai', 'cursor_prepared')
+
+    def __init__(self, mentah):
+        self.mentah = mentah
+        self.terakhir_dipakai = time.monotonic()
+        self.cursor_prepared = {}
+
+
+def _ke_dict(cursor, baris):
+    kolom = [d[0] for d in cursor.description]
+    return dict(zip(kolom, baris))
+
+
+class _Sesi:
+    # Satu koneksi yang sedang dipinjam; dipakai oleh Database dan transaksi().
+    def __init__(self, db, koneksi):
+        self._db = db
+        self._koneksi = koneksi
+
+    def _jalankan(self, sql, params, prepared):
+        backend = self._db.backend
+        sql_backend = backend.ubah_sql(sql)
+        if prepared:
+            cursor = self._koneksi.cursor_prepared.get(sql_backend)
+            if cursor is None:
+                cursor = backend.cursor(self._koneksi.mentah, prepared=True)
+                self._koneksi.cursor_prepared[sql_backend] = cursor
+        else:
+            cursor = backend.cursor(self._koneksi.mentah)
+        mulai = time.perf_counter()
+        try:
+            cursor.execute(sql_backend, tuple(params))
+        except backend.error_types as e:
+            raise DatabaseError(str(e)) from e
+        finally:
+            self._db._catat_query(sql, time.perf_counter() - mulai)
+        return cursor
+
+    def _selesai(self, cursor, prepared):
+        if not prepared:
+            cursor.close()
+
+    def query(self, sql, params=(), prepared=False):
+        cursor = self._jalankan(sql, params, prepared)
+        try:
+            return [_ke_dict(cursor, baris) for baris in cursor.fetchall()]
+        finally:
+            self._selesai(cursor, prepared)
+
+    def query_one(self, sql, params=(), prepared=False):
+        cursor = self._jalankan(sql, params, prepared)
+        try:
+            baris = cursor.fetchall()
+            return _ke_dict(cursor, baris[0]) if baris else None
+        finally:
+            self._selesai(cursor, prepared)
+
+    def execute(self, sql, params=(), prepared=False):
+        cursor = self._jalankan(sql, params, prepared)
+        try:
+            return HasilEksekusi(cursor.rowcount, cursor.lastrowid)
+        finally:
+            self._selesai(cursor, prepared)
+
+    def executemany(self, sql, daftar_params):
+        backend = self._db.backend
+        cursor = backend.cursor(self._koneksi.mentah)
+        mulai = time.perf_counter()
+        try:
+            cursor.executemany(backend.ubah_sql(sql), [tuple(p) for p in daftar_params])
+            return HasilEksekusi(cursor.rowcount, cursor.lastrowid)
+        except backend.error_types as e:
+            raise DatabaseError(str(e)) from e
+        finally:
+            self._db._catat_query(sql, time.perf_counter() - mulai)
+            cursor.close()
+
+
+class Database:
+    def __init__(self, backend, ukuran_pool=8, timeout_pinjam=5, cek_setelah_idle=30):
+        self.backend = backend
+        self.ukuran_pool = ukuran_pool
+        self.timeout_pinjam = timeout_pinjam
+        self.cek_setelah_idle = cek_setelah_idle
+        self._bebas = queue.LifoQueue()
+        self._slot = threading.BoundedSemaphore(ukuran_pool)
+        self._lock = threading.Lock()
+        self._statistik = {'koneksi_dibuat': 0, 'koneksi_dibuang': 0, 'query': 0, 'waktu_query': 0.0,
+                           'timeout_pinjam': 0}
+        self._pendengar_query = []
+
+    # ---- pool ----
+
+    def _pinjam(self):
+        if not self._slot.acquire(timeout=self.timeout_pinjam):
+            with self._lock:
+                self._statistik['timeout_pinjam'] += 1
+            raise DatabaseError(f"Pool koneksi habis (menunggu {self.timeout_pinjam} detik)")
+        try:
+            while True:
+                try:
+                    koneksi = self._bebas.get_nowait()
+                except queue.Empty:
+                    break
+                idle = time.monotonic() - koneksi.terakhir_dipakai
+                if idle < self.cek_setelah_idle or self.backend.sehat(koneksi.mentah):
+                    return koneksi
+                self._buang(koneksi)
+            try:
+                mentah = self.backend.buat_koneksi()
+            except self.backend.error_types as e:
+                raise DatabaseError(f"Gagal terhubung ke database: {e}") from e
+            with self._lock:
+                self._statistik['koneksi_dibuat'] += 1
+            return _Koneksi(mentah)
+        except BaseException:
+            self._slot.release()
+            raise
+
+    def _kembalikan(self, koneksi, rusak=False):
+        try:
+            if rusak:
+                self._buang(koneksi)
+            else:
+                koneksi.terakhir_dipakai = time.monotonic()
+                self._bebas.put(koneksi)
+        finally:
+            self._slot.release()
+
+    def _buang(self, koneksi):
+        for cursor in koneksi.cursor_prepared.values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self.backend.tutup(koneksi.mentah)
+        with self._lock:
+            self._statistik['koneksi_dibuang'] += 1
+
+    @contextmanager
+    def _sesi(self, commit):
+        koneksi = self._pinjam()
+        rusak = False
+        try:
+            yield _Sesi(self, koneksi)
+            # Sesi baca juga diakhiri agar koneksi yang kembali ke pool tidak
+            # menahan snapshot transaksi lama (REPEATABLE READ di MySQL).
+            if commit:
+                koneksi.mentah.commit()
+            else:
+                koneksi.mentah.rollback()
+        except BaseException as e:
+            try:
+                koneksi.mentah.rollback()
+            except Exception:
+                rusak = True
+            if isinstance(e, DatabaseError) and not self.backend.sehat(koneksi.mentah):
+                rusak = True
+            raise
+        finally:
+            self._kembalikan(koneksi, rusak)
+
+    @contextmanager
+    def transaksi(self):
+        with self._sesi(commit=True) as sesi:
+            yield sesi
+
+    # ---- query tunggal (satu koneksi pinjaman per panggilan) ----
+
+    def query(self, sql, params=(), prepared=False):
+        with self._sesi(commit=False) as sesi:
+            return sesi.query(sql, params, prepared)
+
+    def query_one(self, sql, params=(), prepared=False):
+        with self._sesi(commit=False) as sesi:
+            return sesi.query_one(sql, params, prepared)
+
+    def execute(self, sql, params=(), prepared=False):
+        with self._sesi(commit=True) as sesi:
+            return sesi.execute(sql, params, prepared)
+
+    def executemany(self, sql, daftar_params):
+        with self._sesi(commit=True) as sesi:
+            return sesi.executemany(sql, daftar_params)
+
+    def stream(self, sql, params=(), ukuran_batch=1000):
+        koneksi = self._pinjam()
+        backend = self.backend
+        cursor = None
+        tuntas = False
+        try:
+            try:
+                cursor = backend.cursor_stream(koneksi.mentah)
+                mulai = time.perf_counter()
+                try:
+                    cursor.execute(backend.ubah_sql(sql), tuple(params))
+                finally:
+                    self._catat_query(sql, time.perf_counter() - mulai)
+                kolom = [d[0] for d in cursor.description]
+                while True:
+                    baris = cursor.fetchmany(ukuran_batch)
+                    if not baris:
+                        break
+                    for b in baris:
+                        yield dict(zip(kolom, b))
+            except backend.error_types as e:
+                raise DatabaseError(str(e)) from e
+            tuntas = True
+        finally:
+            rusak = not tuntas
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    rusak = True
+            if not rusak:
+                try:
+                    backend.akhiri_stream(koneksi.mentah)
+                    koneksi.mentah.rollback()
+                except Exception:
+                    rusak = True
+            self._kembalikan(koneksi, rusak)
+
+    def jalankan_skrip(self, skrip):
+        with self._sesi(commit=True) as sesi:
+            for perintah in self.backend.pecah_skrip(skrip):
+                sesi.execute(perintah)
+
+    def pastikan_skema(self, skrip):
+        # Menjalankan skrip jika belum ada satu pun tabelnya (skrip diawali DROP TABLE,
+        # jadi tidak boleh dijalankan di atas data). True jika skema baru dibuat.
+        tabel_skema = re.findall(r'^\s*CREATE TABLE (\w+)', skrip, re.MULTILINE | re.IGNORECASE)
+        ada = {baris['nama'] for baris in self.query(self.backend.sql_daftar_tabel)}
+        hilang = [tabel for tabel in tabel_skema if tabel not in ada]
+        if not hilang:
+            return False
+        if len(hilang) < len(tabel_skema):
+            raise DatabaseError(f"Skema database tidak lengkap (tabel hilang: {', '.join(hilang)}); "
+                                f"jalankan bagian migrasi di etle_system.sql")
+        self.jalankan_skrip(skrip)
+        print(f"🗄️ Skema database dibuat ({len(tabel_skema)} tabel).")
+        return True
+
+    # ---- pemantauan ----
+
+    def tambah_pendengar_query(self, fungsi):
+        self._pendengar_query.append(fungsi)
+
+    def _catat_query(self, sql, durasi):
+        with self._lock:
+            self._statistik['query'] += 1
+            self._statistik['waktu_query'] += durasi
+        for fungsi in self._pendengar_query:
+            fungsi(sql, durasi)
+
+    def sehat(self):
+        try:
+            self.query_one("SELECT 1 AS ok")
+            return True
+        except DatabaseError:
+            return False
+
+    def statistik(self):
+        with self._lock:
+            data = dict(self._statistik)
+        data['waktu_query'] = round(data['waktu_query'], 4)
+        data['backend'] = self.backend.nama
+        data['ukuran_pool'] = self.ukuran_pool
+        data['koneksi_idle'] = self._bebas.qsize()
+        return data
+
+    def tutup(self):
+        while True:
+            try:
+                koneksi = self._bebas.get_nowait()
+            except queue.Empty:
+                break
+            self._buang(koneksi)
+
+
+def buat_database(backend='mysql', config=None, path_sqlite='etle_system.db', ukuran_pool=8,
+                  timeout_koneksi=5, timeout_pinjam=5, path_skema=PATH_SKEMA):
+    if backend == 'sqlite':
+        db = Database(SQLiteBackend(path_sqlite, timeout_koneksi=timeout_koneksi),
+                      ukuran_pool=ukuran_pool, timeout_pinjam=timeout_pinjam)
+        # File SQLite baru (uji, replay, VTRACK lokal) langsung bisa dipakai tanpa langkah setup.
+        if path_skema:
+            with open(path_skema, encoding='utf-8') as f:
+                db.pastikan_skema(f.read())
+        return db
+    if backend == 'mysql':
+        return Database(MySQLBackend(config or {}, timeout_koneksi=timeout_koneksi),
+                        ukuran_pool=ukuran_pool, timeout_pinjam=timeout_pinjam)
+    raise ValueError(f"Backend database tidak dikenal: {backend}")
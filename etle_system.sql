@@ -1,4 +1,5 @@
 -- Hapus tabel jika sudah ada untuk memastikan skema yang bersih
+DROP TABLE IF EXISTS statistik_harian;
 DROP TABLE IF EXISTS deteksi;
 DROP TABLE IF EXISTS deteksi_wajah;
 DROP TABLE IF EXISTS deteksi_anomali;
@@ -14,9 +15,17 @@ CREATE TABLE perjalanan (
     waktu_selesai DATETIME,
     -- Status bisa 'Pending', 'Sesuai', 'Gagal', 'Perlu Cek Manual'
     status VARCHAR(50) NOT NULL DEFAULT 'Pending',
+    -- Foto deteksi pertama, diisi saat deteksi pertama dicatat (untuk daftar riwayat)
+    path_foto_pertama VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Indeks untuk daftar riwayat (keyset pagination) dan pencarian perjalanan Pending per plat
+CREATE INDEX idx_perjalanan_waktu ON perjalanan (waktu_mulai, id);
+CREATE INDEX idx_perjalanan_status_waktu ON perjalanan (status, waktu_mulai, id);
+CREATE INDEX idx_perjalanan_status_plat ON perjalanan (status, nomor_plat);
+CREATE INDEX idx_perjalanan_plat_waktu ON perjalanan (nomor_plat, waktu_mulai, id);
+
 -- Tabel untuk mencatat setiap deteksi plat nomor oleh kamera
 CREATE TABLE deteksi (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -25,6 +34,8 @@ CREATE TABLE deteksi (
     nomor_plat VARCHAR(20) NOT NULL,
     waktu_deteksi DATETIME NOT NULL,
     path_foto VARCHAR(255) NOT NULL,
+    -- Crop plat (foto konteks di path_foto bisa dipakai bersama beberapa deteksi)
+    path_crop VARCHAR(255),
     confidence FLOAT DEFAULT 0.0,
     -- Menandai kamera mana yang melakukan deteksi
     kamera_id INT NOT NULL,
@@ -32,14 +43,23 @@ CREATE TABLE deteksi (
     FOREIGN KEY (perjalanan_id) REFERENCES perjalanan(id) ON DELETE SET NULL
 );
 
--- Tabel untuk deteksi wajah (tidak ada perubahan fungsionalitas inti)
+CREATE INDEX idx_deteksi_perjalanan_waktu ON deteksi (perjalanan_id, waktu_deteksi);
+CREATE INDEX idx_deteksi_waktu ON deteksi (waktu_deteksi, id);
+
+-- Tabel untuk deteksi wajah: satu baris per jejak wajah (bukan per frame) dari VTRACK
 CREATE TABLE deteksi_wajah (
     id INT AUTO_INCREMENT PRIMARY KEY,
     waktu_deteksi DATETIME,
     path_foto VARCHAR(255),
+    path_crop VARCHAR(255),
+    -- Nama sumber VTRACK (mis. wajah1) dan id jejak di sumber itu
+    sumber VARCHAR(50),
+    jejak_id INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX idx_deteksi_wajah_waktu ON deteksi_wajah (waktu_deteksi);
+
 -- --- PENAMBAHAN BARU ---
 -- Tabel untuk mencatat deteksi plat yang tidak terdaftar dalam perjalanan aktif
 CREATE TABLE deteksi_anomali (
@@ -47,7 +67,41 @@ CREATE TABLE deteksi_anomali (
     nomor_plat VARCHAR(20) NOT NULL,
     waktu_deteksi DATETIME NOT NULL,
     path_foto VARCHAR(255) NOT NULL,
+    path_crop VARCHAR(255),
     kamera_id INT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 -- --- AKHIR PENAMBAHAN ---
+
+-- Indeks untuk ekspor per rentang tanggal dan pemindahan anomali lama ke arsip
+CREATE INDEX idx_deteksi_anomali_waktu ON deteksi_anomali (waktu_deteksi, id);
+
+-- Rollup jumlah perjalanan per hari, diperbarui setiap perjalanan dibuat atau berubah status
+CREATE TABLE statistik_harian (
+    tanggal DATE NOT NULL,
+    tujuan VARCHAR(100) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    jumlah INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tanggal, tujuan, status)
+);
+
+-- --- MIGRASI UNTUK DATABASE YANG SUDAH ADA ---
+-- Jalankan manual (tanpa DROP TABLE di atas) untuk menambahkan kolom dan indeks riwayat:
+-- ALTER TABLE perjalanan ADD COLUMN path_foto_pertama VARCHAR(255) AFTER status;
+-- CREATE INDEX idx_perjalanan_waktu ON perjalanan (waktu_mulai, id);
+-- CREATE INDEX idx_perjalanan_status_waktu ON perjalanan (status, waktu_mulai, id);
+-- CREATE INDEX idx_perjalanan_status_plat ON perjalanan (status, nomor_plat);
+-- CREATE INDEX idx_perjalanan_plat_waktu ON perjalanan (nomor_plat, waktu_mulai, id);
+-- CREATE INDEX idx_deteksi_perjalanan_waktu ON deteksi (perjalanan_id, waktu_deteksi);
+-- CREATE INDEX idx_deteksi_waktu ON deteksi (waktu_deteksi, id);
+-- UPDATE perjalanan p SET path_foto_pertama = (
+--     SELECT d.path_foto FROM deteksi d WHERE d.perjalanan_id = p.id ORDER BY d.waktu_deteksi ASC, d.id ASC LIMIT 1
+-- ) WHERE path_foto_pertama IS NULL;
+-- ALTER TABLE deteksi ADD COLUMN path_crop VARCHAR(255) AFTER path_foto;
+-- ALTER TABLE deteksi_anomali ADD COLUMN path_crop VARCHAR(255) AFTER path_foto;
+-- ALTER TABLE deteksi_wajah ADD COLUMN path_crop VARCHAR(255) AFTER path_foto;
+-- ALTER TABLE deteksi_wajah ADD COLUMN sumber VARCHAR(50) AFTER path_crop;
+-- ALTER TABLE deteksi_wajah ADD COLUMN jejak_id INT AFTER sumber;
+-- CREATE INDEX idx_deteksi_wajah_waktu ON deteksi_wajah (waktu_deteksi);
+-- CREATE INDEX idx_deteksi_anomali_waktu ON deteksi_anomali (waktu_deteksi, id);
+-- Buat juga tabel statistik_harian seperti di atas, isinya dibangun otomatis oleh aplikasi saat kosong.
@@ -0,0 +1,101 @@
+import threading
+
+import cv2
+
+# =============================
+# Pemicu OCR Berbasis Gerak
+# =============================
+#
+# Pengganti timer OCR tetap 3 detik. Setiap frame kamera deteksi diperkecil
+# ke grayscale beberapa ratus piksel, dibandingkan dengan model latar
+# (running average), dan OCR hanya dipicu jika ada perubahan di zona plat:
+# beruntun setiap interval_burst selama objek masih bergerak (ditambah
+# tahan_gerak detik setelahnya), dan tidak sama sekali saat adegan diam
+# (kecuali interval_jaga diisi). Penghitung membandingkan dengan timer lama
+# untuk menunjukkan berapa panggilan OCR yang dihemat.
+
+LEBAR_ANALISIS = 160
+AMBANG_PIKSEL = 25
+ALPHA_LATAR = 0.05
+INTERVAL_TIMER_LAMA = 3.0
+
+
+class PemicuOCR:
+    def __init__(self, zona=(0.0, 0.0, 1.0, 1.0), ambang_area=0.01, interval_burst=0.3, tahan_gerak=1.5,
+                 interval_jaga=None, lebar_analisis=LEBAR_ANALISIS, ambang_piksel=AMBANG_PIKSEL, alpha_latar=ALPHA_LATAR):
+        self.zona = zona
+        self.ambang_area = ambang_area
+        self.interval_burst = interval_burst
+        self.tahan_gerak = tahan_gerak
+        self.interval_jaga = interval_jaga
+        self.lebar_analisis = lebar_analisis
+        self.ambang_piksel = ambang_piksel
+        self.alpha_latar = alpha_latar
+        self._lock = threading.Lock()
+        self._latar = None
+        self._irisan_zona = None
+        self._waktu_gerak = None
+        self._waktu_ocr = None
+        self._waktu_timer_lama = None
+        self._statistik = {'frame_dianalisis': 0, 'frame_bergerak': 0, 'ocr_dipicu': 0,
+                           'ocr_dihemat': 0, 'ocr_tambahan': 0, 'area_gerak_terakhir': 0.0}
+
+    def _kecilkan(self, frame):
+        # Diperkecil dulu baru dikonversi ke grayscale: konversi warna hanya menyentuh piksel kecil.
+        skala = self.lebar_analisis / float(frame.shape[1])
+        kecil = cv2.resize(frame, (self.lebar_analisis, max(1, int(frame.shape[0] * skala))), interpolation=cv2.INTER_AREA)
+        if kecil.ndim == 3:
+            kecil = cv2.cvtColor(kecil, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(kecil, (5, 5), 0)
+
+    def _siapkan_zona(self, bentuk):
+        tinggi, lebar = bentuk
+        x0, y0, x1, y1 = self.zona
+        self._irisan_zona = (slice(int(y0 * tinggi), max(int(y0 * tinggi) + 1, int(y1 * tinggi))),
+                             slice(int(x0 * lebar), max(int(x0 * lebar) + 1, int(x1 * lebar))))
+
+    def luas_gerak(self, frame):
+        # Fraksi piksel zona plat yang berbeda dari latar; latar ikut diperbarui.
+        kecil = self._kecilkan(frame)
+        if self._latar is None or self._latar.shape != kecil.shape:
+            self._latar = kecil.astype('float32')
+            self._siapkan_zona(kecil.shape)
+            return 1.0
+        beda = cv2.absdiff(kecil, cv2.convertScaleAbs(self._latar))
+        cv2.accumulateWeighted(kecil, self._latar, self.alpha_latar)
+        zona = beda[self._irisan_zona]
+        return cv2.countNonZero(cv2.threshold(zona, self.ambang_piksel, 255, cv2.THRESH_BINARY)[1]) / float(zona.size)
+
+    def perbarui(self, frame, waktu):
+        # True jika frame ini perlu dikirim ke OCR.
+        luas = self.luas_gerak(frame)
+        with self._lock:
+            self._statistik['frame_dianalisis'] += 1
+            self._statistik['area_gerak_terakhir'] = round(luas, 4)
+            if luas >= self.ambang_area:
+                self._statistik['frame_bergerak'] += 1
+                self._waktu_gerak = waktu
+
+            sejak_ocr = None if self._waktu_ocr is None else waktu - self._waktu_ocr
+            bergerak = self._waktu_gerak is not None and waktu - self._waktu_gerak <= self.tahan_gerak
+            if bergerak:
+                picu = sejak_ocr is None or sejak_ocr >= self.interval_burst
+            else:
+                picu = self.interval_jaga is not None and (sejak_ocr is None or sejak_ocr >= self.interval_jaga)
+
+            # Bandingkan dengan timer lama (OCR setiap INTERVAL_TIMER_LAMA detik).
+            timer_lama = self._waktu_timer_lama is None or waktu - self._waktu_timer_lama > INTERVAL_TIMER_LAMA
+            if timer_lama:
+                self._waktu_timer_lama = waktu
+            if picu:
+                self._waktu_ocr = waktu
+                self._statistik['ocr_dipicu'] += 1
+                if not timer_lama:
+                    self._statistik['ocr_tambahan'] += 1
+            elif timer_lama:
+                self._statistik['ocr_dihemat'] += 1
+            return picu
+
+    def statistik(self):
+        with self._lock:
+            return dict(self._statistik)
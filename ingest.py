@@ -0,0 +1,302 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+# =============================
+# Ingest Write-Behind (group commit)
+# =============================
+#
+# Baris deteksi tidak lagi ditulis satu per satu di thread OCR. tulis()
+# hanya menaruh baris ke antrian terbatas (tidak pernah menunggu DB); satu
+# thread penulis mengumpulkan baris dan menulisnya dengan executemany (di
+# MySQL menjadi INSERT multi-baris) dalam satu transaksi setiap ukuran_batch
+# baris atau setiap interval detik, mana yang lebih dulu.
+#
+# Jika DB tidak bisa dihubungi, batch ditulis ke jurnal NDJSON lokal
+# (fsync per batch) dan penulis mencoba lagi setiap interval_coba_ulang
+# detik. Selama jurnal belum kosong, baris baru ikut masuk jurnal agar
+# urutan tetap terjaga; saat DB kembali, jurnal diputar ulang dalam satu
+# transaksi lalu dihapus. Jika proses mati tepat setelah commit putar ulang
+# tetapi sebelum file jurnal dihapus, baris jurnal bisa tertulis dua kali.
+#
+# Saat antrian penuh, tulis() menaruh baris di daftar luapan (tanpa I/O) dan
+# baris berikutnya ikut ke luapan sampai penulis mengambilnya. Penulis lebih
+# dulu menghabiskan antrian (baris yang lebih tua), menulis batchnya, baru
+# memindahkan luapan ke jurnal; jadi urutan jurnal dan putar ulang sama
+# dengan urutan deteksi, dan fsync tidak pernah terjadi di thread OCR.
+
+_FLUSH = object()
+
+
+def _encode(nilai):
+    if isinstance(nilai, datetime):
+        return {'$dt': nilai.isoformat()}
+    if isinstance(nilai, date):
+        return {'$d': nilai.isoformat()}
+    raise TypeError(f"tipe {type(nilai).__name__} tidak bisa dijurnal")
+
+
+def _decode(obj):
+    if '$dt' in obj:
+        return datetime.fromisoformat(obj['$dt'])
+    if '$d' in obj:
+        return date.fromisoformat(obj['$d'])
+    return obj
+
+
+class PenulisIngest:
+    def __init__(self, db, perintah, kapasitas=10000, ukuran_batch=200, interval=0.2, path_jurnal=None,
+                 interval_coba_ulang=5.0, nama="ingest"):
+        # perintah: nama -> SQL INSERT dengan placeholder %s, mis. {'deteksi': "INSERT INTO deteksi (...) VALUES (...)"}
+        self.db = db
+        self.perintah = dict(perintah)
+        self.ukuran_batch = max(1, ukuran_batch)
+        self.interval = interval
+        self.path_jurnal = path_jurnal
+        self.interval_coba_ulang = interval_coba_ulang
+        self._antrian = queue.Queue(maxsize=kapasitas)
+        self._lock = threading.Lock()
+        self._lock_jurnal = threading.Lock()
+        self._lock_putar = threading.Lock()
+        self._luapan = []
+        self._db_gagal = False
+        self._coba_berikutnya = 0.0
+        self._baris_jurnal = self._hitung_baris_jurnal()
+        self._statistik = {'diterima': 0, 'ditulis': 0, 'batch': 0, 'batch_terbesar': 0, 'dijurnal': 0,
+                           'antrian_penuh': 0, 'diputar_ulang': 0, 'gagal_db': 0, 'baris_rusak': 0}
+        self._thread = threading.Thread(target=self._loop, name=nama)
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.hentikan)
+
+    # ---- pemanggil ----
+
+    def tulis(self, nama, params):
+        if nama not in self.perintah:
+            raise KeyError(f"perintah ingest tidak dikenal: {nama}")
+        baris = (nama, tuple(params))
+        with self._lock:
+            self._statistik['diterima'] += 1
+            if not self._luapan:
+                try:
+                    self._antrian.put_nowait(baris)
+                    return
+                except queue.Full:
+                    pass
+            # Selama luapan belum diambil penulis, baris baru tetap di belakangnya.
+            self._luapan.append(baris)
+            self._statistik['antrian_penuh'] += 1
+
+    def flush(self, timeout=None):
+        # Menunggu semua baris yang sudah diterima ditulis, lalu memutar ulang jurnal.
+        # True hanya jika semuanya sudah ada di DB (antrian dan jurnal kosong).
+        selesai = threading.Event()
+        try:
+            self._antrian.put((_FLUSH, selesai), timeout=timeout)
+        except queue.Full:
+            return False
+        if not selesai.wait(timeout):
+            return False
+        if self._baris_jurnal:
+            self.putar_ulang_jurnal()
+        return self._baris_jurnal == 0
+
+    def hentikan(self, timeout=10):
+        if not self._thread.is_alive():
+            return
+        try:
+            self._antrian.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    # ---- penulis ----
+
+    def _loop(self):
+        tertunda = OrderedDict()
+        jumlah = 0
+        tertua = None
+        while True:
+            tunggu = None if tertua is None else max(0.0, tertua + self.interval - time.monotonic())
+            if self._db_gagal:
+                sisa_coba = max(0.0, self._coba_berikutnya - time.monotonic())
+                tunggu = sisa_coba if tunggu is None else min(tunggu, sisa_coba)
+            try:
+                daftar_item = [self._antrian.get(timeout=tunggu)]
+            except queue.Empty:
+                daftar_item = []
+            ada_luapan = bool(self._luapan)
+            if ada_luapan:
+                # Isi antrian lebih tua dari luapan, jadi dihabiskan dan ditulis lebih dulu.
+                while True:
+                    try:
+                        daftar_item.append(self._antrian.get_nowait())
+                    except queue.Empty:
+                        break
+
+            berhenti = False
+            penanda_flush = []
+            for item in daftar_item:
+                if item is None:
+                    berhenti = True
+                elif item[0] is _FLUSH:
+                    penanda_flush.append(item[1])
+                else:
+                    tertunda.setdefault(item[0], []).append(item[1])
+                    jumlah += 1
+                    if tertua is None:
+                        tertua = time.monotonic()
+
+            sekarang = time.monotonic()
+            if jumlah and (berhenti or penanda_flush or ada_luapan or jumlah >= self.ukuran_batch
+                           or sekarang - tertua >= self.interval):
+                self._tulis_batch(tertunda, jumlah)
+                tertunda, jumlah, tertua = OrderedDict(), 0, None
+            if ada_luapan:
+                with self._lock:
+                    luapan, self._luapan = self._luapan, []
+                self._tulis_jurnal(luapan)
+                if not self._db_gagal:
+                    self.putar_ulang_jurnal()
+            if self._db_gagal and sekarang >= self._coba_berikutnya:
+                self.putar_ulang_jurnal()
+            for penanda in penanda_flush:
+                penanda.set()
+            if berhenti:
+                return
+
+    def _tulis_batch(self, tertunda, jumlah):
+        # Selama jurnal masih berisi, baris baru ditambahkan di belakangnya agar urutan tidak tertukar.
+        if self._baris_jurnal and not self._db_gagal:
+            # Jurnal dari antrian penuh: DB sehat, jadi putar ulang dulu.
+            self.putar_ulang_jurnal()
+        if self._baris_jurnal == 0 and not self._db_gagal:
+            try:
+                with self.db.transaksi() as tx:
+                    for nama, daftar in tertunda.items():
+                        tx.executemany(self.perintah[nama], daftar)
+            except Exception as e:
+                self._tandai_gagal(e)
+            else:
+                with self._lock:
+                    self._statistik['ditulis'] += jumlah
+                    self._statistik['batch'] += 1
+                    self._statistik['batch_terbesar'] = max(self._statistik['batch_terbesar'], jumlah)
+                return
+        self._tulis_jurnal([(nama, params) for nama, daftar in tertunda.items() for params in daftar])
+
+    def _tandai_gagal(self, error):
+        with self._lock:
+            self._statistik['gagal_db'] += 1
+        if not self._db_gagal:
+            print(f"⚠️ Ingest: database tidak bisa ditulis ({error}); baris dialihkan ke jurnal.")
+        self._db_gagal = True
+        self._coba_berikutnya = time.monotonic() + self.interval_coba_ulang
+
+    # ---- jurnal ----
+
+    def _path_putar(self):
+        return self.path_jurnal + '.putar'
+
+    def _hitung_baris_jurnal(self):
+        if not self.path_jurnal:
+            return 0
+        jumlah = 0
+        for path in (self._path_putar(), self.path_jurnal):
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    jumlah += sum(1 for baris in f if baris.strip())
+        if jumlah:
+            # Sisa jurnal dari proses sebelumnya diputar ulang pada kesempatan pertama.
+            self._db_gagal = True
+        return jumlah
+
+    def _tulis_jurnal(self, baris):
+        if not self.path_jurnal:
+            print(f"❌ Ingest: {len(baris)} baris hilang (database gagal dan jurnal tidak diatur).")
+            return
+        isi = ''.join(json.dumps({'t': nama, 'p': list(params)}, default=_encode) + '\n' for nama, params in baris)
+        with self._lock_jurnal:
+            with open(self.path_jurnal, 'a', encoding='utf-8') as f:
+                f.write(isi)
+                f.flush()
+                os.fsync(f.fileno())
+            self._baris_jurnal += len(baris)
+        with self._lock:
+            self._statistik['dijurnal'] += len(baris)
+
+    def _baca_jurnal(self, path):
+        # Mengembalikan (baris_valid, jumlah_baris_di_file).
+        hasil = []
+        jumlah = 0
+        with open(path, encoding='utf-8') as f:
+            for baris in f:
+                if not baris.strip():
+                    continue
+                jumlah += 1
+                try:
+                    data = json.loads(baris, object_hook=_decode)
+                    nama, params = data['t'], tuple(data['p'])
+                except (ValueError, KeyError):
+                    # Baris terakhir bisa terpotong jika proses mati saat menulis.
+                    with self._lock:
+                        self._statistik['baris_rusak'] += 1
+                    continue
+                if nama in self.perintah:
+                    hasil.append((nama, params))
+        return hasil, jumlah
+
+    def putar_ulang_jurnal(self):
+        # Mengembalikan jumlah baris yang diputar ulang; 0 jika tidak ada atau DB masih gagal.
+        # Jurnal aktif dipindah ke file putar di bawah _lock_jurnal, lalu DB ditulis tanpa
+        # lock itu, jadi tulis() yang sedang mengalihkan ke jurnal tidak pernah menunggu DB.
+        if not self.path_jurnal:
+            self._db_gagal = False
+            return 0
+        with self._lock_putar:
+            path_putar = self._path_putar()
+            with self._lock_jurnal:
+                if os.path.exists(self.path_jurnal):
+                    with open(self.path_jurnal, encoding='utf-8') as sumber, open(path_putar, 'a', encoding='utf-8') as tujuan:
+                        tujuan.write(sumber.read())
+                        tujuan.flush()
+                        os.fsync(tujuan.fileno())
+                    os.remove(self.path_jurnal)
+            if not os.path.exists(path_putar):
+                self._db_gagal = False
+                return 0
+
+            baris, jumlah_file = self._baca_jurnal(path_putar)
+            try:
+                with self.db.transaksi() as tx:
+                    for awal in range(0, len(baris), self.ukuran_batch):
+                        potongan = OrderedDict()
+                        for nama, params in baris[awal:awal + self.ukuran_batch]:
+                            potongan.setdefault(nama, []).append(params)
+                        for nama, daftar in potongan.items():
+                            tx.executemany(self.perintah[nama], daftar)
+            except Exception as e:
+                self._tandai_gagal(e)
+                return 0
+            os.remove(path_putar)
+            with self._lock_jurnal:
+                self._baris_jurnal = max(0, self._baris_jurnal - jumlah_file)
+            self._db_gagal = False
+        with self._lock:
+            self._statistik['diputar_ulang'] += len(baris)
+        print(f"✅ Ingest: {len(baris)} baris jurnal diputar ulang ke database.")
+        return len(baris)
+
+    def statistik(self):
+        with self._lock:
+            data = dict(self._statistik)
+            data['luapan'] = len(self._luapan)
+        data['antrian'] = self._antrian.qsize()
+        data['baris_jurnal'] = self._baris_jurnal
+        data['db_tersedia'] = not self._db_gagal
+        return data
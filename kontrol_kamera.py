@@ -0,0 +1,158 @@
+import threading
+
+# =============================
+# Status Kamera & Kontroler
+# =============================
+#
+# Pengganti main_lock global. Setiap kamera punya StatusKamera sendiri yang
+# dibaca thread kamera tanpa lock: field-nya hanya ditulis oleh satu pihak
+# (deteksi/penonton oleh kontroler, deteksi_terakhir oleh worker OCR,
+# pemicu oleh thread kamera) dan ditulis sebagai penggantian referensi
+# utuh, jadi pembaca selalu melihat nilai lama atau baru, tidak pernah
+# setengah jadi. Berhenti diberi tahu lewat Event per putaran thread.
+#
+# Siklus hidup (mulai/berhenti kamera, kamera deteksi aktif, penonton,
+# status sistem) diserialkan oleh satu lock kecil di KontrolerKamera yang
+# tidak pernah disentuh jalur per-frame. Thread kamera baru menunggu
+# thread lama kamera yang sama selesai melepas perangkat sebelum membuka
+# ulang, sehingga stop lalu start cepat tidak pernah membuka perangkat
+# dua kali. Perangkat hanya dilepas oleh thread pemiliknya.
+
+
+class StatusKamera:
+    __slots__ = ('kamera_id', 'thread', 'berhenti', 'deteksi', 'penonton', 'pemicu', 'deteksi_terakhir')
+
+    def __init__(self, kamera_id):
+        self.kamera_id = kamera_id
+        self.thread = None
+        self.berhenti = None
+        self.deteksi = False
+        self.penonton = 0
+        self.pemicu = None
+        # Tuple (waktu, kiri_atas, kanan_bawah, teks) dari OCR terakhir untuk overlay stream.
+        self.deteksi_terakhir = ()
+
+    def berjalan(self):
+        return self.thread is not None and self.thread.is_alive() and not self.berhenti.is_set()
+
+
+class KontrolerKamera:
+    def __init__(self, target, lock=None):
+        # target(status, berhenti) dijalankan di thread per kamera sampai berhenti di-set.
+        self.target = target
+        self._lock = lock or threading.Lock()
+        self._kamera = {}
+        # (berjalan, kamera_aktif) diganti utuh agar bisa dibaca tanpa lock.
+        self._keadaan = (False, None)
+
+    # ---- baca tanpa lock ----
+
+    def keadaan(self):
+        return self._keadaan
+
+    @property
+    def berjalan(self):
+        return self._keadaan[0]
+
+    @property
+    def kamera_aktif(self):
+        return self._keadaan[1]
+
+    def ambil(self, kamera_id):
+        status = self._kamera.get(kamera_id)
+        if status is None:
+            with self._lock:
+                status = self._kamera.setdefault(kamera_id, StatusKamera(kamera_id))
+        return status
+
+    def semua(self):
+        return list(self._kamera.values())
+
+    # ---- siklus hidup ----
+
+    def _mulai(self, kamera_id):
+        status = self._kamera.setdefault(kamera_id, StatusKamera(kamera_id))
+        if status.berjalan():
+            return
+        lama = status.thread
+        berhenti = threading.Event()
+        thread = threading.Thread(target=self._jalankan, args=(status, berhenti, lama), name=f"kamera-{kamera_id}")
+        thread.daemon = True
+        status.thread, status.berhenti = thread, berhenti
+        thread.start()
+
+    def _jalankan(self, status, berhenti, lama):
+        if lama is not None:
+            lama.join()
+        if not berhenti.is_set():
+            self.target(status, berhenti)
+
+    def _hentikan(self, kamera_id):
+        status = self._kamera.get(kamera_id)
+        if status is not None and status.berhenti is not None:
+            status.berhenti.set()
+
+    def _dipakai(self, kamera_id):
+        status = self._kamera.get(kamera_id)
+        return kamera_id == self._keadaan[1] or (status is not None and status.penonton > 0)
+
+    def mulai_sistem(self):
+        with self._lock:
+            if self._keadaan[0]:
+                return False
+            self._keadaan = (True, None)
+            return True
+
+    def hentikan_sistem(self):
+        # Semua kamera dilepas, termasuk yang masih ditonton; penonton yang tersambung
+        # melihat "Menunggu Kamera..." dan kamera baru dibuka lagi oleh stream yang dibuka ulang.
+        with self._lock:
+            if not self._keadaan[0]:
+                return False
+            self._keadaan = (False, None)
+            for kamera_id, status in self._kamera.items():
+                status.deteksi = False
+                self._hentikan(kamera_id)
+        return True
+
+    def atur_aktif(self, kamera_id):
+        # Mengganti kamera deteksi; mengembalikan kamera deteksi sebelumnya.
+        with self._lock:
+            berjalan, lama = self._keadaan
+            if kamera_id is not None and not berjalan:
+                kamera_id = None
+            if lama == kamera_id:
+                if kamera_id is not None:
+                    self._mulai(kamera_id)
+                return lama
+            self._keadaan = (berjalan, kamera_id)
+            if lama is not None:
+                self._kamera[lama].deteksi = False
+                if not self._dipakai(lama):
+                    self._hentikan(lama)
+            if kamera_id is not None:
+                self._mulai(kamera_id)
+                self._kamera[kamera_id].deteksi = True
+        return lama
+
+    def tambah_penonton(self, kamera_id):
+        with self._lock:
+            status = self._kamera.setdefault(kamera_id, StatusKamera(kamera_id))
+            status.penonton += 1
+            self._mulai(kamera_id)
+
+    def kurangi_penonton(self, kamera_id):
+        # Kamera baru ditutup saat penonton terakhir pergi dan kamera tidak sedang dipakai deteksi.
+        with self._lock:
+            status = self._kamera.get(kamera_id)
+            if status is None:
+                return
+            status.penonton = max(0, status.penonton - 1)
+            if not self._dipakai(kamera_id):
+                self._hentikan(kamera_id)
+
+    def statistik(self):
+        with self._lock:
+            daftar = list(self._kamera.items())
+        return {kamera_id: {'berjalan': status.berjalan(), 'deteksi': status.deteksi, 'penonton': status.penonton}
+                for kamera_id, status in daftar}
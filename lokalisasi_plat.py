@@ -0,0 +1,144 @@
+import re
+
+import cv2
+import numpy as np
+
+# =============================
+# Lokalisasi Kandidat Plat
+# =============================
+#
+# Dipakai bersama oleh app.py dan VTRACK.py: cari area segi empat yang mirip
+# plat nomor (bilateral filter -> Canny -> approxPolyDP 4 titik), lalu OCR
+# hanya dijalankan pada area tersebut dengan recognizer EasyOCR secara batch,
+# tanpa melewati tahap deteksi teks pada seluruh frame.
+
+MAKS_KONTUR = 10
+LEBAR_MAKS_LOKALISASI = 960
+RASIO_PLAT_MIN = 1.5
+RASIO_PLAT_MAKS = 6.5
+AREA_PLAT_MIN = 600
+IOU_DUPLIKAT = 0.7
+IOU_LEWATI = 0.3
+JARAK_ATLAS = 8
+KARAKTER_PLAT = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+POLA_PLAT = re.compile(r"[A-Z]{1,2}\d{1,4}[A-Z]{0,3}")
+
+
+def ke_abu(frame):
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def bersihkan_teks_plat(teks):
+    # Crop plat dua baris (nomor + masa berlaku) terbaca sebagai satu string,
+    # jadi ambil bagian yang cocok dengan pola plat jika teks terlalu panjang.
+    teks_bersih = re.sub(r'[^A-Z0-9]', '', teks.upper())
+    if len(teks_bersih) > 9:
+        cocok = POLA_PLAT.search(teks_bersih)
+        if cocok:
+            return cocok.group()
+    return teks_bersih
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    lebar = min(ax + aw, bx + bw) - max(ax, bx)
+    tinggi = min(ay + ah, by + bh) - max(ay, by)
+    if lebar <= 0 or tinggi <= 0:
+        return 0.0
+    irisan = lebar * tinggi
+    return irisan / float(aw * ah + bw * bh - irisan)
+
+
+def cari_kandidat_plat(frame, maks_kontur=MAKS_KONTUR, lebar_maks=LEBAR_MAKS_LOKALISASI):
+    abu = ke_abu(frame)
+    skala = 1.0
+    if lebar_maks and abu.shape[1] > lebar_maks:
+        skala = lebar_maks / abu.shape[1]
+        abu = cv2.resize(abu, None, fx=skala, fy=skala, interpolation=cv2.INTER_AREA)
+
+    blur = cv2.bilateralFilter(abu, 11, 17, 17)
+    tepi = cv2.Canny(blur, 30, 200)
+
+    kontur, _ = cv2.findContours(tepi, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    kontur = sorted(kontur, key=cv2.contourArea, reverse=True)[:maks_kontur]
+
+    kandidat = []
+    for c in kontur:
+        keliling = cv2.arcLength(c, True)
+        aproks = cv2.approxPolyDP(c, 0.018 * keliling, True)
+        if len(aproks) != 4:
+            continue
+        x, y, w, h = cv2.boundingRect(aproks)
+        if h == 0 or not (RASIO_PLAT_MIN <= w / h <= RASIO_PLAT_MAKS):
+            continue
+        if w * h < AREA_PLAT_MIN * skala * skala:
+            continue
+        kotak = (int(x / skala), int(y / skala), int(w / skala), int(h / skala))
+        # Tepi dalam dan luar bingkai plat menghasilkan kontur yang hampir sama.
+        if any(iou(kotak, k) > IOU_DUPLIKAT for k in kandidat):
+            continue
+        kandidat.append(kotak)
+    return kandidat
+
+
+def baca_kandidat(pembaca_ocr, frame, kandidat, batch_size=8):
+    # Hasil dalam format yang sama dengan readtext(): (bbox, teks, conf),
+    # dengan bbox dalam koordinat frame asli.
+    if not kandidat:
+        return []
+    abu = ke_abu(frame)
+    horizontal_list = [[x, x + w, y, y + h] for (x, y, w, h) in kandidat]
+    return pembaca_ocr.recognize(abu, horizontal_list=horizontal_list, free_list=[],
+                                 batch_size=batch_size, allowlist=KARAKTER_PLAT)
+
+
+def baca_plat(pembaca_ocr, frame, batch_size=8):
+    return baca_kandidat(pembaca_ocr, frame, cari_kandidat_plat(frame), batch_size=batch_size)
+
+
+def baca_plat_batch(pembaca_ocr, frames, batch_size=16, lewati=None):
+    # Crop kandidat dari semua frame disusun vertikal menjadi satu "atlas"
+    # grayscale sehingga recognizer cukup dipanggil sekali untuk semua kamera.
+    # Hasilnya dipetakan kembali ke koordinat frame masing-masing.
+    # lewati: daftar kotak per frame (plat yang sudah terkonfirmasi) yang tidak perlu di-OCR lagi.
+    semua_crop = []
+    for indeks, frame in enumerate(frames):
+        abu = ke_abu(frame)
+        kotak_lewati = lewati[indeks] if lewati else ()
+        for (x, y, w, h) in cari_kandidat_plat(abu):
+            if any(iou((x, y, w, h), k) >= IOU_LEWATI for k in kotak_lewati):
+                continue
+            semua_crop.append((indeks, x, y, abu[y:y + h, x:x + w]))
+
+    hasil = [[] for _ in frames]
+    if not semua_crop:
+        return hasil
+
+    lebar_atlas = max(crop.shape[1] for _, _, _, crop in semua_crop)
+    tinggi_atlas = sum(crop.shape[0] + JARAK_ATLAS for _, _, _, crop in semua_crop)
+    atlas = np.zeros((tinggi_atlas, lebar_atlas), dtype=np.uint8)
+
+    horizontal_list = []
+    segmen = []
+    y_atlas = 0
+    for indeks, x, y, crop in semua_crop:
+        h, w = crop.shape[:2]
+        atlas[y_atlas:y_atlas + h, :w] = crop
+        horizontal_list.append([0, w, y_atlas, y_atlas + h])
+        segmen.append((y_atlas, y_atlas + h, indeks, x, y))
+        y_atlas += h + JARAK_ATLAS
+
+    hasil_atlas = pembaca_ocr.recognize(atlas, horizontal_list=horizontal_list, free_list=[],
+                                        batch_size=batch_size, allowlist=KARAKTER_PLAT)
+    for (bbox, teks, conf) in hasil_atlas:
+        pusat_y = (bbox[0][1] + bbox[2][1]) / 2.0
+        for (awal, akhir, indeks, x, y) in segmen:
+            if awal <= pusat_y <= akhir:
+                geser_y = y - awal
+                bbox_frame = [[px + x, py + geser_y] for (px, py) in bbox]
+                hasil[indeks].append((bbox_frame, teks, conf))
+                break
+    return hasil
@@ -0,0 +1,236 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+# =============================
+# Metrik (format teks Prometheus)
+# =============================
+#
+# Registri metrik kecil tanpa dependensi tambahan, cukup murah untuk selalu
+# aktif di produksi. Penghitung, pengukur, dan histogram memakai "anak" per
+# kombinasi label yang bisa disimpan pemanggil (metrik.label(kamera_id)),
+# sehingga jalur panas hanya membayar satu lock kecil per pencatatan.
+# Metrik yang nilainya sudah ada di statistik lain (kedalaman antrian,
+# jumlah penonton, ...) cukup diberi fungsi dan baru dibaca saat /metrics
+# di-scrape. LockTerukur membungkus lock biasa untuk mengukur waktu tunggu
+# dan waktu tahan.
+
+BATAS_LATENSI = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_nilai(nilai):
+    if nilai == float('inf'):
+        return '+Inf'
+    if float(nilai).is_integer():
+        return str(int(nilai))
+    return repr(float(nilai))
+
+
+def _escape(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_label(nama_label, nilai_label, tambahan=''):
+    pasangan = [f'{nama}="{_escape(nilai)}"' for nama, nilai in zip(nama_label, nilai_label)]
+    if tambahan:
+        pasangan.append(tambahan)
+    return '{' + ','.join(pasangan) + '}' if pasangan else ''
+
+
+class _AnakPenghitung:
+    __slots__ = ('_lock', 'nilai')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.nilai = 0.0
+
+    def tambah(self, jumlah=1):
+        with self._lock:
+            self.nilai += jumlah
+
+
+class _AnakPengukur(_AnakPenghitung):
+    __slots__ = ()
+
+    def atur(self, nilai):
+        self.nilai = nilai
+
+
+class _AnakHistogram:
+    __slots__ = ('_lock', 'batas', 'hitungan', 'jumlah', 'total')
+
+    def __init__(self, batas):
+        self._lock = threading.Lock()
+        self.batas = batas
+        self.hitungan = [0] * (len(batas) + 1)
+        self.jumlah = 0.0
+        self.total = 0
+
+    def amati(self, nilai):
+        posisi = bisect_left(self.batas, nilai)
+        with self._lock:
+            self.hitungan[posisi] += 1
+            self.jumlah += nilai
+            self.total += 1
+
+
+class _Metrik:
+    jenis = None
+    kelas_anak = None
+
+    def __init__(self, nama, bantuan, label=(), fungsi=None):
+        self.nama = nama
+        self.bantuan = bantuan
+        self.nama_label = tuple(label)
+        self.fungsi = fungsi
+        self._lock = threading.Lock()
+        self._anak = {}
+
+    def _buat_anak(self):
+        return self.kelas_anak()
+
+    def label(self, *nilai_label):
+        anak = self._anak.get(nilai_label)
+        if anak is None:
+            with self._lock:
+                anak = self._anak.get(nilai_label)
+                if anak is None:
+                    anak = self._anak[nilai_label] = self._buat_anak()
+        return anak
+
+    def _sampel(self):
+        # (akhiran, nilai_label, label_tambahan, nilai)
+        if self.fungsi is not None:
+            hasil = self.fungsi()
+            if not isinstance(hasil, dict):
+                hasil = {(): hasil}
+            for nilai_label, nilai in hasil.items():
+                if not isinstance(nilai_label, tuple):
+                    nilai_label = (nilai_label,)
+                yield '', nilai_label, '', nilai
+            return
+        with self._lock:
+            daftar = list(self._anak.items())
+        for nilai_label, anak in daftar:
+            yield '', nilai_label, '', anak.nilai
+
+    def render(self, baris):
+        baris.append(f"# HELP {self.nama} {self.bantuan}")
+        baris.append(f"# TYPE {self.nama} {self.jenis}")
+        for akhiran, nilai_label, tambahan, nilai in self._sampel():
+            baris.append(f"{self.nama}{akhiran}{_format_label(self.nama_label, nilai_label, tambahan)} {_format_nilai(nilai)}")
+
+
+class Penghitung(_Metrik):
+    jenis = 'counter'
+    kelas_anak = _AnakPenghitung
+
+
+class Pengukur(_Metrik):
+    jenis = 'gauge'
+    kelas_anak = _AnakPengukur
+
+
+class Histogram(_Metrik):
+    jenis = 'histogram'
+
+    def __init__(self, nama, bantuan, label=(), batas=BATAS_LATENSI):
+        super().__init__(nama, bantuan, label)
+        self.batas = tuple(sorted(batas))
+
+    def _buat_anak(self):
+        return _AnakHistogram(self.batas)
+
+    def _sampel(self):
+        with self._lock:
+            daftar = list(self._anak.items())
+        for nilai_label, anak in daftar:
+            with anak._lock:
+                hitungan = list(anak.hitungan)
+                jumlah, total = anak.jumlah, anak.total
+            kumulatif = 0
+            for batas, n in zip(self.batas + (float('inf'),), hitungan):
+                kumulatif += n
+                yield '_bucket', nilai_label, f'le="{_format_nilai(batas)}"', kumulatif
+            yield '_sum', nilai_label, '', jumlah
+            yield '_count', nilai_label, '', total
+
+
+class Registri:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrik = []
+
+    def _daftar(self, metrik):
+        with self._lock:
+            self._metrik.append(metrik)
+        return metrik
+
+    def penghitung(self, nama, bantuan, label=(), fungsi=None):
+        return self._daftar(Penghitung(nama, bantuan, label, fungsi))
+
+    def pengukur(self, nama, bantuan, label=(), fungsi=None):
+        return self._daftar(Pengukur(nama, bantuan, label, fungsi))
+
+    def histogram(self, nama, bantuan, label=(), batas=BATAS_LATENSI):
+        return self._daftar(Histogram(nama, bantuan, label, batas))
+
+    def render(self):
+        with self._lock:
+            daftar = list(self._metrik)
+        baris = []
+        for metrik in daftar:
+            try:
+                metrik.render(baris)
+            except Exception as e:
+                # Satu fungsi statistik yang gagal tidak boleh menggagalkan seluruh scrape.
+                baris.append(f"# {metrik.nama} gagal dibaca: {e}")
+        return "\n".join(baris) + "\n"
+
+
+class LockTerukur:
+    # Hanya untuk lock non-reentrant: satu pemegang, jadi waktu mulai cukup disimpan di objek.
+    def __init__(self, lock=None, tunggu=None, tahan=None):
+        self._lock = lock or threading.Lock()
+        self._tunggu = tunggu
+        self._tahan = tahan
+        self._mulai = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        awal = time.perf_counter()
+        didapat = self._lock.acquire(blocking, timeout)
+        if didapat:
+            self._mulai = time.perf_counter()
+            if self._tunggu is not None:
+                self._tunggu.amati(self._mulai - awal)
+        return didapat
+
+    def release(self):
+        durasi = time.perf_counter() - self._mulai
+        self._lock.release()
+        if self._tahan is not None:
+            self._tahan.amati(durasi)
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self.release()
+
+
+_POLA_VERB = re.compile(r'^\s*(\w+)')
+_POLA_TABEL = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+`?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def ringkas_sql(sql):
+    # Label statement berkardinalitas rendah: "SELECT perjalanan", "INSERT deteksi", ...
+    verb = _POLA_VERB.match(sql)
+    tabel = _POLA_TABEL.search(sql)
+    return ' '.join(bagian for bagian in ((verb.group(1).upper() if verb else 'LAIN'), tabel.group(1) if tabel else '') if bagian)
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+# =============================
+# Registri Model AI
+# =============================
+#
+# Model (EasyOCR, Haar cascade wajah) tidak lagi dimuat saat import. Setiap
+# model didaftarkan dengan fungsi pemuat dan baru dimuat saat pertama
+# diminta atau saat dipanaskan di thread latar setelah server berjalan,
+# jadi dashboard bisa diakses selama model masih dimuat. Satu instance
+# dipakai bersama oleh semua pemakai dalam proses yang sama. ambil() tanpa
+# tunggu mengembalikan None selama model belum siap; pemanggil harus
+# melewati pekerjaannya (bukan menunggu) agar loop kamera tidak macet.
+
+GPU_OCR = os.environ.get('ETLE_OCR_GPU', '0') == '1'
+BAHASA_OCR = ('en',)
+PATH_CASCADE_WAJAH = 'haarcascade_frontalface_default.xml'
+
+
+class _EntriModel:
+    __slots__ = ('pemuat', 'status', 'model', 'error', 'mulai', 'durasi', 'selesai', 'diminta_belum_siap')
+
+    def __init__(self, pemuat):
+        self.pemuat = pemuat
+        self.status = 'belum'
+        self.model = None
+        self.error = None
+        self.mulai = None
+        self.durasi = None
+        self.selesai = threading.Event()
+        self.diminta_belum_siap = 0
+
+
+class RegistriModel:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entri = {}
+
+    def daftar(self, nama, pemuat):
+        with self._lock:
+            self._entri[nama] = _EntriModel(pemuat)
+
+    def _muat(self, nama, entri):
+        try:
+            model = entri.pemuat()
+        except Exception as e:
+            with self._lock:
+                entri.status, entri.error = 'gagal', repr(e)
+                entri.durasi = time.perf_counter() - entri.mulai
+            print(f"❌ Gagal memuat model {nama}: {e}")
+        else:
+            with self._lock:
+                entri.status, entri.model = 'siap', model
+                entri.durasi = time.perf_counter() - entri.mulai
+            print(f"✅ Model {nama} siap ({entri.durasi:.1f} s).")
+        finally:
+            entri.selesai.set()
+
+    def _mulai_muat(self, nama, latar, ulang_jika_gagal=False):
+        # Mengembalikan entri; memulai pemuatan jika belum pernah dimulai
+        # (atau gagal sebelumnya dan diminta mengulang).
+        with self._lock:
+            entri = self._entri[nama]
+            if entri.status != 'belum' and not (ulang_jika_gagal and entri.status == 'gagal'):
+                return entri
+            entri.status, entri.error = 'memuat', None
+            entri.selesai.clear()
+            entri.mulai = time.perf_counter()
+        print(f"⏳ Memuat model {nama}...")
+        if latar:
+            thread = threading.Thread(target=self._muat, args=(nama, entri), name=f"muat-{nama}")
+            thread.daemon = True
+            thread.start()
+        else:
+            self._muat(nama, entri)
+        return entri
+
+    def panaskan(self, *nama):
+        # Model yang gagal dimuat dicoba lagi setiap kali dipanaskan ulang.
+        for n in nama or list(self._entri):
+            self._mulai_muat(n, latar=True, ulang_jika_gagal=True)
+
+    def ambil(self, nama, tunggu=False, timeout=None):
+        # tunggu=False: None jika belum siap (pemuatan dimulai di latar).
+        # tunggu=True: blok sampai selesai (atau timeout); None jika gagal.
+        entri = self._entri[nama]
+        if entri.status == 'siap':
+            return entri.model
+        entri = self._mulai_muat(nama, latar=True)
+        if tunggu:
+            entri.selesai.wait(timeout)
+        if entri.status != 'siap':
+            with self._lock:
+                entri.diminta_belum_siap += 1
+            return None
+        return entri.model
+
+    def siap(self, nama):
+        return self._entri[nama].status == 'siap'
+
+    def status(self):
+        with self._lock:
+            return {nama: {'status': entri.status, 'error': entri.error,
+                           'durasi_muat': None if entri.durasi is None else round(entri.durasi, 2),
+                           'diminta_belum_siap': entri.diminta_belum_siap}
+                    for nama, entri in self._entri.items()}
+
+
+def _muat_ocr():
+    import easyocr
+    return easyocr.Reader(list(BAHASA_OCR), gpu=GPU_OCR)
+
+
+def _muat_wajah():
+    import cv2
+    detektor = cv2.CascadeClassifier(cv2.data.haarcascades + PATH_CASCADE_WAJAH)
+    if detektor.empty():
+        raise RuntimeError(f"cascade {PATH_CASCADE_WAJAH} tidak bisa dibaca")
+    return detektor
+
+
+registri_model = RegistriModel()
+registri_model.daftar('ocr', _muat_ocr)
+registri_model.daftar('wajah', _muat_wajah)
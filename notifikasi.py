@@ -0,0 +1,74 @@
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+
+# =============================
+# Buffer Notifikasi (ring buffer bernomor urut)
+# =============================
+#
+# Setiap notifikasi mendapat id yang terus naik. Buffer berkapasitas tetap:
+# entri tertua dibuang saat penuh, jadi memori tidak tumbuh walau tidak ada
+# yang membaca. Pembaca tidak pernah "menghabiskan" buffer; masing-masing
+# membawa kursor id terakhir sendiri (SSE Last-Event-ID atau ?since=), jadi
+# beberapa dashboard dan tab bisa membaca bersamaan. Server tidak menyimpan
+# kursor siapa pun; permintaan tanpa kursor mendapat terbaru() beserta
+# kursor untuk permintaan berikutnya.
+
+
+class BufferNotifikasi:
+    def __init__(self, kapasitas=500):
+        self._entri = deque(maxlen=kapasitas)
+        self._urutan = itertools.count(1)
+        self._id_terakhir = 0
+        self._kondisi = threading.Condition()
+        self._pendengar = set()
+
+    @property
+    def id_terakhir(self):
+        return self._id_terakhir
+
+    def tambah(self, message, status):
+        with self._kondisi:
+            entri = {'id': next(self._urutan), 'message': message, 'status': status, 'time': datetime.now().isoformat()}
+            self._entri.append(entri)
+            self._id_terakhir = entri['id']
+            self._kondisi.notify_all()
+            for fungsi in self._pendengar:
+                fungsi()
+        return entri
+
+    def _sejak(self, id_terakhir):
+        if not self._entri or id_terakhir >= self._id_terakhir:
+            return []
+        # Id berurutan tanpa celah, jadi posisi awal bisa dihitung langsung.
+        awal = max(0, id_terakhir - self._entri[0]['id'] + 1)
+        return list(itertools.islice(self._entri, awal, None))
+
+    def sejak(self, id_terakhir=0):
+        with self._kondisi:
+            return self._sejak(id_terakhir)
+
+    def terbaru(self, jumlah):
+        # (n entri terakhir, kursor) dibaca atomik, jadi entri baru tidak terlewat di antaranya.
+        with self._kondisi:
+            daftar = list(itertools.islice(self._entri, max(0, len(self._entri) - jumlah), None))
+            return daftar, self._id_terakhir
+
+    def tunggu(self, id_terakhir=0, timeout=None):
+        with self._kondisi:
+            self._kondisi.wait_for(lambda: self._id_terakhir > id_terakhir, timeout)
+            return self._sejak(id_terakhir)
+
+    def tambah_pendengar(self, fungsi):
+        with self._kondisi:
+            self._pendengar.add(fungsi)
+
+    def hapus_pendengar(self, fungsi):
+        with self._kondisi:
+            self._pendengar.discard(fungsi)
+
+    def statistik(self):
+        with self._kondisi:
+            return {'id_terakhir': self._id_terakhir, 'tersimpan': len(self._entri),
+                    'kapasitas': self._entri.maxlen, 'pendengar': len(self._pendengar)}
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+
+
+# =============================
+# Executor OCR dengan antrian terbatas per kamera
+# =============================
+#
+# Setiap kamera punya antrian sendiri berkapasitas tetap. Jika antrian penuh,
+# frame paling lama dibuang (keep-latest) sehingga latensi tetap terbatas.
+# Satu kamera hanya diproses oleh satu worker pada satu waktu agar hasil OCR
+# kembali sesuai urutan frame.
+#
+# Worker mengumpulkan frame dari semua kamera menjadi micro-batch (maksimal
+# maks_batch item, menunggu paling lama maks_tunggu detik) lalu memanggil
+# fungsi_ocr(batch) sekali, dengan batch = [(kamera_id, frame), ...].
+
+class OCRExecutor:
+    def __init__(self, fungsi_ocr, jumlah_worker=1, kapasitas_per_kamera=1,
+                 maks_batch=1, maks_tunggu=0.0, nama="ocr"):
+        self.fungsi_ocr = fungsi_ocr
+        self.kapasitas_per_kamera = max(1, kapasitas_per_kamera)
+        self.maks_batch = max(1, maks_batch)
+        self.maks_tunggu = max(0.0, maks_tunggu)
+        self.nama = nama
+        self._kondisi = threading.Condition()
+        self._antrian = {}
+        self._giliran = deque()
+        self._sedang_diproses = set()
+        self._statistik = {}
+        self._batch = {'jumlah': 0, 'item': 0, 'terbesar': 0}
+        self._pendengar = []
+        self._berhenti = False
+        self._workers = []
+        for i in range(max(1, jumlah_worker)):
+            worker = threading.Thread(target=self._loop_worker, name=f"{nama}-worker-{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def _stat(self, kamera_id):
+        stat = self._statistik.get(kamera_id)
+        if stat is None:
+            stat = {'diterima': 0, 'dibuang': 0, 'selesai': 0, 'gagal': 0,
+                    'tunggu_terakhir': 0.0, 'proses_terakhir': 0.0}
+            self._statistik[kamera_id] = stat
+        return stat
+
+    def submit(self, kamera_id, frame):
+        with self._kondisi:
+            if self._berhenti:
+                return False
+            antrian = self._antrian.get(kamera_id)
+            if antrian is None:
+                antrian = self._antrian[kamera_id] = deque()
+                self._giliran.append(kamera_id)
+            stat = self._stat(kamera_id)
+            stat['diterima'] += 1
+            while len(antrian) >= self.kapasitas_per_kamera:
+                antrian.popleft()
+                stat['dibuang'] += 1
+            antrian.append((frame, time.time()))
+            self._kondisi.notify()
+        return True
+
+    def kosongkan(self, kamera_id=None):
+        with self._kondisi:
+            target = list(self._antrian) if kamera_id is None else [kamera_id]
+            for cam_id in target:
+                antrian = self._antrian.get(cam_id)
+                if antrian:
+                    self._stat(cam_id)['dibuang'] += len(antrian)
+                    antrian.clear()
+
+    def _ambil_tugas(self, milik_sendiri=()):
+        # Round-robin antar kamera, lewati kamera yang sedang diproses worker lain.
+        for _ in range(len(self._giliran)):
+            kamera_id = self._giliran[0]
+            self._giliran.rotate(-1)
+            antrian = self._antrian[kamera_id]
+            if antrian and (kamera_id not in self._sedang_diproses or kamera_id in milik_sendiri):
+                frame, waktu_masuk = antrian.popleft()
+                return kamera_id, frame, waktu_masuk
+        return None
+
+    def _kumpulkan_batch(self):
+        # Dipanggil dengan self._kondisi terkunci.
+        tugas = self._ambil_tugas()
+        while tugas is None and not self._berhenti:
+            self._kondisi.wait()
+            tugas = self._ambil_tugas()
+        if tugas is None:
+            return []
+
+        batch = [tugas]
+        kamera_batch = {tugas[0]}
+        self._sedang_diproses.add(tugas[0])
+        batas_waktu = time.time() + self.maks_tunggu
+        while len(batch) < self.maks_batch and not self._berhenti:
+            tugas = self._ambil_tugas(kamera_batch)
+            if tugas is not None:
+                batch.append(tugas)
+                kamera_batch.add(tugas[0])
+                self._sedang_diproses.add(tugas[0])
+                continue
+            sisa = batas_waktu - time.time()
+            if sisa <= 0:
+                break
+            self._kondisi.wait(sisa)
+        return batch
+
+    def _loop_worker(self):
+        while True:
+            with self._kondisi:
+                batch = self._kumpulkan_batch()
+                if not batch:
+                    return
+
+            mulai = time.time()
+            berhasil = True
+            try:
+                self.fungsi_ocr([(kamera_id, frame) for kamera_id, frame, _ in batch])
+            except Exception as e:
+                berhasil = False
+                kamera = sorted({kamera_id for kamera_id, _, _ in batch})
+                print(f"Error di worker {self.nama} (CAM {kamera}): {e}")
+            finally:
+                selesai = time.time()
+                with self._kondisi:
+                    self._batch['jumlah'] += 1
+                    self._batch['item'] += len(batch)
+                    self._batch['terbesar'] = max(self._batch['terbesar'], len(batch))
+                    for kamera_id, _, waktu_masuk in batch:
+                        self._sedang_diproses.discard(kamera_id)
+                        stat = self._stat(kamera_id)
+                        stat['selesai' if berhasil else 'gagal'] += 1
+                        stat['tunggu_terakhir'] = round(mulai - waktu_masuk, 3)
+                        stat['proses_terakhir'] = round(selesai - mulai, 3)
+                    self._kondisi.notify_all()
+            for fungsi in self._pendengar:
+                fungsi([(kamera_id, waktu_masuk) for kamera_id, _, waktu_masuk in batch], mulai, selesai, berhasil)
+
+    def tambah_pendengar(self, fungsi):
+        # fungsi([(kamera_id, waktu_masuk), ...], mulai, selesai, berhasil) setelah setiap batch.
+        self._pendengar.append(fungsi)
+
+    def tunggu_kosong(self, kamera_id=None, timeout=None):
+        # Menunggu sampai antrian (satu kamera atau semua) kosong dan tidak ada yang sedang diproses.
+        def kosong():
+            if kamera_id is None:
+                return not self._sedang_diproses and not any(self._antrian.values())
+            return kamera_id not in self._sedang_diproses and not self._antrian.get(kamera_id)
+        with self._kondisi:
+            return self._kondisi.wait_for(kosong, timeout)
+
+    def statistik(self):
+        with self._kondisi:
+            per_kamera = {}
+            for kamera_id, stat in self._statistik.items():
+                data = dict(stat)
+                data['kedalaman'] = len(self._antrian.get(kamera_id, ()))
+                data['sedang_diproses'] = kamera_id in self._sedang_diproses
+                per_kamera[kamera_id] = data
+            return {
+                'worker': len(self._workers),
+                'kapasitas_per_kamera': self.kapasitas_per_kamera,
+                'maks_batch': self.maks_batch,
+                'batch_dijalankan': self._batch['jumlah'],
+                'rata_rata_ukuran_batch': round(self._batch['item'] / self._batch['jumlah'], 2) if self._batch['jumlah'] else 0,
+                'batch_terbesar': self._batch['terbesar'],
+                'kedalaman_total': sum(len(a) for a in self._antrian.values()),
+                'dibuang_total': sum(s['dibuang'] for s in self._statistik.values()),
+                'kamera': per_kamera,
+            }
+
+    def hentikan(self, timeout=None):
+        with self._kondisi:
+            self._berhenti = True
+            for antrian in self._antrian.values():
+                antrian.clear()
+            self._kondisi.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
@@ -0,0 +1,275 @@
+import atexit
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ocr_worker import kirim, terima
+
+# =============================
+# Backend OCR berbasis proses
+# =============================
+#
+# N proses worker, masing-masing memuat model EasyOCR sendiri, sehingga OCR
+# tidak berebut GIL dengan loop kamera dan streaming. Frame dikirim lewat
+# slot di satu blok shared memory (ring slot), bukan di-pickle; yang kembali
+# hanya tuple (bbox, teks, conf) per frame.
+#
+# Worker dijalankan dari skrip sendiri (ocr_worker.py) lewat subprocess,
+# bukan spawn multiprocessing: spawn mengimpor ulang skrip utama di anak,
+# yang untuk app.py berarti pool DB, ingest, penjadwal, dan pemuatan state
+# ikut berjalan di setiap worker. Pesan dikirim lewat stdin/stdout worker.
+#
+# Setiap worker mengerjakan satu tugas sekaligus dan tugas dikirim hanya
+# ke worker yang siap dan menganggur, jadi induk selalu tahu tugas mana
+# yang sedang dikerjakan worker mana. Satu thread per worker membaca
+# hasilnya; stdout yang tertutup berarti worker mati (crash, OOM-kill):
+# tugasnya langsung digagalkan dan worker diganti dengan proses baru,
+# jadi pemanggil baca_batch() tidak menunggu selamanya. Slot milik tugas
+# yang timeout ditahan sampai hasil terlambatnya tiba atau workernya mati,
+# baru dikembalikan ke ring.
+
+PATH_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_worker.py')
+JEDA_MULAI_ULANG_WORKER = 5.0
+
+
+class _Worker:
+    __slots__ = ('indeks', 'proses', 'lock_kirim', 'siap', 'tugas', 'waktu_mulai')
+
+    def __init__(self, indeks):
+        self.indeks = indeks
+        self.proses = None
+        self.lock_kirim = threading.Lock()
+        self.siap = False
+        # Id tugas yang sedang dikerjakan (0 = menganggur).
+        self.tugas = 0
+        self.waktu_mulai = 0.0
+
+
+class ProsesOCRBackend:
+    def __init__(self, jumlah_proses=2, jumlah_slot=8, ukuran_slot=1920 * 1080 * 3,
+                 bahasa=('en',), gpu=False, thread_per_proses=None):
+        self.ukuran_slot = ukuran_slot
+        self._shm = shared_memory.SharedMemory(create=True, size=jumlah_slot * ukuran_slot)
+        self._slot_bebas = list(range(jumlah_slot))
+        self._kondisi_slot = threading.Condition()
+        self._jumlah_slot = jumlah_slot
+        self._id_tugas = itertools.count(1)
+        self._lock = threading.Lock()
+        # Diberi tahu setiap kali worker menjadi siap, menganggur, atau mati.
+        self._kondisi_worker = threading.Condition(self._lock)
+        self._menunggu = {}
+        # id tugas timeout -> slot yang masih ditahan.
+        self._slot_tertahan = {}
+        self._statistik = {'tugas': 0, 'frame': 0, 'frame_pickle': 0, 'gagal': 0, 'timeout': 0,
+                           'worker_mati': 0, 'worker_dimulai_ulang': 0}
+        self._berhenti = False
+        self._konfigurasi = (list(sys.path), self._shm.name, ukuran_slot, tuple(bahasa), gpu, thread_per_proses)
+
+        self._worker = [_Worker(i) for i in range(max(1, jumlah_proses))]
+        for worker in self._worker:
+            self._mulai(worker)
+            thread = threading.Thread(target=self._loop_worker, args=(worker,), name=f"ocr-proses-{worker.indeks}")
+            thread.daemon = True
+            thread.start()
+        atexit.register(self.hentikan)
+        print(f"✅ Backend OCR proses dimulai: {len(self._worker)} proses, {jumlah_slot} slot shared memory.")
+
+    def _mulai(self, worker):
+        proses = subprocess.Popen([sys.executable, PATH_WORKER], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        worker.waktu_mulai = time.monotonic()
+        with worker.lock_kirim:
+            worker.proses = proses
+            try:
+                kirim(proses.stdin, self._konfigurasi)
+            except OSError:
+                # Worker langsung mati; thread pembacanya melihat stdout tertutup.
+                pass
+        with self._lock:
+            if self._berhenti:
+                proses.kill()
+
+    def _kembalikan_slot(self, slot):
+        if slot:
+            with self._kondisi_slot:
+                self._slot_bebas.extend(slot)
+                self._kondisi_slot.notify_all()
+
+    def _selesaikan(self, id_tugas, hasil, error):
+        with self._lock:
+            menunggu = self._menunggu.pop(id_tugas, None)
+            tertahan = self._slot_tertahan.pop(id_tugas, None)
+        if menunggu is not None:
+            menunggu['hasil'] = hasil
+            menunggu['error'] = error
+            menunggu['event'].set()
+        self._kembalikan_slot(tertahan)
+
+    def _loop_worker(self, worker):
+        while True:
+            proses = worker.proses
+            try:
+                while True:
+                    jenis, isi, error = terima(proses.stdout)
+                    with self._kondisi_worker:
+                        if jenis == 'siap':
+                            worker.siap = True
+                        elif worker.tugas == jenis:
+                            worker.tugas = 0
+                        self._kondisi_worker.notify_all()
+                    if jenis != 'siap':
+                        self._selesaikan(jenis, isi, error)
+            except (EOFError, OSError, ValueError):
+                pass
+            proses.wait()
+
+            with self._kondisi_worker:
+                id_tugas, worker.tugas = worker.tugas, 0
+                if worker.siap and not self._berhenti:
+                    self._statistik['worker_mati'] += 1
+                worker.siap = False
+                masih_ditunggu = id_tugas in self._menunggu or id_tugas in self._slot_tertahan
+                self._kondisi_worker.notify_all()
+            if self._berhenti:
+                return
+            if id_tugas and masih_ditunggu:
+                print(f"⚠️ Worker OCR pid {proses.pid} mati (exitcode {proses.returncode}) saat mengerjakan tugas {id_tugas}.")
+                self._selesaikan(id_tugas, None, f"worker OCR pid {proses.pid} mati (exitcode {proses.returncode})")
+            # Jeda antar mulai ulang agar worker yang langsung gagal (mis. model rusak) tidak berputar terus.
+            time.sleep(max(0.0, worker.waktu_mulai + JEDA_MULAI_ULANG_WORKER - time.monotonic()))
+            if self._berhenti:
+                return
+            self._mulai(worker)
+            with self._lock:
+                self._statistik['worker_dimulai_ulang'] += 1
+
+    def baca_batch(self, frames, timeout=None, lewati=None):
+        if self._berhenti:
+            raise RuntimeError("Backend OCR proses sudah dihentikan")
+        frames = [np.ascontiguousarray(frame) for frame in frames]
+        muat_slot = [frame.nbytes <= self.ukuran_slot for frame in frames]
+        # Semua slot untuk satu batch diambil sekaligus agar dua batch yang
+        # berjalan bersamaan tidak saling menunggu slot (deadlock). Ring penuh
+        # = backpressure; frame yang tidak kebagian slot dikirim lewat pickle.
+        # Setelah timeout, frame yang tetap tidak kebagian slot juga dikirim lewat pickle.
+        batas = None if timeout is None else time.monotonic() + timeout
+
+        def sisa_waktu():
+            return None if batas is None else max(0.0, batas - time.monotonic())
+
+        with self._kondisi_slot:
+            butuh = min(sum(muat_slot), self._jumlah_slot)
+            while len(self._slot_bebas) < butuh:
+                sisa = sisa_waktu()
+                if sisa == 0.0:
+                    break
+                self._kondisi_slot.wait(sisa)
+            slot_dipakai = [self._slot_bebas.pop() for _ in range(min(butuh, len(self._slot_bebas)))]
+
+        deskriptor = []
+        try:
+            sisa_slot = list(slot_dipakai)
+            for frame, muat in zip(frames, muat_slot):
+                if not muat or not sisa_slot:
+                    deskriptor.append((None, frame.shape, frame.dtype.str, frame))
+                    continue
+                slot = sisa_slot.pop()
+                tujuan = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf, offset=slot * self.ukuran_slot)
+                tujuan[...] = frame
+                del tujuan
+                deskriptor.append((slot, frame.shape, frame.dtype.str, None))
+
+            id_tugas = next(self._id_tugas)
+            menunggu = {'event': threading.Event(), 'hasil': None, 'error': None}
+            with self._kondisi_worker:
+                while True:
+                    worker = next((w for w in self._worker if w.siap and not w.tugas), None)
+                    sisa = sisa_waktu()
+                    if worker is not None or self._berhenti or sisa == 0.0:
+                        break
+                    self._kondisi_worker.wait(sisa)
+                if worker is None:
+                    self._statistik['timeout'] += 1
+                    raise TimeoutError(f"Tidak ada worker OCR proses yang menganggur dalam {timeout} detik")
+                worker.tugas = id_tugas
+                self._menunggu[id_tugas] = menunggu
+                self._statistik['tugas'] += 1
+                self._statistik['frame'] += len(frames)
+                self._statistik['frame_pickle'] += sum(1 for d in deskriptor if d[0] is None)
+            try:
+                with worker.lock_kirim:
+                    kirim(worker.proses.stdin, (id_tugas, deskriptor, lewati))
+            except OSError as e:
+                with self._kondisi_worker:
+                    self._menunggu.pop(id_tugas, None)
+                    if worker.tugas == id_tugas:
+                        worker.tugas = 0
+                    self._statistik['gagal'] += 1
+                raise RuntimeError(f"OCR proses gagal: worker tidak bisa dihubungi ({e})")
+
+            if not menunggu['event'].wait(sisa_waktu()):
+                with self._lock:
+                    # Hasil bisa tiba tepat saat timeout; jika sudah, pakai saja.
+                    belum = self._menunggu.pop(id_tugas, None) is not None
+                    if belum:
+                        self._statistik['timeout'] += 1
+                        # Worker mungkin masih membaca slot: ditahan sampai hasilnya tiba atau workernya mati.
+                        self._slot_tertahan[id_tugas] = slot_dipakai
+                if belum:
+                    slot_dipakai = []
+                    raise TimeoutError(f"OCR proses tidak selesai dalam {timeout} detik")
+            if menunggu['error'] is not None:
+                with self._lock:
+                    self._statistik['gagal'] += 1
+                raise RuntimeError(f"OCR proses gagal: {menunggu['error']}")
+            return menunggu['hasil']
+        finally:
+            self._kembalikan_slot(slot_dipakai)
+
+    def siap(self):
+        # True jika setidaknya satu worker sudah memuat model.
+        with self._lock:
+            return any(worker.siap for worker in self._worker)
+
+    def statistik(self):
+        with self._lock:
+            data = dict(self._statistik)
+            data['menunggu'] = len(self._menunggu)
+            data['siap'] = sum(1 for worker in self._worker if worker.siap)
+            data['sibuk'] = sum(1 for worker in self._worker if worker.tugas)
+            data['slot_tertahan'] = sum(len(slot) for slot in self._slot_tertahan.values())
+        data['proses'] = len(self._worker)
+        data['proses_hidup'] = sum(1 for worker in self._worker if worker.proses.poll() is None)
+        data['slot_total'] = self._jumlah_slot
+        with self._kondisi_slot:
+            data['slot_bebas'] = len(self._slot_bebas)
+        return data
+
+    def hentikan(self, timeout=5):
+        with self._kondisi_worker:
+            if self._berhenti:
+                return
+            self._berhenti = True
+            self._kondisi_worker.notify_all()
+        for worker in self._worker:
+            try:
+                with worker.lock_kirim:
+                    kirim(worker.proses.stdin, None)
+                    worker.proses.stdin.close()
+            except OSError:
+                pass
+        for worker in self._worker:
+            try:
+                worker.proses.wait(timeout)
+            except subprocess.TimeoutExpired:
+                worker.proses.kill()
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
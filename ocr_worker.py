@@ -0,0 +1,107 @@
+import os
+import pickle
+import struct
+import sys
+
+# =============================
+# Entry Worker OCR Proses
+# =============================
+#
+# Skrip yang dijalankan ProsesOCRBackend sebagai proses terpisah
+# (python ocr_worker.py). Karena anak dimulai dari skrip ini, bukan lewat
+# spawn multiprocessing, skrip utama induk (app.py) tidak pernah diimpor
+# ulang di worker. Komunikasi lewat stdin/stdout anak: setiap pesan adalah
+# panjang 8 byte lalu isi pickle. stdout asli dipakai khusus untuk kanal
+# ini; print di worker dialihkan ke stderr.
+#
+# Pesan pertama dari induk berisi konfigurasi, lalu worker mengirim
+# ('siap', pid, None) setelah model dimuat. Setiap tugas
+# (id_tugas, deskriptor, lewati) dijawab (id_tugas, hasil, error); None
+# atau stdin tertutup menghentikan worker.
+
+_KEPALA = struct.Struct('>Q')
+
+
+def kirim(berkas, pesan):
+    data = pickle.dumps(pesan, protocol=pickle.HIGHEST_PROTOCOL)
+    berkas.write(_KEPALA.pack(len(data)))
+    berkas.write(data)
+    berkas.flush()
+
+
+def _baca_persis(berkas, jumlah):
+    data = berkas.read(jumlah)
+    if len(data) < jumlah:
+        raise EOFError("kanal worker OCR tertutup")
+    return data
+
+
+def terima(berkas):
+    (panjang,) = _KEPALA.unpack(_baca_persis(berkas, _KEPALA.size))
+    return pickle.loads(_baca_persis(berkas, panjang))
+
+
+def _buka_shm(nama):
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=nama, track=False)
+    except TypeError:
+        # Python < 3.13: resource tracker milik worker akan menghapus blok induk saat worker keluar.
+        shm = shared_memory.SharedMemory(name=nama)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def jalankan(masuk, keluar):
+    sys_path, nama_shm, ukuran_slot, bahasa, gpu, thread_per_proses = terima(masuk)
+    sys.path[:] = sys_path
+
+    import numpy as np
+    import easyocr
+    from lokalisasi_plat import baca_plat_batch
+
+    if thread_per_proses:
+        try:
+            import torch
+            torch.set_num_threads(thread_per_proses)
+        except ImportError:
+            pass
+
+    shm = _buka_shm(nama_shm)
+    try:
+        pembaca_ocr = easyocr.Reader(list(bahasa), gpu=gpu)
+        kirim(keluar, ('siap', os.getpid(), None))
+        while True:
+            try:
+                tugas = terima(masuk)
+            except EOFError:
+                break
+            if tugas is None:
+                break
+            id_tugas, deskriptor, lewati = tugas
+            try:
+                frames = []
+                for (slot, bentuk, tipe, frame_pickle) in deskriptor:
+                    if frame_pickle is not None:
+                        frames.append(frame_pickle)
+                    else:
+                        frames.append(np.ndarray(bentuk, dtype=np.dtype(tipe), buffer=shm.buf, offset=slot * ukuran_slot))
+                hasil = [[([[float(px), float(py)] for (px, py) in bbox], str(teks), float(conf))
+                          for (bbox, teks, conf) in hasil_frame]
+                         for hasil_frame in baca_plat_batch(pembaca_ocr, frames, lewati=lewati)]
+                del frames
+                kirim(keluar, (id_tugas, hasil, None))
+            except Exception as e:
+                kirim(keluar, (id_tugas, None, repr(e)))
+    finally:
+        shm.close()
+
+
+if __name__ == '__main__':
+    # stdout asli menjadi kanal hasil; print (termasuk dari EasyOCR) diarahkan ke stderr.
+    kanal_keluar = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    jalankan(sys.stdin.buffer, kanal_keluar)
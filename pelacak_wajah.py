@@ -0,0 +1,166 @@
+import threading
+
+import cv2
+
+from gerak import PemicuOCR
+from lokalisasi_plat import iou
+
+# =============================
+# Deteksi Wajah Cepat + Pelacak IoU
+# =============================
+#
+# detectMultiScale penuh di setiap frame adalah langkah termahal kamera
+# wajah. Di sini Haar cascade dijalankan pada frame grayscale yang
+# diperkecil ke lebar_deteksi, dan hanya setiap setiap_n frame, atau segera
+# saat gerak muncul di adegan yang belum punya jejak (orang baru masuk).
+# Di antara dua deteksi, kotak dibawa maju oleh pelacak IoU dengan prediksi
+# kecepatan konstan. Setiap jejak diberi id; pemanggil menyimpan wajah
+# sekali per jejak (saat jejak terkonfirmasi), bukan per timer.
+#
+# Kamera di repo ini menangkap 640 px, jadi LEBAR_DETEKSI_WAJAH 320 berarti
+# cascade bekerja di setengah resolusi (seperempat piksel). Wajah terkecil
+# yang masih terdeteksi kira-kira 24 / skala piksel (jendela minimum
+# cascade), sekitar 48 px di frame 640; naikkan lebar_deteksi jika wajah di
+# adegan lebih kecil dari itu.
+
+LEBAR_DETEKSI_WAJAH = 320
+DETEKSI_SETIAP_N = 5
+SCALE_FACTOR_WAJAH = 1.1
+MIN_NEIGHBORS_WAJAH = 5
+UKURAN_MIN_WAJAH = 30
+AMBANG_IOU_JEJAK = 0.3
+MAKS_HILANG_DETEKSI = 2
+MIN_DETEKSI_JEJAK = 2
+AMBANG_AREA_GERAK_WAJAH = 0.005
+
+
+class JejakWajah:
+    __slots__ = ('id', 'kotak', 'terakhir', 'kecepatan', 'jumlah_deteksi', 'hilang', 'umur', 'sejak_deteksi', 'tersimpan')
+
+    def __init__(self, id_jejak, kotak):
+        self.id = id_jejak
+        self.kotak = kotak
+        # Kotak deteksi terakhir (bukan prediksi), dasar estimasi kecepatan.
+        self.terakhir = kotak
+        self.kecepatan = (0.0, 0.0)
+        self.jumlah_deteksi = 1
+        self.hilang = 0
+        self.umur = 0
+        self.sejak_deteksi = 0
+        self.tersimpan = False
+
+    def terkonfirmasi(self, min_deteksi=MIN_DETEKSI_JEJAK):
+        return self.jumlah_deteksi >= min_deteksi
+
+
+class PelacakIoU:
+    def __init__(self, ambang_iou=AMBANG_IOU_JEJAK, maks_hilang=MAKS_HILANG_DETEKSI):
+        self.ambang_iou = ambang_iou
+        self.maks_hilang = maks_hilang
+        self.jejak = []
+        self._id_berikutnya = 1
+
+    def prediksi(self):
+        # Dipanggil sekali per frame sebelum perbarui(): kotak digeser sesuai kecepatan per frame.
+        for jejak in self.jejak:
+            x, y, w, h = jejak.kotak
+            vx, vy = jejak.kecepatan
+            jejak.kotak = (x + vx, y + vy, w, h)
+            jejak.umur += 1
+            jejak.sejak_deteksi += 1
+        return self.jejak
+
+    def perbarui(self, kotak_deteksi):
+        # Pasangkan deteksi ke jejak secara greedy (IoU terbesar dulu); sisanya jadi jejak baru.
+        # Mengembalikan daftar jejak yang baru dibuat.
+        pasangan = sorted(((iou(jejak.kotak, kotak), i, j) for i, jejak in enumerate(self.jejak)
+                           for j, kotak in enumerate(kotak_deteksi)), reverse=True)
+        jejak_dipakai, deteksi_dipakai = set(), set()
+        for nilai, i, j in pasangan:
+            if nilai < self.ambang_iou:
+                break
+            if i in jejak_dipakai or j in deteksi_dipakai:
+                continue
+            jejak_dipakai.add(i)
+            deteksi_dipakai.add(j)
+            jejak = self.jejak[i]
+            kotak = tuple(kotak_deteksi[j])
+            jarak = max(1, jejak.sejak_deteksi)
+            jejak.kecepatan = ((kotak[0] - jejak.terakhir[0]) / jarak, (kotak[1] - jejak.terakhir[1]) / jarak)
+            jejak.kotak = jejak.terakhir = kotak
+            jejak.sejak_deteksi = 0
+            jejak.jumlah_deteksi += 1
+            jejak.hilang = 0
+
+        for i, jejak in enumerate(self.jejak):
+            if i not in jejak_dipakai:
+                jejak.hilang += 1
+        self.jejak = [jejak for jejak in self.jejak if jejak.hilang <= self.maks_hilang]
+
+        baru = []
+        for j, kotak in enumerate(kotak_deteksi):
+            if j not in deteksi_dipakai:
+                jejak = JejakWajah(self._id_berikutnya, tuple(kotak))
+                self._id_berikutnya += 1
+                self.jejak.append(jejak)
+                baru.append(jejak)
+        return baru
+
+
+class DetektorWajahCepat:
+    def __init__(self, lebar_deteksi=LEBAR_DETEKSI_WAJAH, setiap_n=DETEKSI_SETIAP_N, scale_factor=SCALE_FACTOR_WAJAH,
+                 min_neighbors=MIN_NEIGHBORS_WAJAH, ukuran_min=UKURAN_MIN_WAJAH, ambang_area_gerak=AMBANG_AREA_GERAK_WAJAH,
+                 pelacak=None):
+        self.lebar_deteksi = lebar_deteksi
+        self.setiap_n = max(1, setiap_n)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.ukuran_min = ukuran_min
+        self.ambang_area_gerak = ambang_area_gerak
+        self.pelacak = pelacak or PelacakIoU()
+        # Hanya model latar PemicuOCR yang dipakai (luas_gerak), bukan logika pemicunya.
+        self._gerak = PemicuOCR()
+        self._sejak_deteksi = None
+        self._bergerak = False
+        self._lock = threading.Lock()
+        self._statistik = {'frame_dianalisis': 0, 'deteksi_dijalankan': 0, 'dipicu_gerak': 0, 'jejak_dibuat': 0}
+
+    def _deteksi(self, detektor, frame):
+        skala = min(1.0, self.lebar_deteksi / float(frame.shape[1]))
+        kecil = frame
+        if skala < 1.0:
+            kecil = cv2.resize(frame, (self.lebar_deteksi, max(1, int(frame.shape[0] * skala))), interpolation=cv2.INTER_AREA)
+        abu = kecil if kecil.ndim == 2 else cv2.cvtColor(kecil, cv2.COLOR_BGR2GRAY)
+        ukuran_min = max(1, int(round(self.ukuran_min * skala)))
+        kotak = detektor.detectMultiScale(abu, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+                                          minSize=(ukuran_min, ukuran_min))
+        return [(int(x / skala), int(y / skala), int(w / skala), int(h / skala)) for (x, y, w, h) in kotak]
+
+    def proses(self, detektor, frame):
+        # Mengembalikan (jejak_aktif, jejak_baru, deteksi_dijalankan).
+        # Deteksi dijalankan setiap setiap_n frame, atau di frame pertama gerak
+        # muncul saat belum ada jejak (tidak perlu menunggu giliran berikutnya).
+        bergerak = self._gerak.luas_gerak(frame) >= self.ambang_area_gerak
+        gerak_baru = bergerak and not self._bergerak and not self.pelacak.jejak
+        self._bergerak = bergerak
+
+        self.pelacak.prediksi()
+        jalankan = self._sejak_deteksi is None or self._sejak_deteksi + 1 >= self.setiap_n or gerak_baru
+        baru = []
+        if jalankan:
+            baru = self.pelacak.perbarui(self._deteksi(detektor, frame))
+            self._sejak_deteksi = 0
+        else:
+            self._sejak_deteksi += 1
+
+        with self._lock:
+            self._statistik['frame_dianalisis'] += 1
+            if jalankan:
+                self._statistik['deteksi_dijalankan'] += 1
+                self._statistik['dipicu_gerak'] += int(gerak_baru)
+                self._statistik['jejak_dibuat'] += len(baru)
+        return self.pelacak.jejak, baru, jalankan
+
+    def statistik(self):
+        with self._lock:
+            return dict(self._statistik)
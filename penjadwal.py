@@ -0,0 +1,104 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+# =============================
+# Penjadwal Tenggat (timer heap)
+# =============================
+#
+# Satu thread yang tidur sampai tenggat terdekat, lalu menjalankan tugasnya.
+# Tugas bisa diberi kunci: menjadwalkan ulang kunci yang sama menggantikan
+# jadwal lama (dipakai untuk tenggat checkpoint per perjalanan), dan kunci
+# bisa dibatalkan. Entri lama ditandai tidak aktif lalu dibuang saat muncul
+# di puncak heap.
+
+
+class Penjadwal:
+    def __init__(self, nama="penjadwal"):
+        self.nama = nama
+        self._heap = []
+        self._per_kunci = {}
+        self._urutan = itertools.count()
+        self._kondisi = threading.Condition()
+        self._berhenti = False
+        self._statistik = {'dijalankan': 0, 'gagal': 0, 'dibatalkan': 0, 'terlambat_maks': 0.0}
+        self._thread = threading.Thread(target=self._loop, name=nama)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def jadwalkan(self, tunda_detik, fungsi, *args, kunci=None):
+        waktu = time.monotonic() + max(0.0, tunda_detik)
+        entri = [waktu, next(self._urutan), kunci, fungsi, args, True]
+        with self._kondisi:
+            if kunci is not None:
+                lama = self._per_kunci.pop(kunci, None)
+                if lama is not None:
+                    lama[5] = False
+                self._per_kunci[kunci] = entri
+            heapq.heappush(self._heap, entri)
+            self._kondisi.notify()
+        return entri
+
+    def jadwalkan_pada(self, waktu, fungsi, *args, kunci=None):
+        return self.jadwalkan((waktu - datetime.now()).total_seconds(), fungsi, *args, kunci=kunci)
+
+    def batalkan(self, kunci):
+        with self._kondisi:
+            entri = self._per_kunci.pop(kunci, None)
+            if entri is not None:
+                entri[5] = False
+                self._statistik['dibatalkan'] += 1
+                return True
+        return False
+
+    def batalkan_jika(self, predikat):
+        with self._kondisi:
+            for kunci in [k for k in self._per_kunci if predikat(k)]:
+                self._per_kunci.pop(kunci)[5] = False
+                self._statistik['dibatalkan'] += 1
+
+    def _loop(self):
+        while True:
+            with self._kondisi:
+                while not self._berhenti:
+                    while self._heap and not self._heap[0][5]:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._kondisi.wait()
+                        continue
+                    sisa = self._heap[0][0] - time.monotonic()
+                    if sisa <= 0:
+                        break
+                    self._kondisi.wait(sisa)
+                if self._berhenti:
+                    return
+                entri = heapq.heappop(self._heap)
+                entri[5] = False
+                if entri[2] is not None and self._per_kunci.get(entri[2]) is entri:
+                    del self._per_kunci[entri[2]]
+                self._statistik['terlambat_maks'] = max(self._statistik['terlambat_maks'], time.monotonic() - entri[0])
+
+            try:
+                entri[3](*entri[4])
+                berhasil = True
+            except Exception as e:
+                berhasil = False
+                print(f"Error di {self.nama}: {e}")
+            with self._kondisi:
+                self._statistik['dijalankan' if berhasil else 'gagal'] += 1
+
+    def statistik(self):
+        with self._kondisi:
+            data = dict(self._statistik)
+            data['terlambat_maks'] = round(data['terlambat_maks'], 3)
+            data['terjadwal'] = sum(1 for e in self._heap if e[5])
+            data['berkunci'] = len(self._per_kunci)
+            return data
+
+    def hentikan(self, timeout=None):
+        with self._kondisi:
+            self._berhenti = True
+            self._kondisi.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,172 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+
+# =============================
+# Penyiar Frame MJPEG (fan-out)
+# =============================
+#
+# Satu slot "frame terbaru" bernomor versi per kamera. Thread kamera cukup
+# menaruh referensi frame mentah; encode JPEG baru dilakukan saat ada
+# pelanggan yang meminta versi tersebut, dan hasilnya dipakai bersama oleh
+# semua pelanggan. Pelanggan tidur di condition variable sampai versi baru
+# datang, jadi CPU sebanding dengan jumlah penonton dan perubahan frame.
+# Pendengar (mis. event loop asyncio) bisa didaftarkan untuk dibangunkan
+# setiap kali versi baru terbit. pengamat_encode(durasi) dipanggil setelah
+# setiap encode JPEG (untuk metrik). Kualitas JPEG PusatPenyiar boleh berupa
+# fungsi kamera_id -> kualitas agar setiap kamera punya pengaturan sendiri.
+
+
+class PenyiarFrame:
+    def __init__(self, kualitas_jpeg=None, pengamat_encode=None):
+        self.pengamat_encode = pengamat_encode
+        self._parameter_encode = [cv2.IMWRITE_JPEG_QUALITY, int(kualitas_jpeg)] if kualitas_jpeg else []
+        self._kondisi = threading.Condition()
+        self._lock_encode = threading.Lock()
+        self._versi = 0
+        self._frame = None
+        self._jpeg = None
+        self._versi_jpeg = -1
+        self._pelanggan = 0
+        self._pendengar = set()
+        self._statistik = {'frame_masuk': 0, 'encode': 0, 'frame_terkirim': 0}
+
+    def ada_pelanggan(self):
+        return self._pelanggan > 0
+
+    def terbitkan(self, frame):
+        with self._kondisi:
+            self._frame = frame
+            self._versi += 1
+            self._statistik['frame_masuk'] += 1
+            if self._pelanggan:
+                self._kondisi.notify_all()
+            self._bangunkan_pendengar()
+
+    def terbitkan_jpeg(self, jpeg):
+        with self._kondisi:
+            self._frame = None
+            self._versi += 1
+            self._jpeg = jpeg
+            self._versi_jpeg = self._versi
+            self._kondisi.notify_all()
+            self._bangunkan_pendengar()
+
+    def kosongkan(self):
+        with self._kondisi:
+            self._frame = None
+            self._jpeg = None
+            self._versi += 1
+            self._kondisi.notify_all()
+            self._bangunkan_pendengar()
+
+    def tambah_pendengar(self, fungsi):
+        with self._kondisi:
+            self._pendengar.add(fungsi)
+
+    def hapus_pendengar(self, fungsi):
+        with self._kondisi:
+            self._pendengar.discard(fungsi)
+
+    def _bangunkan_pendengar(self):
+        # Dipanggil dengan _kondisi terpegang; pendengar harus cepat dan tidak memblokir.
+        for fungsi in self._pendengar:
+            fungsi()
+
+    @contextmanager
+    def langganan(self):
+        with self._kondisi:
+            self._pelanggan += 1
+        try:
+            yield self
+        finally:
+            with self._kondisi:
+                self._pelanggan -= 1
+
+    def tunggu(self, versi_terakhir=0, timeout=None):
+        # Mengembalikan (versi, jpeg); jpeg None jika slot kosong.
+        with self._kondisi:
+            self._kondisi.wait_for(lambda: self._versi != versi_terakhir, timeout)
+            versi = self._versi
+            if self._versi_jpeg == versi:
+                self._statistik['frame_terkirim'] += 1
+                return versi, self._jpeg
+            frame = self._frame
+
+        return versi, self._encode(versi, frame)
+
+    def ambil_tersimpan(self):
+        # Versi terbaru tanpa menunggu dan tanpa encode: (versi, jpeg, perlu_encode).
+        with self._kondisi:
+            if self._versi_jpeg == self._versi:
+                self._statistik['frame_terkirim'] += 1
+                return self._versi, self._jpeg, False
+            return self._versi, None, self._frame is not None
+
+    def encode_terbaru(self):
+        with self._kondisi:
+            versi, frame = self._versi, self._frame
+        return versi, self._encode(versi, frame)
+
+    def _encode(self, versi, frame):
+        if frame is None:
+            return None
+        with self._lock_encode:
+            # Pelanggan lain mungkin sudah meng-encode versi ini selama kita menunggu lock.
+            with self._kondisi:
+                if self._versi_jpeg == versi:
+                    self._statistik['frame_terkirim'] += 1
+                    return self._jpeg
+            mulai = time.perf_counter()
+            ok, buffer = cv2.imencode('.jpg', frame, self._parameter_encode)
+            jpeg = buffer.tobytes() if ok else None
+            if self.pengamat_encode is not None:
+                self.pengamat_encode(time.perf_counter() - mulai)
+            with self._kondisi:
+                self._statistik['encode'] += 1
+                self._statistik['frame_terkirim'] += 1
+                if self._versi == versi:
+                    self._jpeg = jpeg
+                    self._versi_jpeg = versi
+        return jpeg
+
+    def statistik(self):
+        with self._kondisi:
+            data = dict(self._statistik)
+            data['versi'] = self._versi
+            data['pelanggan'] = self._pelanggan
+            return data
+
+
+class PusatPenyiar:
+    def __init__(self, kualitas_jpeg=None, pengamat_encode=None):
+        # pengamat_encode(kamera_id, durasi)
+        self.kualitas_jpeg = kualitas_jpeg
+        self.pengamat_encode = pengamat_encode
+        self._lock = threading.Lock()
+        self._penyiar = {}
+
+    def ambil(self, kamera_id):
+        with self._lock:
+            penyiar = self._penyiar.get(kamera_id)
+            if penyiar is None:
+                kualitas = self.kualitas_jpeg(kamera_id) if callable(self.kualitas_jpeg) else self.kualitas_jpeg
+                pengamat = None
+                if self.pengamat_encode is not None:
+                    pengamat = lambda durasi: self.pengamat_encode(kamera_id, durasi)
+                penyiar = self._penyiar[kamera_id] = PenyiarFrame(kualitas, pengamat)
+            return penyiar
+
+    def kosongkan(self, kamera_id=None):
+        with self._lock:
+            daftar = list(self._penyiar.values()) if kamera_id is None else [self._penyiar.get(kamera_id)]
+        for penyiar in daftar:
+            if penyiar is not None:
+                penyiar.kosongkan()
+
+    def statistik(self):
+        with self._lock:
+            daftar = list(self._penyiar.items())
+        return {kamera_id: penyiar.statistik() for kamera_id, penyiar in daftar}
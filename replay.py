@@ -0,0 +1,405 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from database import buat_database
+from sumber_video import CatatanSumber, SumberReplay
+
+# =============================
+# Replay & Benchmark Pipeline
+# =============================
+#
+# Menjalankan pipeline app.py yang sebenarnya (kamera -> pemicu gerak -> OCR
+# -> voting -> proses_deteksi -> database) terhadap rekaman, dengan SQLite
+# sementara sebagai pengganti MySQL. Setiap kamera KAMERA_SETUP dipetakan ke
+# file video atau folder gambar. Perjalanan dibuat dari file ground truth
+# lewat route Flask biasa, lalu laporan benchmark dicetak: fps per kamera,
+# latensi OCR p50/p95/p99, waktu dari kemunculan pertama kendaraan sampai
+# deteksi tercatat, jumlah query DB per deteksi, dan akurasi plat.
+#
+# Format ground truth (JSON):
+#   {"perjalanan": [{"nama": "Budi", "plat": "B1234XYZ", "tujuan": "Masjid"}],
+#    "kemunculan": [{"kamera": 1, "plat": "B1234XYZ", "frame": 12}]}
+#
+# Contoh:
+#   python replay.py --kamera 1=rekaman/cam1.mp4 --kamera 2=rekaman/cam2/ \
+#       --ground-truth rekaman/gt.json --pacing cepat --output laporan.json
+#   python replay.py ... --pembanding laporan_lama.json   (exit 1 jika regresi)
+
+INTERVAL_CEK_DETIK = 0.2
+BATAS_MUAT_MODEL_DETIK = 300
+BATAS_CONTOH = 20
+
+
+def persentil(data, p):
+    if not data:
+        return None
+    urut = sorted(data)
+    posisi = (len(urut) - 1) * p / 100.0
+    bawah = int(posisi)
+    atas = min(bawah + 1, len(urut) - 1)
+    return urut[bawah] + (urut[atas] - urut[bawah]) * (posisi - bawah)
+
+
+def ringkas_latensi(data_detik):
+    if not data_detik:
+        return {'n': 0}
+    hasil = {'n': len(data_detik)}
+    for nama, p in (('p50', 50), ('p95', 95), ('p99', 99)):
+        hasil[nama + '_ms'] = round(persentil(data_detik, p) * 1000, 1)
+    hasil['maks_ms'] = round(max(data_detik) * 1000, 1)
+    return hasil
+
+
+def parse_kamera(nilai):
+    kamera, _, path = nilai.partition('=')
+    if not path or not kamera.strip().isdigit():
+        raise argparse.ArgumentTypeError(f"format --kamera harus ID=PATH, bukan '{nilai}'")
+    return int(kamera), path
+
+
+class PengukurReplay:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latensi_ocr = []
+        self.proses_ocr = []
+        self.ukuran_batch = []
+        self.query = 0
+        self.waktu_query = 0.0
+        self.aktivitas_terakhir = time.time()
+        self.mengukur_query = False
+
+    def catat_batch(self, item, mulai, selesai, berhasil):
+        with self._lock:
+            self.proses_ocr.append(selesai - mulai)
+            self.ukuran_batch.append(len(item))
+            self.latensi_ocr.extend(selesai - waktu_masuk for _, waktu_masuk in item)
+            self.aktivitas_terakhir = time.time()
+
+    def catat_query(self, sql, durasi):
+        with self._lock:
+            if self.mengukur_query:
+                self.query += 1
+                self.waktu_query += durasi
+            self.aktivitas_terakhir = time.time()
+
+
+def siapkan_database(path):
+    # File baru: buat_database() langsung mengisinya dengan skema etle_system.sql.
+    buat_database('sqlite', path_sqlite=path, ukuran_pool=1).tutup()
+
+
+def muat_ground_truth(path):
+    if not path:
+        return {'perjalanan': [], 'kemunculan': []}
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data.setdefault('perjalanan', [])
+    data.setdefault('kemunculan', [])
+    return data
+
+
+def jalankan(args):
+    folder_kerja = tempfile.mkdtemp(prefix='etle_replay_')
+    path_db = os.path.join(folder_kerja, 'replay.db')
+    folder_kosong = os.path.join(folder_kerja, 'kamera_kosong')
+    os.makedirs(folder_kosong)
+    siapkan_database(path_db)
+
+    # Konfigurasi dibaca app.py saat import, jadi harus diisi sebelum import.
+    os.environ['ETLE_DB_BACKEND'] = 'sqlite'
+    os.environ['ETLE_DB_SQLITE_PATH'] = path_db
+    os.environ['ETLE_JURNAL_INGEST'] = os.path.join(folder_kerja, 'ingest_jurnal.ndjson')
+    os.environ['ETLE_FOLDER_BUKTI'] = args.folder_bukti or os.path.join(folder_kerja, 'bukti')
+    import app as etle
+
+    # Model dimuat dulu agar waktu muat tidak tercampur ke latensi deteksi.
+    etle.panaskan_model()
+    if etle.OCR_BACKEND == 'proses':
+        # Batch OCR dilewati sampai worker siap, jadi tunggu model termuat di salah satu worker.
+        backend = etle.ambil_backend_ocr_proses()
+        batas_muat = time.monotonic() + BATAS_MUAT_MODEL_DETIK
+        while not backend.siap():
+            if time.monotonic() > batas_muat:
+                raise SystemExit("❌ Worker OCR proses tidak siap, replay dibatalkan.")
+            time.sleep(INTERVAL_CEK_DETIK)
+    elif etle.registri_model.ambil('ocr', tunggu=True) is None:
+        raise SystemExit("❌ Model OCR gagal dimuat, replay dibatalkan.")
+
+    ground_truth = muat_ground_truth(args.ground_truth)
+    pengukur = PengukurReplay()
+    peta_kamera = dict(args.kamera)
+    catatan = {kamera_id: CatatanSumber() for kamera_id in peta_kamera}
+    sumber = {}
+    cepat = args.pacing == 'cepat'
+
+    etle.PACING_REPLAY = args.pacing
+    etle.JEDA_DEMO_DETIK = args.jeda_demo
+    if cepat:
+        etle.JEDA_LOOP_KAMERA = 0
+
+    def pembuka(kamera_id):
+        def tunggu_ocr():
+            etle.ocr_executor.tunggu_kosong(kamera_id, timeout=args.batas_tunggu_ocr)
+
+        def buka():
+            if kamera_id not in peta_kamera:
+                return SumberReplay(folder_kosong)
+            sumber[kamera_id] = SumberReplay(peta_kamera[kamera_id], pacing=args.pacing, fps=args.fps,
+                                             waktu_mulai=waktu_mulai, catatan=catatan[kamera_id],
+                                             sebelum_baca=tunggu_ocr if cepat and not args.tanpa_sinkron else None)
+            return sumber[kamera_id]
+        return buka
+
+    etle.KAMERA_SETUP = {kamera_id: pembuka(kamera_id) for kamera_id in set(etle.KAMERA_SETUP) | set(peta_kamera)}
+    etle.ocr_executor.tambah_pendengar(pengukur.catat_batch)
+    etle.db.tambah_pendengar_query(pengukur.catat_query)
+
+    klien = etle.app.test_client()
+    with klien.session_transaction() as sesi:
+        sesi['logged_in'] = True
+
+    print(f"▶️  Replay {len(peta_kamera)} kamera, pacing {args.pacing}, folder kerja {folder_kerja}")
+    waktu_mulai = time.time()
+    klien.get('/start_detection')
+    for perjalanan in ground_truth['perjalanan']:
+        klien.post('/tambah_tujuan', data={'nama_pengunjung': perjalanan.get('nama', 'Replay'),
+                                           'nomor_plat': perjalanan['plat'], 'lokasi_tujuan': perjalanan['tujuan']})
+    with pengukur._lock:
+        pengukur.mengukur_query = True
+
+    alasan = 'timeout'
+    while time.time() - waktu_mulai < args.timeout:
+        time.sleep(INTERVAL_CEK_DETIK)
+        dibuka = [c for c in catatan.values() if c.dibuka]
+        with pengukur._lock:
+            aktivitas = pengukur.aktivitas_terakhir
+        for c in dibuka:
+            with c.lock:
+                if c.waktu_baca:
+                    aktivitas = max(aktivitas, max(c.waktu_baca.values()))
+        if time.time() - aktivitas < args.idle or not etle.ocr_executor.tunggu_kosong(timeout=0):
+            continue
+        # Sumber dianggap tuntas jika rekamannya habis atau kameranya sudah ditutup pipeline.
+        if all(c.selesai or not c.terbuka for c in dibuka):
+            alasan = 'sumber_habis' if dibuka else 'tidak_ada_kamera_aktif'
+        else:
+            alasan = 'idle'
+        break
+
+    durasi = time.time() - waktu_mulai
+    klien.get('/stop_detection')
+    etle.penyimpan_bukti.tunggu_kosong()
+    etle.ingest.flush()
+    with pengukur._lock:
+        pengukur.mengukur_query = False
+
+    deteksi = [dict(baris, jenis='perjalanan') for baris in
+               etle.db.query("SELECT nomor_plat, kamera_id, waktu_deteksi FROM deteksi ORDER BY waktu_deteksi")]
+    deteksi += [dict(baris, jenis='anomali') for baris in
+                etle.db.query("SELECT nomor_plat, kamera_id, waktu_deteksi FROM deteksi_anomali ORDER BY waktu_deteksi")]
+    status_perjalanan = {}
+    for baris in etle.db.query("SELECT status FROM perjalanan"):
+        status_perjalanan[baris['status']] = status_perjalanan.get(baris['status'], 0) + 1
+
+    laporan = susun_laporan(args, etle, pengukur, catatan, sumber, ground_truth, deteksi, durasi)
+    laporan['alasan_berhenti'] = alasan
+    laporan['status_perjalanan'] = status_perjalanan
+    laporan['folder_kerja'] = folder_kerja
+    laporan['startup'] = {'import_detik': etle.WAKTU_IMPORT_DETIK, 'model': etle.registri_model.status()}
+    return laporan
+
+
+def _ke_epoch(waktu):
+    if isinstance(waktu, str):
+        waktu = datetime.fromisoformat(waktu)
+    return waktu.timestamp()
+
+
+def susun_laporan(args, etle, pengukur, catatan, sumber, ground_truth, deteksi, durasi):
+    kamera = {}
+    for kamera_id, c in sorted(catatan.items()):
+        data = c.ringkasan()
+        pemicu = etle.kontrol_kamera.ambil(kamera_id).pemicu
+        if pemicu is not None:
+            data['ocr_dipicu'] = pemicu.statistik()['ocr_dipicu']
+        kamera[kamera_id] = data
+
+    # Kemunculan pertama per (kamera, plat) -> deteksi tercatat pertama untuk pasangan yang sama.
+    muncul_pertama = {}
+    for item in ground_truth['kemunculan']:
+        kunci = (int(item['kamera']), item['plat'])
+        muncul_pertama[kunci] = min(muncul_pertama.get(kunci, item['frame']), item['frame'])
+    deteksi_pertama = {}
+    for baris in deteksi:
+        kunci = (int(baris['kamera_id']), baris['nomor_plat'])
+        waktu = _ke_epoch(baris['waktu_deteksi'])
+        deteksi_pertama[kunci] = min(deteksi_pertama.get(kunci, waktu), waktu)
+
+    latensi_deteksi = []
+    tidak_terbaca = []
+    for kunci, frame in sorted(muncul_pertama.items()):
+        if kunci not in deteksi_pertama:
+            continue
+        replay = sumber.get(kunci[0])
+        waktu_muncul = replay.waktu_frame(frame) if replay is not None else None
+        if waktu_muncul is None:
+            tidak_terbaca.append(kunci)
+            continue
+        latensi_deteksi.append(max(0.0, deteksi_pertama[kunci] - waktu_muncul))
+
+    diharapkan = set(muncul_pertama)
+    ditemukan = set(deteksi_pertama)
+    benar = diharapkan & ditemukan
+    presisi = len(benar) / len(ditemukan) if ditemukan else None
+    recall = len(benar) / len(diharapkan) if diharapkan else None
+    f1 = 2 * presisi * recall / (presisi + recall) if presisi and recall else (0.0 if diharapkan else None)
+
+    with pengukur._lock:
+        query = pengukur.query
+        waktu_query = pengukur.waktu_query
+        latensi_ocr = list(pengukur.latensi_ocr)
+        proses_ocr = list(pengukur.proses_ocr)
+        ukuran_batch = list(pengukur.ukuran_batch)
+
+    statistik_ocr = etle.ocr_executor.statistik()
+    return {
+        'waktu': datetime.now().isoformat(timespec='seconds'),
+        'pacing': args.pacing,
+        'durasi_detik': round(durasi, 2),
+        'kamera': kamera,
+        'ocr': {
+            'latensi': ringkas_latensi(latensi_ocr),
+            'proses_batch': ringkas_latensi(proses_ocr),
+            'batch': len(ukuran_batch),
+            'rata_rata_ukuran_batch': round(sum(ukuran_batch) / len(ukuran_batch), 2) if ukuran_batch else 0,
+            'frame_dibuang': statistik_ocr['dibuang_total'],
+            'voting': etle.pemungut_suara.statistik(),
+        },
+        'deteksi': {
+            'jumlah': len(deteksi),
+            'anomali': sum(1 for d in deteksi if d['jenis'] == 'anomali'),
+            'latensi_kemunculan': ringkas_latensi(latensi_deteksi),
+            'kemunculan_tidak_terbaca': [list(k) for k in tidak_terbaca[:BATAS_CONTOH]],
+        },
+        'database': {
+            'query': query,
+            'query_per_deteksi': round(query / len(deteksi), 2) if deteksi else None,
+            'rata_rata_query_ms': round(waktu_query / query * 1000, 3) if query else 0,
+        },
+        'akurasi': {
+            'diharapkan': len(diharapkan),
+            'ditemukan': len(ditemukan),
+            'benar': len(benar),
+            'presisi': None if presisi is None else round(presisi, 4),
+            'recall': None if recall is None else round(recall, 4),
+            'f1': None if f1 is None else round(f1, 4),
+            'terlewat': [list(k) for k in sorted(diharapkan - ditemukan)[:BATAS_CONTOH]],
+            'salah': [list(k) for k in sorted(ditemukan - diharapkan)[:BATAS_CONTOH]],
+        },
+    }
+
+
+def cetak_laporan(laporan):
+    print("\n📊 Laporan Replay")
+    print(f"   Durasi {laporan['durasi_detik']} s, pacing {laporan['pacing']}, berhenti: {laporan['alasan_berhenti']}")
+    model = ', '.join(f"{nama} {data['durasi_muat']} s" for nama, data in laporan['startup']['model'].items() if data['durasi_muat'] is not None)
+    print(f"   Startup: import {laporan['startup']['import_detik']} s, muat model: {model or '-'}")
+    for kamera_id, data in laporan['kamera'].items():
+        print(f"   CAM-{kamera_id}: {data['frame_dibaca']} frame, {data['fps']} fps, "
+              f"{data['frame_dilewati']} dilewati, OCR dipicu {data.get('ocr_dipicu', 0)}")
+    ocr = laporan['ocr']
+    print(f"   OCR latensi: {_format_latensi(ocr['latensi'])} | proses batch: {_format_latensi(ocr['proses_batch'])}")
+    print(f"   OCR batch: {ocr['batch']} (rata-rata {ocr['rata_rata_ukuran_batch']}), frame dibuang {ocr['frame_dibuang']}")
+    det = laporan['deteksi']
+    print(f"   Deteksi: {det['jumlah']} ({det['anomali']} anomali), kemunculan -> tercatat: "
+          f"{_format_latensi(det['latensi_kemunculan'])}")
+    dbs = laporan['database']
+    print(f"   Database: {dbs['query']} query, {dbs['query_per_deteksi']} per deteksi, rata-rata {dbs['rata_rata_query_ms']} ms")
+    ak = laporan['akurasi']
+    print(f"   Akurasi: presisi {ak['presisi']}, recall {ak['recall']}, F1 {ak['f1']} "
+          f"({ak['benar']}/{ak['diharapkan']} benar, {len(ak['salah'])} salah)")
+    if ak['terlewat']:
+        print(f"   Terlewat: {ak['terlewat']}")
+    if ak['salah']:
+        print(f"   Salah: {ak['salah']}")
+
+
+def _format_latensi(data):
+    if not data.get('n'):
+        return '-'
+    return f"p50 {data['p50_ms']} ms, p95 {data['p95_ms']} ms, p99 {data['p99_ms']} ms (n={data['n']})"
+
+
+def bandingkan(laporan, lama, toleransi):
+    # Regresi: F1 turun, atau p95 latensi OCR / deteksi / query per deteksi naik melebihi toleransi relatif.
+    regresi = []
+    if lama.get('pacing') != laporan.get('pacing'):
+        print(f"⚠️  Pacing berbeda ({lama.get('pacing')} vs {laporan.get('pacing')}), latensi tidak sebanding.")
+
+    def ambil(data, *kunci):
+        for k in kunci:
+            if not isinstance(data, dict) or data.get(k) is None:
+                return None
+            data = data[k]
+        return data
+
+    f1_baru, f1_lama = ambil(laporan, 'akurasi', 'f1'), ambil(lama, 'akurasi', 'f1')
+    if f1_baru is not None and f1_lama is not None and f1_baru < f1_lama - 1e-9:
+        regresi.append(f"F1 turun {f1_lama} -> {f1_baru}")
+    for jalur in (('ocr', 'latensi', 'p95_ms'), ('deteksi', 'latensi_kemunculan', 'p95_ms'),
+                  ('database', 'query_per_deteksi')):
+        baru, sebelum = ambil(laporan, *jalur), ambil(lama, *jalur)
+        if baru is None or sebelum is None:
+            continue
+        print(f"   {'.'.join(jalur)}: {sebelum} -> {baru}")
+        if baru > sebelum * (1 + toleransi):
+            regresi.append(f"{'.'.join(jalur)} naik {sebelum} -> {baru}")
+    return regresi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay rekaman melalui pipeline ETLE dan cetak laporan benchmark.")
+    parser.add_argument('--kamera', action='append', type=parse_kamera, required=True, metavar='ID=PATH',
+                        help="peta kamera ke file video atau folder gambar (boleh berulang)")
+    parser.add_argument('--ground-truth', help="file JSON perjalanan dan kemunculan plat")
+    parser.add_argument('--pacing', choices=('realtime', 'cepat'), default='realtime')
+    parser.add_argument('--fps', type=float, help="fps sumber (default dari video, 10 untuk folder gambar)")
+    parser.add_argument('--tanpa-sinkron', action='store_true',
+                        help="pacing cepat tanpa menunggu OCR per frame (frame boleh dibuang seperti kamera hidup)")
+    parser.add_argument('--batas-tunggu-ocr', type=float, default=30.0)
+    parser.add_argument('--jeda-demo', type=float, default=0.0, help="pengganti JEDA_DEMO_DETIK selama replay")
+    parser.add_argument('--idle', type=float, default=3.0, help="berhenti setelah sekian detik tanpa aktivitas")
+    parser.add_argument('--timeout', type=float, default=600.0)
+    parser.add_argument('--folder-bukti', help="simpan foto bukti di sini (default folder sementara)")
+    parser.add_argument('--output', help="tulis laporan JSON ke file ini")
+    parser.add_argument('--pembanding', help="laporan JSON sebelumnya; exit 1 jika ada regresi")
+    parser.add_argument('--toleransi', type=float, default=0.1, help="toleransi kenaikan relatif untuk --pembanding")
+    args = parser.parse_args(argv)
+
+    laporan = jalankan(args)
+    cetak_laporan(laporan)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(laporan, f, indent=2, default=str)
+        print(f"💾 Laporan disimpan ke {args.output}")
+    if args.pembanding:
+        with open(args.pembanding, encoding='utf-8') as f:
+            lama = json.load(f)
+        print("\n🔁 Dibandingkan dengan", args.pembanding)
+        regresi = bandingkan(laporan, lama, args.toleransi)
+        if regresi:
+            for pesan in regresi:
+                print(f"❌ Regresi: {pesan}")
+            return 1
+        print("✅ Tidak ada regresi.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
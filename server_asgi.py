@@ -0,0 +1,281 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+from contextlib import aclosing
+
+import app as etle
+
+# =============================
+# Mode Server ASGI (streaming async)
+# =============================
+#
+# Endpoint streaming MJPEG (/video_feed/<id>, /dashboard_video_feed), SSE
+# notifikasi, dan polling (/api/status, /api/notifications?since=) dilayani
+# langsung di satu event loop asyncio, sehingga ratusan penonton tidak
+# memakan satu thread worker per koneksi; pekerjaan yang bisa memblokir
+# (encode JPEG, statistik /api/status) dijalankan lewat run_in_executor.
+# Thread kamera tetap sama; penyiar frame membangunkan event loop lewat
+# loop.call_soon_threadsafe (satu panggilan per frame per kamera, lalu
+# disebar ke semua penonton di dalam loop). Rute lain diteruskan ke
+# aplikasi Flask lewat adaptor WSGI (asgiref), jadi rute dan template lama
+# tetap berjalan apa adanya.
+#
+# Jalankan: python server_asgi.py
+#       atau uvicorn server_asgi:buat_aplikasi --factory --port 5000
+
+HOST_ASGI = '0.0.0.0'
+PORT_ASGI = 5000
+
+HEADER_MJPEG = [(b'content-type', b'multipart/x-mixed-replace; boundary=frame'), (b'cache-control', b'no-cache')]
+HEADER_JSON = [(b'content-type', b'application/json')]
+HEADER_SSE = [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]
+
+
+class _JembatanKamera:
+    # Satu pendengar thread-safe per kamera untuk satu event loop.
+    def __init__(self, loop):
+        self.loop = loop
+        self._penonton = {}
+        self._pendengar = {}
+
+    def _bangunkan(self, kamera_id):
+        for event in self._penonton.get(kamera_id, ()):
+            event.set()
+
+    def daftar(self, kamera_id, event):
+        if kamera_id not in self._penonton:
+            loop = self.loop
+            fungsi = lambda: loop.call_soon_threadsafe(self._bangunkan, kamera_id)
+            self._penonton[kamera_id] = set()
+            self._pendengar[kamera_id] = fungsi
+            etle.penyiar_kamera.ambil(kamera_id).tambah_pendengar(fungsi)
+        self._penonton[kamera_id].add(event)
+
+    def lepas(self, kamera_id, event):
+        penonton = self._penonton.get(kamera_id)
+        if penonton is None:
+            return
+        penonton.discard(event)
+        if not penonton:
+            del self._penonton[kamera_id]
+            etle.penyiar_kamera.ambil(kamera_id).hapus_pendengar(self._pendengar.pop(kamera_id))
+
+    def jumlah_penonton(self):
+        return {kamera_id: len(penonton) for kamera_id, penonton in self._penonton.items()}
+
+
+class AplikasiASGI:
+    def __init__(self, aplikasi_flask=None, fallback=None):
+        self.flask = aplikasi_flask or etle.app
+        if fallback is None:
+            try:
+                from asgiref.wsgi import WsgiToAsgi
+            except ImportError as e:
+                raise RuntimeError("Paket asgiref belum terpasang (pip install asgiref uvicorn)") from e
+            fallback = WsgiToAsgi(self.flask)
+        self.fallback = fallback
+        self._jembatan = None
+        self._statistik = {'stream_aktif': 0, 'stream_total': 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            path = scope['path']
+            if path.startswith('/video_feed/') and path[len('/video_feed/'):].isdigit():
+                if not self._sudah_login(scope):
+                    await self._kirim_teks(send, 401, b'Unauthorized')
+                    return
+                await self._stream(receive, send, 'kamera', HEADER_MJPEG, etle.bagian_mjpeg, self._frame_kamera, int(path[len('/video_feed/'):]))
+                return
+            if path == '/dashboard_video_feed':
+                if not self._sudah_login(scope):
+                    await self._kirim_teks(send, 401, b'Unauthorized')
+                    return
+                await self._stream(receive, send, 'dashboard', HEADER_MJPEG, etle.bagian_mjpeg, self._frame_dashboard)
+                return
+            if path == '/api/status':
+                # data_status() mengambil lock dan statistik pool DB: jangan dijalankan di event loop.
+                data = await asyncio.get_running_loop().run_in_executor(None, etle.data_status)
+                data['asgi'] = self.statistik()
+                await self._kirim_json(send, data)
+                return
+            if path == '/api/notifications/stream':
+                mulai = etle.kursor_notifikasi(self._header(scope, b'last-event-id'))
+                if mulai is None:
+                    mulai = etle.kursor_notifikasi(self._parameter(scope, 'since'))
+                if mulai is None:
+                    mulai = etle.notifikasi.id_terakhir
+                await self._stream(receive, send, 'sse', HEADER_SSE, str.encode, self._notifikasi_sse, mulai)
+                return
+            if path == '/api/notifications':
+                daftar, kursor = etle.ambil_notifikasi(self._parameter(scope, 'since'))
+                await self._kirim_json(send, daftar, [(etle.HEADER_KURSOR_NOTIFIKASI.lower().encode(), str(kursor).encode())])
+                return
+        await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            pesan = await receive()
+            if pesan['type'] == 'lifespan.startup':
+                etle.panaskan_model()
+                await send({'type': 'lifespan.startup.complete'})
+            elif pesan['type'] == 'lifespan.shutdown':
+                # Baris deteksi yang masih di antrian ingest ditulis sebelum proses berhenti.
+                await asyncio.get_running_loop().run_in_executor(None, etle.ingest.hentikan)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _header(self, scope, nama):
+        for (kunci, nilai) in scope.get('headers', []):
+            if kunci == nama:
+                return nilai.decode('latin-1')
+        return None
+
+    def _parameter(self, scope, nama):
+        nilai = parse_qs(scope.get('query_string', b'').decode('latin-1')).get(nama)
+        return nilai[0] if nilai else None
+
+    def _sudah_login(self, scope):
+        # Session cookie Flask dibaca lewat session_interface milik aplikasi, bukan diparsing ulang.
+        cookie = b'; '.join(nilai for (nama, nilai) in scope.get('headers', []) if nama == b'cookie')
+        permintaan = self.flask.request_class({
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': scope['path'], 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+            'wsgi.url_scheme': scope.get('scheme', 'http'), 'HTTP_COOKIE': cookie.decode('latin-1'),
+        })
+        sesi = self.flask.session_interface.open_session(self.flask, permintaan)
+        return bool(sesi and sesi.get('logged_in'))
+
+    def _ambil_jembatan(self):
+        if self._jembatan is None:
+            self._jembatan = _JembatanKamera(asyncio.get_running_loop())
+        return self._jembatan
+
+    # ---- respons ----
+
+    async def _kirim_teks(self, send, status, isi):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': isi})
+
+    async def _kirim_json(self, send, data, header_tambahan=()):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': HEADER_JSON + list(header_tambahan)})
+        await send({'type': 'http.response.body', 'body': json.dumps(data, default=str).encode()})
+
+    async def _stream(self, receive, send, jenis, header, bentuk, sumber, *args):
+        bangun = asyncio.Event()
+        putus = asyncio.Event()
+
+        async def tunggu_putus():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            putus.set()
+            bangun.set()
+
+        pengawas = asyncio.ensure_future(tunggu_putus())
+        self._statistik['stream_aktif'] += 1
+        self._statistik['stream_total'] += 1
+        metrik = etle.metrik_stream.label(jenis)
+        metrik.tambah(1)
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': header})
+            async with aclosing(sumber(bangun, putus, *args)) as aliran:
+                async for bagian in aliran:
+                    if putus.is_set():
+                        break
+                    await send({'type': 'http.response.body', 'body': bentuk(bagian), 'more_body': True})
+        except OSError:
+            pass
+        finally:
+            self._statistik['stream_aktif'] -= 1
+            metrik.tambah(-1)
+            pengawas.cancel()
+
+    async def _tidur(self, bangun, timeout=None):
+        try:
+            await asyncio.wait_for(bangun.wait(), timeout or etle.BATAS_TUNGGU_FRAME_DETIK)
+        except asyncio.TimeoutError:
+            pass
+
+    # ---- sumber frame ----
+
+    async def _frame_penyiar(self, kamera_id, bangun, putus, cadangan, masih_berlaku=None):
+        loop = asyncio.get_running_loop()
+        jembatan = self._ambil_jembatan()
+        penyiar = etle.penyiar_kamera.ambil(kamera_id)
+        jembatan.daftar(kamera_id, bangun)
+        try:
+            with penyiar.langganan():
+                while not putus.is_set():
+                    bangun.clear()
+                    _, jpeg, perlu_encode = penyiar.ambil_tersimpan()
+                    if perlu_encode:
+                        # Hanya penonton pertama per versi yang benar-benar meng-encode.
+                        _, jpeg = await loop.run_in_executor(None, penyiar.encode_terbaru)
+                    yield jpeg or cadangan
+                    if masih_berlaku is not None and not masih_berlaku():
+                        return
+                    await self._tidur(bangun)
+        finally:
+            jembatan.lepas(kamera_id, bangun)
+
+    async def _frame_kamera(self, bangun, putus, kamera_id):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, etle.tambah_penonton, kamera_id)
+        try:
+            async with aclosing(self._frame_penyiar(kamera_id, bangun, putus, etle.create_info_frame("Menunggu Kamera..."))) as aliran:
+                async for jpeg in aliran:
+                    yield jpeg
+        finally:
+            await loop.run_in_executor(None, etle.kurangi_penonton, kamera_id)
+
+    async def _frame_dashboard(self, bangun, putus):
+        while not putus.is_set():
+            aktif, kamera_id = etle.status_dashboard()
+            if not aktif or kamera_id is None:
+                yield etle.info_dashboard(aktif, kamera_id)
+                bangun.clear()
+                await self._tidur(bangun)
+                continue
+            masih_berlaku = lambda: etle.status_dashboard() == (True, kamera_id)
+            async with aclosing(self._frame_penyiar(kamera_id, bangun, putus, etle.info_dashboard(True, kamera_id), masih_berlaku)) as aliran:
+                async for jpeg in aliran:
+                    yield jpeg
+
+    async def _notifikasi_sse(self, bangun, putus, id_terakhir):
+        loop = asyncio.get_running_loop()
+        fungsi = lambda: loop.call_soon_threadsafe(bangun.set)
+        etle.notifikasi.tambah_pendengar(fungsi)
+        try:
+            yield "retry: 3000\n\n"
+            while not putus.is_set():
+                bangun.clear()
+                daftar = etle.notifikasi.sejak(id_terakhir)
+                for entri in daftar:
+                    yield etle.format_sse_notifikasi(entri)
+                if daftar:
+                    id_terakhir = daftar[-1]['id']
+                    continue
+                await self._tidur(bangun, etle.BATAS_KEEPALIVE_SSE_DETIK)
+                if not bangun.is_set():
+                    yield ": keep-alive\n\n"
+        finally:
+            etle.notifikasi.hapus_pendengar(fungsi)
+
+    def statistik(self):
+        data = dict(self._statistik)
+        data['penonton'] = self._jembatan.jumlah_penonton() if self._jembatan else {}
+        return data
+
+
+def buat_aplikasi():
+    return AplikasiASGI()
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ Paket uvicorn belum terpasang (pip install uvicorn asgiref).")
+        raise SystemExit(1)
+    uvicorn.run(buat_aplikasi(), host=HOST_ASGI, port=PORT_ASGI)
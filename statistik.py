@@ -0,0 +1,129 @@
+import threading
+from datetime import date, timedelta
+
+# =============================
+# Statistik Perjalanan (rollup harian)
+# =============================
+#
+# Tabel statistik_harian menyimpan jumlah perjalanan per (tanggal, tujuan,
+# status). Baris diperbarui di transaksi yang sama saat perjalanan dibuat
+# atau statusnya berubah. Angka hari ini disimpan di memori (hot counter),
+# sedangkan total/minggu/bulan sebelum hari ini cukup dijumlahkan sekali per
+# hari dari beberapa baris rollup, sehingga /api/stats tidak memindai tabel
+# perjalanan berapa pun jumlah barisnya.
+#
+# Saat tanggal berganti, counter hari baru tidak dibaca ulang dari DB:
+# terapkan() untuk tanggal setelah hari hot disimpan di _tertunda, lalu
+# dipindah ke counter saat pergantian hari. Pergantian dan terapkan() sama-
+# sama di bawah _lock, jadi perubahan yang di-commit di sekitar pergantian
+# terhitung tepat sekali (lewat rollup hari lalu atau lewat _tertunda).
+
+SQL_UPSERT = {
+    'mysql': ("INSERT INTO statistik_harian (tanggal, tujuan, status, jumlah) VALUES (%s, %s, %s, %s) "
+              "ON DUPLICATE KEY UPDATE jumlah = jumlah + VALUES(jumlah)"),
+    'sqlite': ("INSERT INTO statistik_harian (tanggal, tujuan, status, jumlah) VALUES (%s, %s, %s, %s) "
+               "ON CONFLICT (tanggal, tujuan, status) DO UPDATE SET jumlah = jumlah + excluded.jumlah"),
+}
+
+
+def _ke_tanggal(waktu):
+    return waktu.date() if hasattr(waktu, 'date') else waktu
+
+
+class StatistikHarian:
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._tanggal_hot = None
+        self._hari_ini = {}
+        self._tertunda = {}
+        self._lalu = {'total': 0, 'minggu': 0, 'bulan': 0}
+
+    def muat(self):
+        ada_rollup = self.db.query_one("SELECT 1 AS ada FROM statistik_harian LIMIT 1")
+        if not ada_rollup and self.db.query_one("SELECT 1 AS ada FROM perjalanan LIMIT 1"):
+            # Rollup kosong pada database lama: bangun sekali dari perjalanan.
+            self.db.execute("INSERT INTO statistik_harian (tanggal, tujuan, status, jumlah) "
+                            "SELECT DATE(waktu_mulai), tujuan, status, COUNT(*) FROM perjalanan "
+                            "GROUP BY DATE(waktu_mulai), tujuan, status")
+            print("✅ Rollup statistik_harian dibangun dari tabel perjalanan.")
+        with self._lock:
+            self._muat_hari(date.today(), baca_hari_ini=True)
+
+    def _muat_hari(self, hari_ini, baca_hari_ini):
+        # Dipanggil dengan self._lock terkunci (sekali per hari, terapkan() menunggu sebentar).
+        awal_minggu = hari_ini - timedelta(days=hari_ini.weekday())
+        awal_bulan = hari_ini.replace(day=1)
+        jumlah_lalu = self.db.query_one(
+            "SELECT SUM(jumlah) AS total, "
+            "SUM(CASE WHEN tanggal >= %s THEN jumlah ELSE 0 END) AS minggu, "
+            "SUM(CASE WHEN tanggal >= %s THEN jumlah ELSE 0 END) AS bulan "
+            "FROM statistik_harian WHERE tanggal < %s",
+            (awal_minggu, awal_bulan, hari_ini))
+        if baca_hari_ini:
+            baris_hari_ini = self.db.query("SELECT tujuan, status, jumlah FROM statistik_harian WHERE tanggal = %s", (hari_ini,))
+            hari = {(b['tujuan'], b['status']): int(b['jumlah']) for b in baris_hari_ini}
+        else:
+            hari = {}
+            for (tanggal, tujuan, status), delta in self._tertunda.items():
+                if tanggal == hari_ini:
+                    hari[(tujuan, status)] = hari.get((tujuan, status), 0) + delta
+        self._tertunda = {k: v for k, v in self._tertunda.items() if k[0] > hari_ini}
+        self._tanggal_hot = hari_ini
+        self._hari_ini = hari
+        self._lalu = {k: int(jumlah_lalu[k] or 0) for k in ('total', 'minggu', 'bulan')}
+
+    # ---- pencatatan ----
+
+    @staticmethod
+    def perubahan_baru(waktu_mulai, tujuan):
+        return [(_ke_tanggal(waktu_mulai), tujuan, 'Pending', 1)]
+
+    @staticmethod
+    def perubahan_status(waktu_mulai, tujuan, status_lama, status_baru):
+        if status_lama == status_baru:
+            return []
+        tanggal = _ke_tanggal(waktu_mulai)
+        return [(tanggal, tujuan, status_lama, -1), (tanggal, tujuan, status_baru, 1)]
+
+    def tulis(self, tx, perubahan):
+        # Dipanggil di dalam transaksi yang sama dengan perubahan perjalanan.
+        sql = SQL_UPSERT[self.db.backend.nama]
+        for (tanggal, tujuan, status, delta) in perubahan:
+            tx.execute(sql, (tanggal, tujuan, status, delta), prepared=True)
+
+    def terapkan(self, perubahan):
+        # Dipanggil setelah commit berhasil.
+        with self._lock:
+            for (tanggal, tujuan, status, delta) in perubahan:
+                if tanggal == self._tanggal_hot:
+                    kunci = (tujuan, status)
+                    self._hari_ini[kunci] = self._hari_ini.get(kunci, 0) + delta
+                elif self._tanggal_hot is not None and tanggal > self._tanggal_hot:
+                    # Sudah lewat tengah malam tetapi counter belum digulir.
+                    kunci = (tanggal, tujuan, status)
+                    self._tertunda[kunci] = self._tertunda.get(kunci, 0) + delta
+
+    # ---- pembacaan ----
+
+    def ringkasan(self):
+        hari_ini = date.today()
+        with self._lock:
+            if self._tanggal_hot != hari_ini:
+                # Counter hari baru hanya dibaca dari DB jika belum pernah dimuat (muat() gagal).
+                self._muat_hari(hari_ini, baca_hari_ini=self._tanggal_hot is None)
+            jumlah_hari_ini = sum(self._hari_ini.values())
+            per_tujuan = {}
+            per_status = {}
+            for (tujuan, status), jumlah in self._hari_ini.items():
+                if jumlah:
+                    per_tujuan[tujuan] = per_tujuan.get(tujuan, 0) + jumlah
+                    per_status[status] = per_status.get(status, 0) + jumlah
+            return {
+                'total': self._lalu['total'] + jumlah_hari_ini,
+                'hari_ini': jumlah_hari_ini,
+                'minggu_ini': self._lalu['minggu'] + jumlah_hari_ini,
+                'bulan_ini': self._lalu['bulan'] + jumlah_hari_ini,
+                'hari_ini_per_tujuan': per_tujuan,
+                'hari_ini_per_status': per_status,
+            }
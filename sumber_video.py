@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+import cv2
+
+# =============================
+# Sumber Video Replay
+# =============================
+#
+# Pengganti cv2.VideoCapture untuk menjalankan pipeline terhadap rekaman:
+# file video atau folder gambar (diurutkan menurut nama). Antarmukanya sama
+# dengan VideoCapture yang dipakai capture_task (isOpened/read/grab/retrieve/
+# release), jadi bisa dipasang lewat KAMERA_SETUP tanpa mengubah loop kamera.
+# Seperti perangkat asli, grab() hanya memajukan posisi; decode baru terjadi
+# di retrieve(), sehingga frame yang tidak dipakai siapa pun tidak di-decode.
+#
+# Pacing 'realtime' meniru kamera hidup: frame yang dikembalikan ditentukan
+# oleh jam dinding sejak waktu_mulai (frame yang terlewat dibuang, read()
+# menunggu jika terlalu cepat). Pacing 'cepat' membaca setiap frame
+# berurutan secepat mungkin; sebelum_baca() bisa dipakai untuk menahan
+# pembacaan sampai OCR frame sebelumnya selesai agar hasil deterministik.
+# Waktu baca setiap indeks frame dicatat untuk menghitung latensi deteksi.
+
+EKSTENSI_GAMBAR = ('.jpg', '.jpeg', '.png', '.bmp')
+FPS_DEFAULT_VIDEO = 25.0
+FPS_DEFAULT_GAMBAR = 10.0
+
+
+class CatatanSumber:
+    # Dibagi antar SumberReplay untuk kamera yang sama agar posisi dan
+    # catatan waktu tetap bersambung jika kamera ditutup lalu dibuka lagi.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indeks_berikutnya = 0
+        self.waktu_baca = {}
+        self.dilewati = 0
+        self.selesai = False
+        self.dibuka = 0
+        self.terbuka = 0
+
+    def ringkasan(self):
+        with self.lock:
+            waktu = sorted(self.waktu_baca.values())
+            durasi = waktu[-1] - waktu[0] if len(waktu) > 1 else 0.0
+            return {
+                'frame_dibaca': len(waktu),
+                'frame_dilewati': self.dilewati,
+                'durasi_detik': round(durasi, 3),
+                'fps': round((len(waktu) - 1) / durasi, 2) if durasi > 0 else 0.0,
+                'selesai': self.selesai,
+                'dibuka': self.dibuka,
+                'terbuka': self.terbuka,
+            }
+
+
+class SumberReplay:
+    def __init__(self, path, pacing='realtime', fps=None, waktu_mulai=None, catatan=None, sebelum_baca=None):
+        if pacing not in ('realtime', 'cepat'):
+            raise ValueError(f"pacing tidak dikenal: {pacing}")
+        self.path = path
+        self.pacing = pacing
+        self.waktu_mulai = time.time() if waktu_mulai is None else waktu_mulai
+        self.catatan = catatan or CatatanSumber()
+        self.sebelum_baca = sebelum_baca
+        self._cap = None
+        self._gambar = None
+        self._posisi_cap = 0
+        self._indeks_tertahan = None
+        self._indeks_terakhir = 0
+        self._terbuka = False
+
+        if os.path.isdir(path):
+            self._gambar = sorted(os.path.join(path, nama) for nama in os.listdir(path)
+                                  if nama.lower().endswith(EKSTENSI_GAMBAR))
+            self.fps = float(fps or FPS_DEFAULT_GAMBAR)
+            self.jumlah_frame = len(self._gambar)
+            self._terbuka = self.jumlah_frame > 0
+        else:
+            self._cap = cv2.VideoCapture(path)
+            self._terbuka = self._cap.isOpened()
+            self.fps = float(fps or (self._cap.get(cv2.CAP_PROP_FPS) if self._terbuka else 0) or FPS_DEFAULT_VIDEO)
+            self.jumlah_frame = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT)) if self._terbuka else 0
+        if self._terbuka:
+            with self.catatan.lock:
+                self.catatan.dibuka += 1
+                self.catatan.terbuka += 1
+
+    def isOpened(self):
+        return self._terbuka
+
+    def waktu_frame(self, indeks):
+        # Waktu (epoch) frame ke-indeks "terjadi" di depan kamera.
+        if self.pacing == 'realtime':
+            return self.waktu_mulai + indeks / self.fps
+        with self.catatan.lock:
+            return self.catatan.waktu_baca.get(indeks)
+
+    def waktu_media(self):
+        # Jam rekaman (detik) frame terakhir; dipakai pemicu gerak sebagai pengganti
+        # time.monotonic() agar interval burst tetap benar pada pacing cepat.
+        return self._indeks_terakhir / self.fps
+
+    def _indeks_target(self):
+        with self.catatan.lock:
+            berikutnya = self.catatan.indeks_berikutnya
+        if self.pacing == 'cepat':
+            return berikutnya
+        sekarang = time.time()
+        target = int((sekarang - self.waktu_mulai) * self.fps)
+        if target < berikutnya:
+            time.sleep(max(0.0, self.waktu_mulai + berikutnya / self.fps - sekarang))
+            target = berikutnya
+        return target
+
+    def _grab_indeks(self, indeks):
+        # Memposisikan sumber di frame ke-indeks tanpa decode; decode ditunda ke retrieve().
+        if self._gambar is not None:
+            return indeks < len(self._gambar)
+        if indeks != self._posisi_cap:
+            if indeks - self._posisi_cap < 30:
+                # Lompatan pendek: grab tanpa decode lebih murah daripada seek.
+                while self._posisi_cap < indeks and self._cap.grab():
+                    self._posisi_cap += 1
+            else:
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, indeks)
+                self._posisi_cap = indeks
+        if not self._cap.grab():
+            return False
+        self._posisi_cap += 1
+        return True
+
+    def grab(self):
+        if not self._terbuka:
+            return False
+        if self.sebelum_baca is not None:
+            self.sebelum_baca()
+        indeks = self._indeks_target()
+        ada = self._grab_indeks(indeks)
+        with self.catatan.lock:
+            if not ada:
+                self.catatan.selesai = True
+                self._indeks_tertahan = None
+                return False
+            self.catatan.dilewati += indeks - self.catatan.indeks_berikutnya
+            self.catatan.indeks_berikutnya = indeks + 1
+            self.catatan.waktu_baca[indeks] = time.time()
+        self._indeks_terakhir = indeks
+        self._indeks_tertahan = indeks
+        return True
+
+    def retrieve(self):
+        indeks, self._indeks_tertahan = self._indeks_tertahan, None
+        if indeks is None:
+            return False, None
+        if self._gambar is not None:
+            frame = cv2.imread(self._gambar[indeks])
+            return frame is not None, frame
+        return self._cap.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        if self._terbuka:
+            with self.catatan.lock:
+                self.catatan.terbuka -= 1
+        self._terbuka = False
+        self._indeks_tertahan = None
+        if self._cap is not None:
+            self._cap.release()
@@ -0,0 +1,142 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from arsip import AKHIRAN_BARU, PengarsipRiwayat
+from database import DatabaseError, buat_database
+
+SEKARANG = datetime(2024, 6, 1, 12, 0, 0)
+LAMA = SEKARANG - timedelta(days=120)
+
+
+def _db(tmp_path):
+    return buat_database('sqlite', path_sqlite=str(tmp_path / 'uji.db'))
+
+
+def _perjalanan(db, status, waktu, plat='B1234XY'):
+    hasil = db.execute("INSERT INTO perjalanan (nama_pengunjung, nomor_plat, tujuan, waktu_mulai, status) "
+                       "VALUES (%s, %s, %s, %s, %s)", ('Budi', plat, 'Gudang', waktu, status))
+    return hasil.lastrowid
+
+
+def _deteksi(db, perjalanan_id, waktu, path_foto='f.jpg', path_crop=None):
+    db.execute("INSERT INTO deteksi (perjalanan_id, nomor_plat, waktu_deteksi, path_foto, path_crop, confidence, kamera_id) "
+               "VALUES (%s, %s, %s, %s, %s, %s, %s)", (perjalanan_id, 'B1234XY', waktu, path_foto, path_crop, 0.75, 3))
+
+
+def _anomali(db, waktu, path_foto='a.jpg'):
+    db.execute("INSERT INTO deteksi_anomali (nomor_plat, waktu_deteksi, path_foto, kamera_id) VALUES (%s, %s, %s, %s)",
+               ('X999', waktu, path_foto, 1))
+
+
+def _jumlah(db, tabel):
+    return db.query_one(f"SELECT COUNT(*) AS n FROM {tabel}")['n']
+
+
+def _file(folder, tabel, akhiran='.csv.gz'):
+    path = os.path.join(folder, tabel)
+    return sorted(n for n in os.listdir(path) if n.endswith(akhiran)) if os.path.isdir(path) else []
+
+
+def test_jalankan_memindah_baris_lama_dan_memulihkan_tipe(tmp_path):
+    db = _db(tmp_path)
+    lama = _perjalanan(db, 'Sesuai', LAMA)
+    _deteksi(db, lama, LAMA + timedelta(minutes=5), path_crop='c.jpg')
+    pending = _perjalanan(db, 'Pending', LAMA)
+    baru = _perjalanan(db, 'Gagal', SEKARANG - timedelta(days=1))
+    _anomali(db, LAMA)
+    _anomali(db, SEKARANG)
+    pengarsip = PengarsipRiwayat(db, str(tmp_path / 'arsip'), umur_hari=90, ukuran_batch=1)
+
+    assert pengarsip.jalankan(SEKARANG) == {'perjalanan': 1, 'deteksi': 1, 'deteksi_anomali': 1}
+
+    assert [b['id'] for b in db.query("SELECT id FROM perjalanan ORDER BY id")] == [pending, baru]
+    assert _jumlah(db, 'deteksi') == 0
+    assert _jumlah(db, 'deteksi_anomali') == 1
+    deteksi = list(pengarsip.baca('deteksi'))
+    assert len(deteksi) == 1
+    d = deteksi[0]
+    assert d['perjalanan_id'] == lama and isinstance(d['perjalanan_id'], int)
+    assert d['confidence'] == 0.75 and d['kamera_id'] == 3
+    assert d['path_crop'] == 'c.jpg'
+    perjalanan = list(pengarsip.baca('perjalanan', saring={'status': 'Sesuai'}))
+    assert [p['id'] for p in perjalanan] == [lama]
+    assert perjalanan[0]['waktu_selesai'] is None
+    # Putaran kedua tidak memindah apa pun lagi.
+    assert pengarsip.jalankan(SEKARANG) == {}
+
+
+def test_crash_sebelum_hapus_db_file_baru_dibuang(tmp_path, monkeypatch):
+    db = _db(tmp_path)
+    _anomali(db, LAMA)
+    folder = str(tmp_path / 'arsip')
+    pengarsip = PengarsipRiwayat(db, folder, umur_hari=90)
+    monkeypatch.setattr(db, 'transaksi', lambda: (_ for _ in ()).throw(DatabaseError('mati saat hapus')))
+
+    with pytest.raises(DatabaseError):
+        pengarsip.jalankan(SEKARANG)
+    assert _file(folder, 'deteksi_anomali', AKHIRAN_BARU)
+    assert _jumlah(db, 'deteksi_anomali') == 1
+
+    monkeypatch.undo()
+    assert pengarsip.pulihkan() == 1
+    assert _file(folder, 'deteksi_anomali', AKHIRAN_BARU) == []
+    assert _file(folder, 'deteksi_anomali') == []
+    # Baris yang sama baru terarsip sekali di putaran berikutnya.
+    pengarsip.jalankan(SEKARANG)
+    assert len(list(pengarsip.baca('deteksi_anomali'))) == 1
+    assert _jumlah(db, 'deteksi_anomali') == 0
+
+
+def test_crash_setelah_commit_file_baru_diresmikan(tmp_path, monkeypatch):
+    db = _db(tmp_path)
+    _anomali(db, LAMA)
+    folder = str(tmp_path / 'arsip')
+    pengarsip = PengarsipRiwayat(db, folder, umur_hari=90)
+
+    def mati(daftar_path):
+        raise OSError('mati sebelum rename')
+    monkeypatch.setattr(pengarsip, '_resmikan', mati)
+    with pytest.raises(OSError):
+        pengarsip.jalankan(SEKARANG)
+    assert _jumlah(db, 'deteksi_anomali') == 0
+    assert list(pengarsip.baca('deteksi_anomali')) == []
+
+    monkeypatch.undo()
+    assert pengarsip.pulihkan() == 1
+    assert len(list(pengarsip.baca('deteksi_anomali'))) == 1
+
+
+def test_baca_memangkas_file_di_luar_rentang(tmp_path):
+    db = _db(tmp_path)
+    for hari in (0, 1, 2):
+        _anomali(db, LAMA + timedelta(days=hari, hours=1))
+    folder = str(tmp_path / 'arsip')
+    pengarsip = PengarsipRiwayat(db, folder, umur_hari=90, ukuran_batch=1)
+    pengarsip.jalankan(SEKARANG)
+    # File di luar rentang tidak dibuka: isi rusak pun tidak mengganggu.
+    with open(os.path.join(folder, 'deteksi_anomali', '20200101_20200101_90_90.csv.gz'), 'wb') as f:
+        f.write(gzip.compress(b'id,nomor_plat\n')[:10])
+
+    hari_kedua = LAMA + timedelta(days=1)
+    dari = hari_kedua.replace(hour=0)
+    hasil = list(pengarsip.baca('deteksi_anomali', dari=dari, sampai=dari + timedelta(days=1)))
+    assert [b['waktu_deteksi'][:10] for b in hasil] == [hari_kedua.date().isoformat()]
+    assert len(list(pengarsip.baca('deteksi_anomali', dari=LAMA.replace(hour=0)))) == 3
+    with pytest.raises(EOFError):
+        list(pengarsip.baca('deteksi_anomali'))
+
+
+def test_rujukan_menemukan_path_bukti_di_arsip(tmp_path):
+    db = _db(tmp_path)
+    trip = _perjalanan(db, 'Sesuai', LAMA)
+    _deteksi(db, trip, LAMA, path_foto='frame/1.jpg', path_crop='crop/1.jpg')
+    _anomali(db, LAMA, path_foto='frame/2.jpg')
+    pengarsip = PengarsipRiwayat(db, str(tmp_path / 'arsip'), umur_hari=90)
+    pengarsip.jalankan(SEKARANG)
+
+    dicari = ['frame/1.jpg', 'crop/1.jpg', 'frame/2.jpg', 'frame/3.jpg']
+    assert pengarsip.rujukan(dicari, LAMA - timedelta(days=1), LAMA + timedelta(days=1)) == set(dicari[:3])
+    assert pengarsip.rujukan(dicari, SEKARANG - timedelta(days=1), SEKARANG) == set()
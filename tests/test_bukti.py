@@ -0,0 +1,70 @@
+import os
+import time
+
+import numpy as np
+
+import bukti
+from bukti import PenyimpanBukti
+
+
+def _frame(nilai):
+    return np.full((48, 64, 3), nilai, dtype=np.uint8)
+
+
+def _tuakan(path, hari):
+    waktu = time.time() - hari * 86400
+    os.utime(path, (waktu, waktu))
+
+
+def test_rawat_tidak_menghapus_file_yang_dirujuk(tmp_path):
+    dirujuk = set()
+    penyimpan = PenyimpanBukti(str(tmp_path), batas_umur_hari=30, rujukan=lambda daftar: dirujuk & set(daftar))
+    path_a, _ = penyimpan.simpan(_frame(10), 'a')
+    path_b, _ = penyimpan.simpan(_frame(200), 'b')
+    penyimpan.tunggu_kosong()
+    _tuakan(path_a, 60)
+    _tuakan(path_b, 60)
+    dirujuk.add(path_a)
+
+    ringkasan = penyimpan.rawat()
+
+    assert os.path.exists(path_a)
+    assert not os.path.exists(path_b)
+    assert ringkasan['dihapus_umur'] == 1
+    assert ringkasan['dilewati_dirujuk'] == 1
+    penyimpan.hentikan()
+
+
+def test_rawat_berhenti_jika_rujukan_tidak_diketahui(tmp_path):
+    penyimpan = PenyimpanBukti(str(tmp_path), batas_umur_hari=30, batas_disk_mb=0, rujukan=lambda daftar: None)
+    path, _ = penyimpan.simpan(_frame(10), 'a')
+    penyimpan.tunggu_kosong()
+    _tuakan(path, 60)
+
+    ringkasan = penyimpan.rawat()
+
+    assert os.path.exists(path)
+    assert ringkasan['rujukan_gagal']
+    penyimpan.hentikan()
+
+
+def test_sidik_dicatat_setelah_tulis_berhasil(tmp_path, monkeypatch):
+    penyimpan = PenyimpanBukti(str(tmp_path))
+    frame = _frame(77)
+    imencode_asli = bukti.cv2.imencode
+    monkeypatch.setattr(bukti.cv2, 'imencode', lambda *args, **kwargs: (False, None))
+    path, _ = penyimpan.simpan(frame, 'a')
+    penyimpan.tunggu_kosong()
+    assert not os.path.exists(path)
+
+    # Tulis pertama gagal: frame yang sama harus diantre ulang, bukan dianggap duplikat.
+    monkeypatch.setattr(bukti.cv2, 'imencode', imencode_asli)
+    path_ulang, _ = penyimpan.simpan(frame, 'a')
+    penyimpan.tunggu_kosong()
+    assert path_ulang == path
+    assert os.path.exists(path)
+    assert penyimpan.statistik()['frame_duplikat'] == 0
+
+    penyimpan.simpan(frame, 'a')
+    assert penyimpan.statistik()['frame_duplikat'] == 1
+    penyimpan.hentikan()
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import cache_ocr
+from cache_ocr import CacheOCR
+
+KOTAK_A = (20, 20, 96, 36)
+KOTAK_B = (20, 100, 96, 36)
+KOTAK_C = (200, 100, 96, 36)
+
+
+class BacaUji:
+    # fungsi_baca palsu: satu bbox di tengah setiap kandidat, teks = nomor panggilan.
+    def __init__(self):
+        self.panggilan = []
+
+    def __call__(self, pembaca_ocr, abu, kandidat):
+        self.panggilan.append(list(kandidat))
+        return [([[x + 2, y + 2], [x + w - 2, y + 2], [x + w - 2, y + h - 2], [x + 2, y + h - 2]],
+                 f"T{len(self.panggilan)}", 0.9) for (x, y, w, h) in kandidat]
+
+
+def _pola(benih):
+    return np.random.default_rng(benih).integers(0, 256, (36, 96), dtype=np.uint8)
+
+
+def _frame(*isi):
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    for (x, y, w, h), pola in isi:
+        frame[y:y + h, x:x + w] = pola[:, :, None]
+    return frame
+
+
+def _cache(monkeypatch, **kwargs):
+    jam = SimpleNamespace(sekarang=100.0)
+    monkeypatch.setattr(cache_ocr, 'time', SimpleNamespace(monotonic=lambda: jam.sekarang))
+    baca = BacaUji()
+    return CacheOCR(fungsi_baca=baca, **kwargs), baca, jam
+
+
+def test_crop_sama_hit_crop_berbeda_miss(monkeypatch):
+    cache, baca, _ = _cache(monkeypatch)
+    pola = _pola(1)
+    hasil = cache.baca(None, _frame((KOTAK_A, pola)), [KOTAK_A])
+    assert [teks for _, teks, _ in hasil] == ['T1']
+    assert hasil[0][0][0] == [22, 22]
+
+    # Noise sensor kecil tidak mengubah sidik: hasil lama dipakai, koordinat tetap di frame.
+    bising = np.clip(pola.astype(np.int16) + np.random.default_rng(2).integers(-2, 3, pola.shape), 0, 255).astype(np.uint8)
+    assert cache.baca(None, _frame((KOTAK_A, bising)), [KOTAK_A]) == hasil
+    assert cache.baca(None, _frame((KOTAK_A, _pola(3))), [KOTAK_A])[0][1] == 'T2'
+    statistik = cache.statistik()
+    assert (statistik['hit'], statistik['miss'], statistik['panggilan_ocr']) == (1, 2, 2)
+
+
+def test_semua_miss_dibaca_dalam_satu_panggilan(monkeypatch):
+    cache, baca, _ = _cache(monkeypatch)
+    frame = _frame((KOTAK_A, _pola(1)), (KOTAK_B, _pola(2)))
+    cache.baca(None, frame, [KOTAK_A])
+
+    hasil = cache.baca(None, frame, [KOTAK_A, KOTAK_B])
+    assert baca.panggilan == [[KOTAK_A], [KOTAK_B]]
+    assert [teks for _, teks, _ in hasil] == ['T1', 'T2']
+
+
+def test_crop_sama_di_posisi_lain_tetap_dibaca(monkeypatch):
+    cache, baca, _ = _cache(monkeypatch)
+    pola = _pola(1)
+    cache.baca(None, _frame((KOTAK_B, pola)), [KOTAK_B])
+
+    hasil = cache.baca(None, _frame((KOTAK_C, pola)), [KOTAK_C])
+    assert hasil[0][1] == 'T2' and len(baca.panggilan) == 2
+    assert cache.statistik()['hit'] == 0
+
+
+def test_entri_kedaluwarsa_setelah_ttl(monkeypatch):
+    cache, baca, jam = _cache(monkeypatch, ttl=5.0)
+    frame = _frame((KOTAK_A, _pola(1)))
+    cache.baca(None, frame, [KOTAK_A])
+    jam.sekarang += 4.0
+    assert cache.baca(None, frame, [KOTAK_A])[0][1] == 'T1'
+
+    jam.sekarang += 2.0
+    assert cache.baca(None, frame, [KOTAK_A])[0][1] == 'T2'
+    assert cache.statistik()['kedaluwarsa'] == 1
+
+
+def test_lru_membuang_entri_terlama_dipakai(monkeypatch):
+    cache, baca, _ = _cache(monkeypatch, kapasitas=2)
+    frame = _frame((KOTAK_A, _pola(1)), (KOTAK_B, _pola(2)), (KOTAK_C, _pola(3)))
+    cache.baca(None, frame, [KOTAK_A])
+    cache.baca(None, frame, [KOTAK_B])
+    # A dipakai ulang, jadi B yang terlama saat C masuk.
+    cache.baca(None, frame, [KOTAK_A])
+    cache.baca(None, frame, [KOTAK_C])
+    assert cache.statistik()['dibuang'] == 1
+
+    cache.baca(None, frame, [KOTAK_A])
+    assert len(baca.panggilan) == 3
+    assert cache.baca(None, frame, [KOTAK_B])[0][1] == 'T4'
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from database import buat_database
+from ingest import PenulisIngest
+
+SQL_INSERT = "INSERT INTO t (a) VALUES (%s)"
+
+
+def _db(tmp_path):
+    db = buat_database('sqlite', path_sqlite=str(tmp_path / 'uji.db'), path_skema=None)
+    db.execute("CREATE TABLE t (a INTEGER)")
+    return db
+
+
+def _isi(db):
+    return [baris['a'] for baris in db.query("SELECT a FROM t ORDER BY rowid")]
+
+
+def _perlambat(db, tahan):
+    # Transaksi menunggu tahan dibuka, jadi antrian ingest bisa dibuat penuh.
+    asli = db.transaksi
+
+    @contextmanager
+    def transaksi():
+        tahan.wait(5)
+        with asli() as tx:
+            yield tx
+    db.transaksi = transaksi
+
+
+def test_luapan_antrian_tetap_berurutan(tmp_path):
+    db = _db(tmp_path)
+    tahan = threading.Event()
+    _perlambat(db, tahan)
+    ingest = PenulisIngest(db, {'t': SQL_INSERT}, kapasitas=5, ukuran_batch=3, interval=0.01,
+                           path_jurnal=str(tmp_path / 'jurnal.ndjson'))
+    for i in range(40):
+        ingest.tulis('t', (i,))
+    assert ingest.statistik()['antrian_penuh'] > 0
+    tahan.set()
+
+    assert ingest.flush(timeout=10)
+    assert _isi(db) == list(range(40))
+    assert not os.path.exists(tmp_path / 'jurnal.ndjson')
+    ingest.hentikan()
+
+
+def test_tulis_tidak_menulis_jurnal_di_thread_pemanggil(tmp_path, monkeypatch):
+    db = _db(tmp_path)
+    tahan = threading.Event()
+    _perlambat(db, tahan)
+    ingest = PenulisIngest(db, {'t': SQL_INSERT}, kapasitas=2, path_jurnal=str(tmp_path / 'jurnal.ndjson'))
+    pemanggil = threading.current_thread()
+    dari_pemanggil = []
+    tulis_jurnal = ingest._tulis_jurnal
+
+    def catat(baris):
+        dari_pemanggil.append(threading.current_thread() is pemanggil)
+        tulis_jurnal(baris)
+    monkeypatch.setattr(ingest, '_tulis_jurnal', catat)
+
+    mulai = time.monotonic()
+    for i in range(20):
+        ingest.tulis('t', (i,))
+    assert time.monotonic() - mulai < 1.0
+    tahan.set()
+
+    assert ingest.flush(timeout=10)
+    assert _isi(db) == list(range(20))
+    assert dari_pemanggil and not any(dari_pemanggil)
+    ingest.hentikan()
@@ -0,0 +1,78 @@
+import threading
+
+from notifikasi import BufferNotifikasi
+
+
+def _isi(buffer, jumlah, awal=1):
+    for i in range(awal, awal + jumlah):
+        buffer.tambah(f"pesan {i}", 'info')
+
+
+def _id(daftar):
+    return [entri['id'] for entri in daftar]
+
+
+def test_sejak_saat_ring_meluap():
+    buffer = BufferNotifikasi(kapasitas=3)
+    _isi(buffer, 5)
+
+    assert _id(buffer.sejak(0)) == [3, 4, 5]
+    # Kursor yang sudah terbuang dari ring mendapat semua yang masih tersimpan.
+    assert _id(buffer.sejak(1)) == [3, 4, 5]
+    assert _id(buffer.sejak(3)) == [4, 5]
+    assert buffer.sejak(5) == []
+    assert buffer.sejak(9) == []
+    assert buffer.statistik()['tersimpan'] == 3
+
+
+def test_terbaru_mengembalikan_kursor_atomik():
+    buffer = BufferNotifikasi(kapasitas=10)
+    assert buffer.terbaru(2) == ([], 0)
+    _isi(buffer, 4)
+
+    daftar, kursor = buffer.terbaru(2)
+    assert _id(daftar) == [3, 4] and kursor == 4
+    assert _id(buffer.terbaru(50)[0]) == [1, 2, 3, 4]
+
+
+def test_polling_tanpa_state_dengan_kursor():
+    # Pola X-Notifikasi-Kursor: permintaan pertama tanpa ?since= memakai terbaru(),
+    # berikutnya membawa kursor balik. Dua tab membaca independen, tidak saling menghabiskan.
+    buffer = BufferNotifikasi(kapasitas=5)
+    _isi(buffer, 3)
+    _, kursor_a = buffer.terbaru(20)
+    _, kursor_b = buffer.terbaru(20)
+
+    _isi(buffer, 2, awal=4)
+    daftar = buffer.sejak(kursor_a)
+    assert _id(daftar) == [4, 5]
+    kursor_a = daftar[-1]['id']
+    assert buffer.sejak(kursor_a) == []
+    assert _id(buffer.sejak(kursor_b)) == [4, 5]
+
+
+def test_lanjut_dari_last_event_id():
+    # Klien SSE yang tersambung ulang mengirim id terakhir yang diterimanya;
+    # tunggu() langsung mengembalikan yang terlewat tanpa menunggu notifikasi baru.
+    buffer = BufferNotifikasi(kapasitas=10)
+    _isi(buffer, 3)
+    last_event_id = 1
+    _isi(buffer, 2, awal=4)
+
+    assert _id(buffer.tunggu(last_event_id, timeout=0)) == [2, 3, 4, 5]
+    assert buffer.tunggu(5, timeout=0.01) == []
+
+
+def test_tunggu_dibangunkan_notifikasi_baru_dan_pendengar():
+    buffer = BufferNotifikasi()
+    dipanggil = []
+    buffer.tambah_pendengar(lambda: dipanggil.append(1))
+    hasil = []
+    thread = threading.Thread(target=lambda: hasil.extend(buffer.tunggu(0, timeout=2)))
+    thread.start()
+
+    buffer.tambah('baru', 'success')
+    thread.join(2)
+    assert _id(hasil) == [1] and hasil[0]['message'] == 'baru'
+    assert dipanggil == [1]
+    assert buffer.statistik()['pendengar'] == 1
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from ocr_executor import OCRExecutor
+
+
+class OCRUji:
+    # fungsi_ocr palsu: mencatat setiap batch; bisa ditahan sampai lepas() dipanggil.
+    def __init__(self, tahan=False, durasi=0.0):
+        self.batch = []
+        self.durasi = durasi
+        self._lock = threading.Lock()
+        self._lepas = threading.Event()
+        if not tahan:
+            self._lepas.set()
+        self.mulai = threading.Event()
+        self.aktif = {}
+        self.aktif_maks = {}
+
+    def __call__(self, batch):
+        with self._lock:
+            self.batch.append(list(batch))
+            for kamera_id, _ in batch:
+                self.aktif[kamera_id] = self.aktif.get(kamera_id, 0) + 1
+                self.aktif_maks[kamera_id] = max(self.aktif_maks.get(kamera_id, 0), self.aktif[kamera_id])
+        self.mulai.set()
+        self._lepas.wait(5)
+        time.sleep(self.durasi)
+        with self._lock:
+            for kamera_id, _ in batch:
+                self.aktif[kamera_id] -= 1
+
+    def lepas(self):
+        self._lepas.set()
+
+    def frame(self):
+        return [frame for batch in self.batch for _, frame in batch]
+
+
+def test_antrian_penuh_membuang_frame_terlama():
+    ocr = OCRUji(tahan=True)
+    executor = OCRExecutor(ocr, kapasitas_per_kamera=2)
+    executor.submit(1, 'f0')
+    assert ocr.mulai.wait(2)
+    for nama in ('f1', 'f2', 'f3'):
+        executor.submit(1, nama)
+
+    assert executor.statistik()['kamera'][1]['dibuang'] == 1
+    ocr.lepas()
+    assert executor.tunggu_kosong(timeout=2)
+    assert ocr.frame() == ['f0', 'f2', 'f3']
+    executor.hentikan()
+
+
+def test_round_robin_antar_kamera():
+    ocr = OCRUji(tahan=True)
+    executor = OCRExecutor(ocr, kapasitas_per_kamera=5)
+    executor.submit('a', 'a0')
+    assert ocr.mulai.wait(2)
+    for nama in ('a1', 'a2', 'a3', 'b1', 'b2', 'b3'):
+        executor.submit(nama[0], nama)
+
+    ocr.lepas()
+    assert executor.tunggu_kosong(timeout=2)
+    urutan = [kamera_id for batch in ocr.batch for kamera_id, _ in batch]
+    assert urutan[1:] in (list('ababab'), list('bababa'))
+    # Frame satu kamera tetap diproses sesuai urutan masuk.
+    assert [f for f in ocr.frame() if f[0] == 'a'] == ['a0', 'a1', 'a2', 'a3']
+    executor.hentikan()
+
+
+def test_satu_kamera_hanya_di_satu_worker():
+    ocr = OCRUji(durasi=0.01)
+    executor = OCRExecutor(ocr, jumlah_worker=3, kapasitas_per_kamera=50)
+    for i in range(20):
+        executor.submit('a', i)
+        executor.submit('b', i)
+
+    assert executor.tunggu_kosong(timeout=5)
+    assert ocr.aktif_maks == {'a': 1, 'b': 1}
+    assert [f for batch in ocr.batch for k, f in batch if k == 'a'] == list(range(20))
+    executor.hentikan()
+
+
+def test_micro_batch_dibatasi_ukuran():
+    ocr = OCRUji()
+    executor = OCRExecutor(ocr, maks_batch=3, maks_tunggu=0.3)
+    for kamera_id in range(5):
+        executor.submit(kamera_id, kamera_id)
+
+    assert executor.tunggu_kosong(timeout=2)
+    assert [len(batch) for batch in ocr.batch] == [3, 2]
+    assert executor.statistik()['batch_terbesar'] == 3
+    executor.hentikan()
+
+
+def test_micro_batch_menunggu_maks_tunggu():
+    ocr = OCRUji()
+    executor = OCRExecutor(ocr, maks_batch=4, maks_tunggu=0.2)
+    mulai = time.monotonic()
+    executor.submit(1, 'f0')
+    assert ocr.mulai.wait(2)
+    assert time.monotonic() - mulai >= 0.15
+    assert [len(batch) for batch in ocr.batch] == [1]
+    executor.hentikan()
+
+
+def test_tunggu_kosong_menunggu_batch_berjalan():
+    ocr = OCRUji(tahan=True)
+    executor = OCRExecutor(ocr)
+    executor.submit(1, 'f0')
+    assert ocr.mulai.wait(2)
+
+    assert not executor.tunggu_kosong(timeout=0.1)
+    assert not executor.tunggu_kosong(kamera_id=1, timeout=0.05)
+    assert executor.tunggu_kosong(kamera_id=2, timeout=0.05)
+    ocr.lepas()
+    assert executor.tunggu_kosong(timeout=2)
+    assert executor.statistik()['kamera'][1]['selesai'] == 1
+    executor.hentikan()
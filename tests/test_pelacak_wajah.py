@@ -0,0 +1,67 @@
+from pelacak_wajah import PelacakIoU
+
+
+def _langkah(pelacak, kotak_deteksi):
+    pelacak.prediksi()
+    return pelacak.perbarui(kotak_deteksi)
+
+
+def test_deteksi_dipasangkan_ke_jejak_yang_sama():
+    pelacak = PelacakIoU()
+    baru = _langkah(pelacak, [(100, 100, 50, 50), (300, 100, 50, 50)])
+    assert [jejak.id for jejak in baru] == [1, 2]
+
+    # Urutan deteksi tidak menentukan id: pasangan dipilih menurut IoU.
+    assert _langkah(pelacak, [(305, 102, 50, 50), (104, 101, 50, 50)]) == []
+    kotak = {jejak.id: jejak.kotak for jejak in pelacak.jejak}
+    assert kotak == {1: (104, 101, 50, 50), 2: (305, 102, 50, 50)}
+    assert _langkah(pelacak, [(500, 300, 40, 40)])[0].id == 3
+
+
+def test_prediksi_kecepatan_menjaga_jejak_di_antara_deteksi():
+    pelacak = PelacakIoU()
+    _langkah(pelacak, [(100, 100, 40, 40)])
+    _langkah(pelacak, [(120, 100, 40, 40)])
+    # Dua frame tanpa deteksi: kotak terus maju 20 px per frame.
+    pelacak.prediksi()
+    pelacak.prediksi()
+    assert pelacak.jejak[0].kotak == (160, 100, 40, 40)
+
+    # Deteksi yang jauh dari kotak lama tetap cocok dengan posisi prediksi.
+    assert _langkah(pelacak, [(180, 100, 40, 40)]) == []
+    jejak = pelacak.jejak[0]
+    assert jejak.id == 1 and jejak.kecepatan == (20.0, 0.0)
+
+
+def test_jejak_dibuang_setelah_maks_hilang():
+    pelacak = PelacakIoU(maks_hilang=2)
+    _langkah(pelacak, [(100, 100, 50, 50)])
+    for _ in range(2):
+        _langkah(pelacak, [])
+    assert [jejak.hilang for jejak in pelacak.jejak] == [2]
+
+    _langkah(pelacak, [])
+    assert pelacak.jejak == []
+    # Wajah yang sama muncul lagi mendapat jejak (dan id) baru.
+    assert _langkah(pelacak, [(100, 100, 50, 50)])[0].id == 2
+
+
+def test_deteksi_ulang_mengatur_ulang_hitungan_hilang():
+    pelacak = PelacakIoU(maks_hilang=1)
+    _langkah(pelacak, [(100, 100, 50, 50)])
+    for _ in range(3):
+        _langkah(pelacak, [])
+        _langkah(pelacak, [(100, 100, 50, 50)])
+    assert [(jejak.id, jejak.hilang) for jejak in pelacak.jejak] == [(1, 0)]
+
+
+def test_jejak_terkonfirmasi_setelah_min_deteksi():
+    pelacak = PelacakIoU()
+    jejak = _langkah(pelacak, [(100, 100, 50, 50)])[0]
+    assert not jejak.terkonfirmasi()
+
+    _langkah(pelacak, [])
+    assert not jejak.terkonfirmasi()
+    _langkah(pelacak, [(102, 100, 50, 50)])
+    assert jejak.terkonfirmasi() and jejak.jumlah_deteksi == 2
+    assert not jejak.terkonfirmasi(min_deteksi=3)
@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from penjadwal import Penjadwal
+
+
+class Catatan:
+    def __init__(self):
+        self.isi = []
+        self._kondisi = threading.Condition()
+
+    def catat(self, nilai):
+        with self._kondisi:
+            self.isi.append(nilai)
+            self._kondisi.notify_all()
+
+    def tunggu(self, jumlah, timeout=2):
+        with self._kondisi:
+            return self._kondisi.wait_for(lambda: len(self.isi) >= jumlah, timeout)
+
+
+def test_urutan_menurut_tenggat_lalu_urutan_jadwal():
+    penjadwal = Penjadwal()
+    catatan = Catatan()
+    penjadwal.jadwalkan(0.2, catatan.catat, 'c')
+    penjadwal.jadwalkan(0.05, catatan.catat, 'a')
+    penjadwal.jadwalkan(0.1, catatan.catat, 'b1')
+    penjadwal.jadwalkan(0.1, catatan.catat, 'b2')
+
+    assert catatan.tunggu(4)
+    assert catatan.isi == ['a', 'b1', 'b2', 'c']
+    penjadwal.hentikan(1)
+
+
+def test_kunci_sama_menggantikan_jadwal_lama():
+    penjadwal = Penjadwal()
+    catatan = Catatan()
+    penjadwal.jadwalkan(0.05, catatan.catat, 'lama', kunci=('tenggat', 1))
+    penjadwal.jadwalkan(0.15, catatan.catat, 'baru', kunci=('tenggat', 1))
+    penjadwal.jadwalkan(0.05, catatan.catat, 'lain', kunci=('tenggat', 2))
+
+    assert catatan.tunggu(2)
+    time.sleep(0.2)
+    assert catatan.isi == ['lain', 'baru']
+    assert penjadwal.statistik()['berkunci'] == 0
+    penjadwal.hentikan(1)
+
+
+def test_tugas_menjadwalkan_ulang_kuncinya_sendiri():
+    # Tugas boleh menjadwalkan ulang kuncinya sendiri (pola tenggat yang diperpanjang).
+    penjadwal = Penjadwal()
+    catatan = Catatan()
+
+    def tugas(ke):
+        catatan.catat(ke)
+        if ke < 3:
+            penjadwal.jadwalkan(0.01, tugas, ke + 1, kunci='ulang')
+    penjadwal.jadwalkan(0.01, tugas, 1, kunci='ulang')
+
+    assert catatan.tunggu(3)
+    assert catatan.isi == [1, 2, 3]
+    penjadwal.hentikan(1)
+
+
+def test_batalkan():
+    penjadwal = Penjadwal()
+    catatan = Catatan()
+    penjadwal.jadwalkan(0.1, catatan.catat, 'batal', kunci='a')
+    penjadwal.jadwalkan(0.15, catatan.catat, 'jalan', kunci='b')
+
+    assert penjadwal.batalkan('a')
+    assert not penjadwal.batalkan('a')
+    assert not penjadwal.batalkan('tidak-ada')
+    assert catatan.tunggu(1)
+    time.sleep(0.05)
+    assert catatan.isi == ['jalan']
+    assert penjadwal.statistik()['dibatalkan'] == 1
+    penjadwal.hentikan(1)
+
+
+def test_batalkan_jika():
+    penjadwal = Penjadwal()
+    catatan = Catatan()
+    for i in range(3):
+        penjadwal.jadwalkan(0.1, catatan.catat, ('tenggat', i), kunci=('tenggat', i))
+    penjadwal.jadwalkan(0.1, catatan.catat, ('kamera', 1), kunci=('kamera', 1))
+
+    penjadwal.batalkan_jika(lambda kunci: kunci[0] == 'tenggat')
+
+    assert catatan.tunggu(1)
+    time.sleep(0.1)
+    assert catatan.isi == [('kamera', 1)]
+    assert penjadwal.statistik()['dibatalkan'] == 3
+    penjadwal.hentikan(1)
+
+
+def test_jadwalkan_pada_dan_tugas_gagal_tidak_menghentikan_loop():
+    penjadwal = Penjadwal()
+    catatan = Catatan()
+
+    def gagal():
+        raise RuntimeError("uji")
+    penjadwal.jadwalkan(0.01, gagal)
+    penjadwal.jadwalkan_pada(datetime.now() + timedelta(seconds=0.05), catatan.catat, 'setelah gagal')
+    penjadwal.jadwalkan_pada(datetime.now() - timedelta(seconds=5), catatan.catat, 'lewat')
+
+    assert catatan.tunggu(2)
+    assert catatan.isi == ['lewat', 'setelah gagal']
+    statistik = penjadwal.statistik()
+    assert statistik['gagal'] == 1 and statistik['dijalankan'] == 2
+    assert statistik['terjadwal'] == 0
+    penjadwal.hentikan(1)
@@ -0,0 +1,117 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import statistik
+from database import buat_database
+from statistik import StatistikHarian
+
+# Rabu; awal minggu 2024-05-13, awal bulan 2024-05-01.
+HARI = date(2024, 5, 15)
+
+
+class Kalender:
+    def __init__(self, monkeypatch, hari):
+        self.hari = hari
+        kalender = self
+
+        class Tanggal(date):
+            @classmethod
+            def today(cls):
+                return kalender.hari
+        monkeypatch.setattr(statistik, 'date', Tanggal)
+
+
+def _db(tmp_path):
+    return buat_database('sqlite', path_sqlite=str(tmp_path / 'uji.db'))
+
+
+def _catat(stat, perubahan):
+    # Urutan yang sama dengan PenyimpanTrip: tulis di transaksi, terapkan setelah commit.
+    with stat.db.transaksi() as tx:
+        stat.tulis(tx, perubahan)
+    stat.terapkan(perubahan)
+
+
+def _baru(stat, hari, tujuan='Gudang'):
+    _catat(stat, StatistikHarian.perubahan_baru(datetime.combine(hari, datetime.min.time()), tujuan))
+
+
+def test_ringkasan_total_minggu_bulan(tmp_path, monkeypatch):
+    Kalender(monkeypatch, HARI)
+    stat = StatistikHarian(_db(tmp_path))
+    stat.muat()
+    _baru(stat, date(2024, 4, 30))
+    _baru(stat, date(2024, 5, 2))
+    _baru(stat, date(2024, 5, 14))
+    stat.muat()
+    _baru(stat, HARI, 'Pabrik')
+    _baru(stat, HARI)
+    _catat(stat, StatistikHarian.perubahan_status(HARI, 'Pabrik', 'Pending', 'Sesuai'))
+
+    ringkasan = stat.ringkasan()
+    assert ringkasan['total'] == 5
+    assert ringkasan['bulan_ini'] == 4
+    assert ringkasan['minggu_ini'] == 3
+    assert ringkasan['hari_ini'] == 2
+    assert ringkasan['hari_ini_per_tujuan'] == {'Pabrik': 1, 'Gudang': 1}
+    assert ringkasan['hari_ini_per_status'] == {'Sesuai': 1, 'Pending': 1}
+
+
+def test_muat_membangun_rollup_dari_perjalanan(tmp_path, monkeypatch):
+    Kalender(monkeypatch, HARI)
+    db = _db(tmp_path)
+    for waktu, status in ((datetime(2024, 5, 1, 8), 'Sesuai'), (datetime(2024, 5, 15, 9), 'Pending')):
+        db.execute("INSERT INTO perjalanan (nama_pengunjung, nomor_plat, tujuan, waktu_mulai, status) "
+                   "VALUES (%s, %s, %s, %s, %s)", ('Budi', 'B1', 'Gudang', waktu, status))
+    stat = StatistikHarian(db)
+    stat.muat()
+
+    ringkasan = stat.ringkasan()
+    assert (ringkasan['total'], ringkasan['hari_ini']) == (2, 1)
+    assert ringkasan['hari_ini_per_status'] == {'Pending': 1}
+
+
+def test_pergantian_hari_tanpa_hitung_ganda(tmp_path, monkeypatch):
+    kalender = Kalender(monkeypatch, HARI)
+    stat = StatistikHarian(_db(tmp_path))
+    stat.muat()
+    _baru(stat, HARI)
+    besok = HARI + timedelta(days=1)
+    # Sudah lewat tengah malam, tetapi ringkasan() belum dipanggil.
+    _baru(stat, besok)
+    _baru(stat, besok, 'Pabrik')
+
+    kalender.hari = besok
+    ringkasan = stat.ringkasan()
+    assert ringkasan['hari_ini'] == 2
+    assert ringkasan['total'] == 3
+    assert ringkasan['hari_ini_per_tujuan'] == {'Gudang': 1, 'Pabrik': 1}
+
+
+def test_terapkan_saat_pergantian_hari_tidak_hilang(tmp_path, monkeypatch):
+    kalender = Kalender(monkeypatch, HARI)
+    db = _db(tmp_path)
+    stat = StatistikHarian(db)
+    stat.muat()
+    besok = HARI + timedelta(days=1)
+    kalender.hari = besok
+
+    # Commit hari baru terjadi tepat saat ringkasan() sedang memuat rollup hari lalu.
+    query_one_asli = db.query_one
+    threads = []
+
+    def query_one(sql, params=()):
+        if not threads:
+            thread = threading.Thread(target=_baru, args=(stat, besok))
+            threads.append(thread)
+            thread.start()
+            thread.join(0.2)
+        return query_one_asli(sql, params)
+    monkeypatch.setattr(db, 'query_one', query_one)
+
+    stat.ringkasan()
+    threads[0].join(2)
+    monkeypatch.setattr(db, 'query_one', query_one_asli)
+    ringkasan = stat.ringkasan()
+    assert ringkasan['hari_ini'] == 1
+    assert ringkasan['total'] == 1
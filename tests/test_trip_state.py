@@ -0,0 +1,53 @@
+import pytest
+
+from database import DatabaseError, buat_database
+from trip_state import PenyimpanTrip
+
+
+class IngestUji:
+    def __init__(self):
+        self.baris = []
+
+    def tulis(self, nama, params):
+        self.baris.append((nama, params))
+
+    def flush(self, timeout=None):
+        return True
+
+
+def _penyimpan(tmp_path):
+    db = buat_database('sqlite', path_sqlite=str(tmp_path / 'uji.db'))
+    ingest = IngestUji()
+    return db, ingest, PenyimpanTrip(db, {'Gudang': [1, 2]}, ingest=ingest)
+
+
+def test_checkpoint_tengah_lewat_ingest(tmp_path):
+    db, ingest, penyimpan = _penyimpan(tmp_path)
+    trip = penyimpan.tambah('Budi', 'B1234XY', 'Gudang')
+
+    assert not penyimpan.catat_deteksi(trip, 'B1234XY', 'a.jpg', 0.9, 1)
+
+    assert [nama for nama, _ in ingest.baris] == ['deteksi', 'foto_pertama']
+    assert db.query("SELECT id FROM deteksi") == []
+
+
+def test_checkpoint_terakhir_gagal_tidak_meninggalkan_deteksi(tmp_path):
+    db, ingest, penyimpan = _penyimpan(tmp_path)
+    trip = penyimpan.tambah('Budi', 'B1234XY', 'Gudang')
+    penyimpan.catat_deteksi(trip, 'B1234XY', 'a.jpg', 0.9, 1)
+    ingest.baris.clear()
+
+    transaksi_asli = db.transaksi
+    db.transaksi = lambda: (_ for _ in ()).throw(DatabaseError('db mati'))
+    with pytest.raises(DatabaseError):
+        penyimpan.catat_deteksi(trip, 'B1234XY', 'b.jpg', 0.9, 2)
+    assert ingest.baris == []
+    assert penyimpan.cari('B1234XY') is trip
+    assert trip.kamera_berikutnya == 2
+
+    db.transaksi = transaksi_asli
+    assert penyimpan.catat_deteksi(trip, 'B1234XY', 'b.jpg', 0.9, 2)
+    assert ingest.baris == []
+    assert [b['kamera_id'] for b in db.query("SELECT kamera_id FROM deteksi")] == [2]
+    assert db.query_one("SELECT status FROM perjalanan WHERE id = %s", (trip.id,))['status'] == 'Sesuai'
+    assert penyimpan.cari('B1234XY') is None
@@ -0,0 +1,44 @@
+import random
+
+from voting_plat import IndeksPlat, jarak_plat
+
+HURUF = '0OD38B15SIT2Z6G7AX'
+
+
+def _brute_force(daftar_plat, teks, maks_jarak):
+    return sorted((jarak_plat(teks, plat), plat) for plat in set(daftar_plat) if jarak_plat(teks, plat) <= maks_jarak)
+
+
+def _indeks(daftar_plat, maks_jarak):
+    indeks = IndeksPlat(maks_jarak=maks_jarak)
+    indeks.perbarui(daftar_plat)
+    return indeks
+
+
+def test_jarak_konfusi_berantai_tidak_metrik():
+    # Alasan IndeksPlat tidak boleh memakai BK-tree.
+    assert jarak_plat('3', 'B') + jarak_plat('B', '8') < jarak_plat('3', '8')
+
+
+def test_konfusi_berantai_tetap_ditemukan():
+    assert _indeks(['3', '8'], 0.3).cari('B') == [(0.3, '3'), (0.3, '8')]
+    plat = ['888888', 'BB83B8', 'B883B8']
+    assert _indeks(plat, 1.5).cari('338338') == _brute_force(plat, '338338', 1.5) != []
+
+
+def test_cari_sama_dengan_brute_force():
+    acak = random.Random(13)
+    for _ in range(2000):
+        panjang = acak.randint(1, 6)
+        plat = [''.join(acak.choice(HURUF) for _ in range(acak.randint(max(1, panjang - 1), panjang + 1)))
+                for _ in range(acak.randint(1, 12))]
+        teks = ''.join(acak.choice(HURUF) for _ in range(panjang))
+        maks_jarak = acak.choice((0.3, 0.6, 1.0, 1.5, 2.0))
+        assert _indeks(plat, maks_jarak).cari(teks) == _brute_force(plat, teks, maks_jarak)
+
+
+def test_cocokkan_menolak_ambigu():
+    indeks = _indeks(['B1234XYZ', 'B1234XY2'], 1.5)
+    assert indeks.cocokkan('81234XYZ') == (None, None)
+    indeks = _indeks(['B1234XYZ', 'D9999AA'], 1.5)
+    assert indeks.cocokkan('81234XYZ') == ('B1234XYZ', 0.3)
@@ -0,0 +1,214 @@
+import threading
+from datetime import datetime
+
+from database import DatabaseError
+
+# =============================
+# State Perjalanan di Memori
+# =============================
+#
+# Sumber kebenaran untuk perjalanan berstatus Pending selama aplikasi
+# berjalan: diindeks per nomor plat yang sudah dinormalisasi, menyimpan
+# progres rute RUTE_KAMERA, dan menulis langsung (write-through) ke DB.
+# Dibangun ulang dari DB saat startup lewat muat_ulang(). Jika diberi objek
+# statistik, rollup harian ikut diperbarui di transaksi yang sama.
+#
+# Jika diberi PenulisIngest, baris deteksi dan foto pertama perjalanan
+# ditulis write-behind (PERINTAH_INGEST) dan hanya perubahan status
+# perjalanan (bersama deteksi checkpoint terakhir, dalam satu transaksi)
+# yang tetap ditulis sinkron; checkpoint di tengah rute tidak
+# menyentuh DB sama sekali di thread OCR. Baris deteksi bisa tertinggal
+# sampai satu interval ingest di belakang status perjalanan, jadi
+# muat_ulang() dan sinkronkan() menuntaskan ingest (antrian dan jurnal)
+# lebih dulu; jika belum bisa, state lama di memori dipertahankan.
+
+TIMEOUT_FLUSH_INGEST = 10
+
+PERINTAH_INGEST = {
+    'deteksi': "INSERT INTO deteksi (perjalanan_id, nomor_plat, waktu_deteksi, path_foto, path_crop, confidence, kamera_id) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+    'foto_pertama': "UPDATE perjalanan SET path_foto_pertama = %s WHERE id = %s AND path_foto_pertama IS NULL",
+}
+
+
+class StatusTrip:
+    __slots__ = ('id', 'nomor_plat', 'tujuan', 'rute', 'kamera_terdeteksi', 'waktu_mulai', 'waktu_terakhir')
+
+    def __init__(self, id, nomor_plat, tujuan, rute, waktu_mulai):
+        self.id = id
+        self.nomor_plat = nomor_plat
+        self.tujuan = tujuan
+        self.rute = list(rute)
+        self.kamera_terdeteksi = []
+        self.waktu_mulai = waktu_mulai
+        self.waktu_terakhir = waktu_mulai
+
+    @property
+    def kamera_berikutnya(self):
+        indeks = len(self.kamera_terdeteksi)
+        return self.rute[indeks] if indeks < len(self.rute) else None
+
+    @property
+    def checkpoint_terakhir(self):
+        return len(self.kamera_terdeteksi) + 1 == len(self.rute)
+
+    def catat_kamera(self, kamera_id, waktu):
+        if kamera_id not in self.kamera_terdeteksi:
+            self.kamera_terdeteksi.append(kamera_id)
+        if waktu and waktu > self.waktu_terakhir:
+            self.waktu_terakhir = waktu
+
+
+class PenyimpanTrip:
+    def __init__(self, db, rute_kamera, statistik=None, ingest=None):
+        self.db = db
+        self.rute_kamera = rute_kamera
+        self.statistik = statistik
+        self.ingest = ingest
+        # RLock: pemanggil boleh memegang lock selama memutuskan + menulis.
+        self.lock = threading.RLock()
+        self._per_plat = {}
+        self._per_id = {}
+
+    def _buat(self, baris):
+        return StatusTrip(baris['id'], baris['nomor_plat'], baris['tujuan'],
+                          self.rute_kamera.get(baris['tujuan'], []), baris['waktu_mulai'])
+
+    def _indeks(self, trip):
+        self._per_id[trip.id] = trip
+        daftar = self._per_plat.setdefault(trip.nomor_plat, [])
+        daftar.append(trip)
+        daftar.sort(key=lambda t: (t.waktu_mulai, t.id))
+
+    def _lepas(self, trip):
+        self._per_id.pop(trip.id, None)
+        daftar = self._per_plat.get(trip.nomor_plat)
+        if daftar:
+            daftar[:] = [t for t in daftar if t.id != trip.id]
+            if not daftar:
+                del self._per_plat[trip.nomor_plat]
+
+    def tuntaskan_ingest(self):
+        if self.ingest is not None and not self.ingest.flush(timeout=TIMEOUT_FLUSH_INGEST):
+            raise DatabaseError("Baris deteksi di antrian/jurnal ingest belum tertulis ke database")
+
+    def muat_ulang(self):
+        self.tuntaskan_ingest()
+        perjalanan = self.db.query("SELECT id, nomor_plat, tujuan, waktu_mulai FROM perjalanan WHERE status = 'Pending'")
+        deteksi = self.db.query("SELECT d.perjalanan_id, d.kamera_id, d.waktu_deteksi FROM deteksi d "
+                                "JOIN perjalanan p ON p.id = d.perjalanan_id "
+                                "WHERE p.status = 'Pending' ORDER BY d.waktu_deteksi ASC")
+        with self.lock:
+            self._per_plat = {}
+            self._per_id = {}
+            for baris in perjalanan:
+                self._indeks(self._buat(baris))
+            for baris in deteksi:
+                trip = self._per_id.get(baris['perjalanan_id'])
+                if trip:
+                    trip.catat_kamera(baris['kamera_id'], baris['waktu_deteksi'])
+        print(f"✅ State perjalanan dimuat: {len(perjalanan)} perjalanan Pending.")
+
+    def sinkronkan(self, perjalanan_id):
+        self.tuntaskan_ingest()
+        baris = self.db.query_one("SELECT id, nomor_plat, tujuan, waktu_mulai, status FROM perjalanan WHERE id = %s", (perjalanan_id,))
+        deteksi = []
+        if baris and baris['status'] == 'Pending':
+            deteksi = self.db.query("SELECT kamera_id, waktu_deteksi FROM deteksi WHERE perjalanan_id = %s ORDER BY waktu_deteksi ASC", (perjalanan_id,))
+        with self.lock:
+            lama = self._per_id.get(int(perjalanan_id))
+            if lama:
+                self._lepas(lama)
+            if baris and baris['status'] == 'Pending':
+                trip = self._buat(baris)
+                for d in deteksi:
+                    trip.catat_kamera(d['kamera_id'], d['waktu_deteksi'])
+                self._indeks(trip)
+
+    # ---- baca ----
+
+    def cari(self, nomor_plat):
+        with self.lock:
+            daftar = self._per_plat.get(nomor_plat)
+            return daftar[0] if daftar else None
+
+    def ambil(self, perjalanan_id):
+        with self.lock:
+            return self._per_id.get(perjalanan_id)
+
+    def terbaru(self):
+        with self.lock:
+            if not self._per_id:
+                return None
+            return max(self._per_id.values(), key=lambda t: (t.waktu_mulai, t.id))
+
+    def semua(self):
+        with self.lock:
+            return list(self._per_id.values())
+
+    def plat_pending(self):
+        with self.lock:
+            return list(self._per_plat)
+
+    # ---- tulis (write-through) ----
+
+    def tambah(self, nama_pengunjung, nomor_plat, tujuan):
+        waktu = datetime.now()
+        perubahan = self.statistik.perubahan_baru(waktu, tujuan) if self.statistik else []
+        with self.db.transaksi() as tx:
+            hasil = tx.execute("INSERT INTO perjalanan (nama_pengunjung, nomor_plat, tujuan, waktu_mulai, status) VALUES (%s, %s, %s, %s, %s)",
+                               (nama_pengunjung, nomor_plat, tujuan, waktu, 'Pending'))
+            self._tulis_statistik(tx, perubahan)
+        self._terapkan_statistik(perubahan)
+        trip = StatusTrip(hasil.lastrowid, nomor_plat, tujuan, self.rute_kamera.get(tujuan, []), waktu)
+        with self.lock:
+            self._indeks(trip)
+        return trip
+
+    def _perubahan_status(self, trip, status_baru):
+        if not self.statistik:
+            return []
+        return self.statistik.perubahan_status(trip.waktu_mulai, trip.tujuan, 'Pending', status_baru)
+
+    def _tulis_statistik(self, tx, perubahan):
+        if perubahan:
+            self.statistik.tulis(tx, perubahan)
+
+    def _terapkan_statistik(self, perubahan):
+        if perubahan:
+            self.statistik.terapkan(perubahan)
+
+    def catat_deteksi(self, trip, nomor_plat, path_foto, confidence, kamera_id, path_crop=None):
+        # Mengembalikan True jika deteksi ini menyelesaikan rute.
+        waktu = datetime.now()
+        with self.lock:
+            selesai = trip.checkpoint_terakhir
+            perubahan = self._perubahan_status(trip, 'Sesuai') if selesai else []
+            params_deteksi = (trip.id, nomor_plat, waktu, path_foto, path_crop, confidence, kamera_id)
+            if self.ingest is not None and not selesai:
+                self.ingest.tulis('deteksi', params_deteksi)
+                if not trip.kamera_terdeteksi:
+                    self.ingest.tulis('foto_pertama', (path_foto, trip.id))
+            else:
+                # Checkpoint terakhir: deteksi ditulis di transaksi yang sama dengan status 'Sesuai',
+                # jadi jika transaksi gagal tidak ada baris deteksi yatim yang nanti tercatat dua kali.
+                with self.db.transaksi() as tx:
+                    tx.execute(PERINTAH_INGEST['deteksi'], params_deteksi, prepared=True)
+                    if not trip.kamera_terdeteksi:
+                        tx.execute(PERINTAH_INGEST['foto_pertama'], (path_foto, trip.id))
+                    if selesai:
+                        tx.execute("UPDATE perjalanan SET status = 'Sesuai', waktu_selesai = %s WHERE id = %s", (waktu, trip.id))
+                    self._tulis_statistik(tx, perubahan)
+            self._terapkan_statistik(perubahan)
+            trip.catat_kamera(kamera_id, waktu)
+            if selesai:
+                self._lepas(trip)
+        return selesai
+
+    def tutup(self, trip, status):
+        with self.lock:
+            perubahan = self._perubahan_status(trip, status)
+            with self.db.transaksi() as tx:
+                tx.execute("UPDATE perjalanan SET status = %s, waktu_selesai = %s WHERE id = %s", (status, datetime.now(), trip.id))
+                self._tulis_statistik(tx, perubahan)
+            self._terapkan_statistik(perubahan)
+            self._lepas(trip)
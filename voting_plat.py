@@ -0,0 +1,205 @@
+import threading
+import time
+
+from lokalisasi_plat import iou
+
+# =============================
+# Voting Plat Antar-Frame + Pencocokan Fuzzy
+# =============================
+#
+# Satu bacaan OCR belum dianggap deteksi. Bacaan dikelompokkan menjadi jejak
+# per kamera (berdasarkan posisi kotak atau kemiripan teks), tiap kandidat
+# teks mengumpulkan suara berbobot confidence, dan plat baru dikirim ke
+# proses_deteksi setelah stabil. Teks dicocokkan dulu ke plat perjalanan
+# Pending dengan jarak edit yang murah untuk karakter yang sering tertukar
+# (0/O, 8/B, 1/I, ...), jadi "81234XXX" dihitung sebagai suara untuk
+# "B1234XXX". Jejak yang sudah terkonfirmasi tidak di-OCR lagi.
+#
+# Jarak ini BUKAN metrik: biaya konfusi berantai (3~B 0.3, B~8 0.3, tetapi
+# 3~8 1.0) melanggar ketaksamaan segitiga, jadi struktur yang memangkas
+# dengan ketaksamaan segitiga (BK-tree) bisa melewatkan kecocokan. Plat
+# Pending hanya sedikit, jadi IndeksPlat memindai semuanya; satu-satunya
+# pemangkasan memakai selisih panjang, batas bawah yang sah karena setiap
+# sisip/hapus berbiaya 1.
+
+BIAYA_KONFUSI = 0.3
+PASANGAN_KONFUSI = ('0O', '0D', '0Q', '1I', '1L', '1T', '2Z', '3B', '4A', '5S', '5B', '6G', '7T', '8B')
+_KONFUSI = frozenset(p for a, b in PASANGAN_KONFUSI for p in (a + b, b + a))
+
+
+def jarak_plat(a, b):
+    # Levenshtein berbobot: sisip/hapus 1, tukar 1 atau BIAYA_KONFUSI untuk
+    # pasangan yang mirip.
+    if a == b:
+        return 0.0
+    sebelumnya = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        sekarang = [float(i)]
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                biaya = 0.0
+            elif ca + cb in _KONFUSI:
+                biaya = BIAYA_KONFUSI
+            else:
+                biaya = 1.0
+            sekarang.append(min(sebelumnya[j] + 1, sekarang[j - 1] + 1, sebelumnya[j - 1] + biaya))
+        sebelumnya = sekarang
+    return sebelumnya[-1]
+
+
+class IndeksPlat:
+    def __init__(self, maks_jarak=1.5, selisih_ambigu=1.0):
+        self.maks_jarak = maks_jarak
+        self.selisih_ambigu = selisih_ambigu
+        self._plat = frozenset()
+        self._urut = ()
+
+    def perbarui(self, daftar_plat):
+        plat = frozenset(daftar_plat)
+        if plat != self._plat:
+            self._urut = tuple(sorted(plat))
+            self._plat = plat
+
+    def cari(self, teks):
+        # Semua (jarak, plat) dengan jarak <= maks_jarak, terurut dari yang terdekat.
+        hasil = []
+        for plat in self._urut:
+            if abs(len(plat) - len(teks)) > self.maks_jarak:
+                continue
+            jarak = jarak_plat(teks, plat)
+            if jarak <= self.maks_jarak:
+                hasil.append((jarak, plat))
+        hasil.sort()
+        return hasil
+
+    def __contains__(self, plat):
+        return plat in self._plat
+
+    def cocokkan(self, teks):
+        # (plat, jarak) jika ada satu plat Pending terdekat yang tidak ambigu.
+        kandidat = self.cari(teks)
+        if not kandidat:
+            return None, None
+        if len(kandidat) > 1 and kandidat[1][0] - kandidat[0][0] < self.selisih_ambigu:
+            return None, None
+        jarak, plat = kandidat[0]
+        return plat, jarak
+
+
+def kotak_dari_bbox(bbox):
+    xs = [p[0] for p in bbox]
+    ys = [p[1] for p in bbox]
+    return (int(min(xs)), int(min(ys)), max(1, int(max(xs) - min(xs))), max(1, int(max(ys) - min(ys))))
+
+
+class _Jejak:
+    __slots__ = ('kotak', 'suara', 'waktu_terakhir', 'plat')
+
+    def __init__(self, kotak, waktu):
+        self.kotak = kotak
+        self.suara = {}
+        self.waktu_terakhir = waktu
+        self.plat = None
+
+    @property
+    def pemimpin(self):
+        if self.plat:
+            return self.plat
+        return max(self.suara, key=lambda k: self.suara[k][0]) if self.suara else ''
+
+
+class PemungutSuaraPlat:
+    def __init__(self, indeks, min_baca=2, min_baca_anomali=3, ambang_bobot=1.0, porsi_menang=0.6,
+                 conf_langsung=0.7, ttl=6.0, ttl_terkonfirmasi=15.0, iou_jejak=0.3, jarak_jejak=2.0):
+        self.indeks = indeks
+        self.min_baca = min_baca
+        self.min_baca_anomali = min_baca_anomali
+        self.ambang_bobot = ambang_bobot
+        self.porsi_menang = porsi_menang
+        self.conf_langsung = conf_langsung
+        self.ttl = ttl
+        self.ttl_terkonfirmasi = ttl_terkonfirmasi
+        self.iou_jejak = iou_jejak
+        self.jarak_jejak = jarak_jejak
+        self._lock = threading.Lock()
+        self._jejak = {}
+        self._statistik = {'bacaan': 0, 'bacaan_dikoreksi': 0, 'dikonfirmasi': 0, 'diabaikan_terkonfirmasi': 0,
+                           'jejak_kedaluwarsa': 0}
+
+    def _bersihkan(self, kamera_id, waktu):
+        daftar = self._jejak.get(kamera_id, [])
+        aktif = [j for j in daftar
+                 if waktu - j.waktu_terakhir <= (self.ttl_terkonfirmasi if j.plat else self.ttl)]
+        self._statistik['jejak_kedaluwarsa'] += len(daftar) - len(aktif)
+        self._jejak[kamera_id] = aktif
+        return aktif
+
+    def _cari_jejak(self, daftar, kotak, kunci):
+        for jejak in daftar:
+            if iou(kotak, jejak.kotak) >= self.iou_jejak:
+                return jejak
+        for jejak in daftar:
+            if jarak_plat(kunci, jejak.pemimpin) <= self.jarak_jejak:
+                return jejak
+        return None
+
+    def tambah_bacaan(self, kamera_id, bbox, teks, conf, waktu=None):
+        # Mengembalikan (plat, confidence) saat jejak baru saja terkonfirmasi, selain itu None.
+        waktu = time.monotonic() if waktu is None else waktu
+        kotak = kotak_dari_bbox(bbox)
+        plat_pending, _ = self.indeks.cocokkan(teks)
+        kunci = plat_pending or teks
+        with self._lock:
+            self._statistik['bacaan'] += 1
+            if plat_pending and plat_pending != teks:
+                self._statistik['bacaan_dikoreksi'] += 1
+            daftar = self._bersihkan(kamera_id, waktu)
+            jejak = self._cari_jejak(daftar, kotak, kunci)
+            if jejak is None:
+                jejak = _Jejak(kotak, waktu)
+                daftar.append(jejak)
+            jejak.kotak = kotak
+            jejak.waktu_terakhir = waktu
+            if jejak.plat:
+                self._statistik['diabaikan_terkonfirmasi'] += 1
+                return None
+
+            suara = jejak.suara.setdefault(kunci, [0.0, 0])
+            suara[0] += float(conf)
+            suara[1] += 1
+            total = sum(s[0] for s in jejak.suara.values())
+            pemimpin = jejak.pemimpin
+            bobot, jumlah = jejak.suara[pemimpin]
+            if total <= 0 or bobot / total < self.porsi_menang:
+                return None
+
+            if pemimpin in self.indeks:
+                # Bacaan persis plat Pending dengan confidence tinggi tidak perlu menunggu frame berikutnya.
+                langsung = pemimpin == teks and conf >= self.conf_langsung
+                stabil = langsung or (jumlah >= self.min_baca and bobot >= self.ambang_bobot)
+            else:
+                stabil = jumlah >= self.min_baca_anomali and bobot >= self.ambang_bobot
+            if not stabil:
+                return None
+
+            jejak.plat = pemimpin
+            self._statistik['dikonfirmasi'] += 1
+            return pemimpin, bobot / jumlah
+
+    def kotak_terkonfirmasi(self, kamera_id, waktu=None):
+        waktu = time.monotonic() if waktu is None else waktu
+        with self._lock:
+            return [j.kotak for j in self._bersihkan(kamera_id, waktu) if j.plat]
+
+    def lupakan(self, kamera_id=None):
+        with self._lock:
+            if kamera_id is None:
+                self._jejak.clear()
+            else:
+                self._jejak.pop(kamera_id, None)
+
+    def statistik(self):
+        with self._lock:
+            data = dict(self._statistik)
+            data['jejak_aktif'] = sum(len(d) for d in self._jejak.values())
+            return data